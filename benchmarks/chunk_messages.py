@@ -0,0 +1,142 @@
+"""
+Chunk message benchmark: broker bytes and enqueue/dequeue time per million chunks.
+
+Publishes the chunk tasks of a synthetic folder to a scratch queue on the
+broker from ``CELERY_BROKER_URL`` three ways: one JSON message per chunk, the
+way chunks used to be queued, batches as JSON, and batches as msgpack, the way
+``load_job`` queues them now. Reports the messages and bytes held by the broker
+and how long publishing them and consuming them back took, extrapolated to a
+million chunks; ``--chunks 1000000`` measures them outright, slowly::
+
+    python -m benchmarks.chunk_messages --file-size 262144
+
+Nothing runs the tasks; the queue is deleted afterwards.
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from benchmarks.utils import emit
+from benchmarks.utils import setup_django
+
+QUEUE = "benchmark-chunk-messages"
+PAGE_SIZE = 10_000
+
+
+def synthetic_chunks(chunks: int, file_size: int, chunk_size: int):
+    from yfiles.downloads.tasks import iter_chunks
+
+    file_id = 1_000_000
+    while True:
+        for offset, length in iter_chunks(file_size, chunk_size):
+            if not chunks:
+                return
+            yield file_id, offset, length
+            chunks -= 1
+        file_id += 1
+
+
+def queued_bytes(client) -> int:
+    total = 0
+    for start in range(0, client.llen(QUEUE), PAGE_SIZE):
+        total += sum(map(len, client.lrange(QUEUE, start, start + PAGE_SIZE - 1)))
+    return total
+
+
+def measure(app, client, messages: list[tuple], *, task, serializer: str) -> dict:
+    """Publish ``messages`` to the scratch queue, then consume them back."""
+    started = time.perf_counter()
+    for args in messages:
+        task.apply_async(args, queue=QUEUE, serializer=serializer)
+    enqueue = time.perf_counter() - started
+    size = queued_bytes(client)
+
+    started = time.perf_counter()
+    with app.connection_for_read() as connection:
+        queue = connection.SimpleQueue(QUEUE, accept=app.conf.accept_content)
+        for _ in messages:
+            message = queue.get(timeout=10)
+            message.decode()
+            message.ack()
+        queue.close()
+    dequeue = time.perf_counter() - started
+    return {
+        "messages": len(messages),
+        "broker_bytes": size,
+        "enqueue_s": enqueue,
+        "dequeue_s": dequeue,
+    }
+
+
+def run(*, chunks: int, file_size: int, chunk_size: int) -> dict:
+    from config.celery_app import app
+    from yfiles.downloads.tasks import batch_chunks
+    from yfiles.downloads.tasks import download_chunk
+    from yfiles.downloads.tasks import download_chunks
+
+    planned = list(synthetic_chunks(chunks, file_size, chunk_size))
+    batches = [(batch,) for batch in batch_chunks(planned)]
+    variants = {
+        "json_per_chunk": (download_chunk, "json", planned),
+        "json_batched": (download_chunks, "json", batches),
+        "msgpack_batched": (download_chunks, "msgpack", batches),
+    }
+    results = {}
+    with app.connection_for_write() as connection:
+        client = connection.default_channel.client
+        client.delete(QUEUE)
+        try:
+            for label, (task, serializer, messages) in variants.items():
+                result = measure(
+                    app,
+                    client,
+                    messages,
+                    task=task,
+                    serializer=serializer,
+                )
+                per_million = 1_000_000 / chunks
+                results[label] = {
+                    "messages": result["messages"],
+                    "bytes_per_chunk": round(result["broker_bytes"] / chunks),
+                    "per_million_chunks": {
+                        "messages": round(result["messages"] * per_million),
+                        "broker_mb": round(
+                            result["broker_bytes"] * per_million / 1024**2,
+                        ),
+                        "enqueue_s": round(result["enqueue_s"] * per_million, 1),
+                        "dequeue_s": round(result["dequeue_s"] * per_million, 1),
+                    },
+                }
+        finally:
+            client.delete(QUEUE)
+    return {
+        "chunks": chunks,
+        "file_size": file_size,
+        "chunk_size": chunk_size,
+        **results,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--file-size", type=int, default=4 * 1024 * 1024)
+    parser.add_argument("--chunk-size", type=int)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+
+    result = run(
+        chunks=args.chunks,
+        file_size=args.file_size,
+        chunk_size=args.chunk_size or settings.DOWNLOADS_CHUNK_SIZE,
+    )
+    emit("chunk_messages", result, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,164 @@
+"""
+Chunk queue benchmark: planning-to-first-chunk latency and broker depth of a job.
+
+Loads one running job with ``--files`` files into a scratch database and plans
+its chunks three ways, into a scratch queue on the broker from
+``CELERY_BROKER_URL``: every batch at once with one ``apply_async`` each, every
+batch at once through ``send_many``, and ``queue_chunks``, which queues
+``DOWNLOADS_QUEUE_AHEAD`` bytes and leaves the rest to the workers' refills.
+For each it reports how long until the first chunk message reached the broker,
+how long until planning returned and how many messages the broker then held::
+
+    python -m benchmarks.chunk_queue --files 100000
+
+Nothing runs the tasks. It fails when ``queue_chunks`` takes longer than
+``--max-first-chunk-ms`` to queue the first chunk.
+"""
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.utils import emit
+from benchmarks.utils import scratch_database
+from benchmarks.utils import setup_django
+
+QUEUE = "benchmark-chunk-queue"
+
+
+def populate(files: int, file_size: int):
+    from django.db import connection
+
+    from yfiles.downloads.models import DownloadJob
+    from yfiles.users.models import User
+
+    user = User.objects.create(email="benchmark@example.com")
+    job = DownloadJob.objects.create(
+        user=user,
+        public_url="https://disk.yandex.ru/d/benchmark",
+        status=DownloadJob.Status.RUNNING,
+        total_files=files,
+        total_bytes=files * file_size,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO downloads_downloadedfile
+                (job_id, path, size, modified, md5, sha256, status, done_bytes,
+                 upload_id, preview)
+            SELECT %s, '/file-' || n, %s, now(), '', '', 'pending', 0, '', ''
+            FROM generate_series(1, %s) AS n
+            """,
+            [job.pk, file_size, files],
+        )
+        cursor.execute("ANALYZE downloads_downloadedfile")
+    return job
+
+
+def first_message(client, timings: dict) -> None:
+    """Wait for the first message on the scratch queue and note when it came."""
+    if client.brpop([QUEUE], timeout=120):
+        timings["first"] = time.perf_counter()
+
+
+def timed_plan(client, plan) -> dict:
+    from redis import Redis
+
+    client.delete(QUEUE)
+    timings: dict[str, float] = {}
+    # A connection of its own: the planner's pipeline must not wait on BRPOP.
+    watcher = Redis(connection_pool=client.connection_pool)
+    waiting = threading.Thread(target=first_message, args=(watcher, timings))
+    waiting.start()
+    started = time.perf_counter()
+    messages = plan()
+    planned = time.perf_counter()
+    waiting.join()
+    # The watcher took one message off the queue.
+    depth = client.llen(QUEUE) + 1
+    client.delete(QUEUE)
+    return {
+        "messages": messages,
+        "broker_depth": depth,
+        "first_chunk_ms": round((timings["first"] - started) * 1000, 1),
+        "planned_s": round(planned - started, 2),
+    }
+
+
+def run(*, files: int, file_size: int) -> dict:
+    from django.conf import settings
+
+    from config.celery_app import app
+    from yfiles.core.dispatch import send_many
+    from yfiles.downloads.models import DownloadJob
+    from yfiles.downloads.tasks import batch_chunks
+    from yfiles.downloads.tasks import download_chunks
+    from yfiles.downloads.tasks import iter_chunks
+    from yfiles.downloads.tasks import queue_chunks
+
+    # The app reads its settings from the CELERY_ namespace of Django's.
+    app.conf.CELERY_TASK_ROUTES = {download_chunks.name: {"queue": QUEUE}}
+    job = populate(files, file_size)
+
+    def all_batches():
+        files = job.files.order_by("pk").values_list("pk", "size")
+        chunks = (
+            (file_id, offset, length)
+            for file_id, size in files.iterator()
+            for offset, length in iter_chunks(size, settings.DOWNLOADS_CHUNK_SIZE)
+        )
+        return ((batch,) for batch in batch_chunks(chunks))
+
+    def apply_async_each():
+        messages = 0
+        for args in all_batches():
+            download_chunks.apply_async(args)
+            messages += 1
+        return messages
+
+    def lazy():
+        DownloadJob.objects.filter(pk=job.pk).update(queued_bytes=0, queue_cursor=0)
+        return queue_chunks(job.pk)
+
+    with app.connection_for_write() as connection:
+        client = connection.default_channel.client
+        return {
+            "files": files,
+            "file_size": file_size,
+            "chunk_size": settings.DOWNLOADS_CHUNK_SIZE,
+            "queue_ahead": settings.DOWNLOADS_QUEUE_AHEAD,
+            "all_apply_async": timed_plan(client, apply_async_each),
+            "all_send_many": timed_plan(
+                client,
+                lambda: send_many(download_chunks, all_batches()),
+            ),
+            "queue_chunks": timed_plan(client, lazy),
+        }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--file-size", type=int, default=1024 * 1024)
+    parser.add_argument("--max-first-chunk-ms", type=float, default=1000.0)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    setup_django()
+    with scratch_database():
+        result = run(files=args.files, file_size=args.file_size)
+    emit("chunk_queue", result, args.output)
+    latency = result["queue_chunks"]["first_chunk_ms"]
+    if latency > args.max_first_chunk_ms:
+        sys.stderr.write(
+            f"queue_chunks queued the first chunk after {latency} ms, "
+            f"more than {args.max_first_chunk_ms} ms.\n",
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,160 @@
+"""
+Cold start benchmark: the first request to each major page of a new process.
+
+Every sample is a fresh interpreter, like a worker right after a deploy or a
+recycle. It requests each page twice and reports both latencies, once as is
+and once after ``compile_templates`` ran at boot the way ``config.asgi`` does.
+The boot cost of compiling is reported too.
+
+Run it against the server from ``DATABASE_URL``::
+
+    python -m benchmarks.cold_start
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from benchmarks.utils import emit
+from benchmarks.utils import scratch_database
+from benchmarks.utils import setup_django
+
+# (name, url name, url kwargs, signed in)
+PAGES: tuple[tuple[str, str, dict[str, str], bool], ...] = (
+    ("home", "home", {}, False),
+    ("about", "about", {}, False),
+    ("login", "account_login", {}, False),
+    ("signup", "account_signup", {}, False),
+    ("user_detail", "users:detail", {"pk": "user"}, True),
+    ("user_update", "users:update", {}, True),
+    ("job_files", "downloads:files", {"pk": "job"}, True),
+    ("file_search", "downloads:search", {}, True),
+)
+
+
+def child(*, database: str, user_id: int, job_id: int, compile_: bool) -> dict:
+    """Time the pages in this process; runs in the interpreter the parent spawns."""
+    setup_django()
+    from django.conf import settings
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+    from django.urls import reverse
+
+    from yfiles.core.templating import compile_templates
+    from yfiles.users.models import User
+
+    settings.DATABASES["default"]["NAME"] = database
+    setup_test_environment()
+    compile_ms = None
+    if compile_:
+        started = time.perf_counter()
+        compile_templates()
+        compile_ms = (time.perf_counter() - started) * 1000
+
+    anonymous = Client()
+    signed_in = Client()
+    signed_in.force_login(User.objects.get(pk=user_id))
+    ids = {"user": user_id, "job": job_id}
+    pages = {}
+    for name, url_name, kwargs, authenticated in PAGES:
+        url = reverse(url_name, kwargs={key: ids[v] for key, v in kwargs.items()})
+        client = signed_in if authenticated else anonymous
+        timings = []
+        for _ in range(2):
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:  # noqa: PLR2004
+            msg = f"{url} answered {response.status_code}"
+            raise RuntimeError(msg)
+        pages[name] = timings
+    return {"compile_ms": compile_ms, "pages": pages}
+
+
+def spawn(*, compile_: bool, database: str, user_id: int, job_id: int) -> dict:
+    command = [
+        sys.executable,
+        "-m",
+        "benchmarks.cold_start",
+        "--child",
+        f"--database={database}",
+        f"--user={user_id}",
+        f"--job={job_id}",
+    ]
+    if compile_:
+        command.append("--compile")
+    output = subprocess.run(command, check=True, capture_output=True, text=True)  # noqa: S603
+    return json.loads(output.stdout)
+
+
+def run(*, processes: int) -> dict:
+    from django.db import connection
+
+    from yfiles.downloads.models import DownloadJob
+    from yfiles.users.models import User
+
+    user = User.objects.create(email="benchmark@example.com", name="Benchmark")
+    job = DownloadJob.objects.create(user=user, public_url="https://x.ru/d/1")
+    ids = {
+        "database": connection.settings_dict["NAME"],
+        "user_id": user.pk,
+        "job_id": job.pk,
+    }
+    results: dict = {"processes": processes}
+    for label, compile_ in (("lazy", False), ("compiled_at_boot", True)):
+        samples = [spawn(compile_=compile_, **ids) for _ in range(processes)]
+        results[label] = {
+            name: {
+                "first_request_ms": round(
+                    statistics.median(s["pages"][name][0] for s in samples),
+                    2,
+                ),
+                "second_request_ms": round(
+                    statistics.median(s["pages"][name][1] for s in samples),
+                    2,
+                ),
+            }
+            for name, *_ in PAGES
+        }
+        if compile_:
+            results[label]["boot_compile_ms"] = round(
+                statistics.median(s["compile_ms"] for s in samples),
+                2,
+            )
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--processes", type=int, default=5)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--compile", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--database", help=argparse.SUPPRESS)
+    parser.add_argument("--user", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--job", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = child(
+            database=args.database,
+            user_id=args.user,
+            job_id=args.job,
+            compile_=args.compile,
+        )
+        sys.stdout.write(json.dumps(result))
+        return 0
+
+    setup_django()
+    with scratch_database():
+        result = run(processes=args.processes)
+    emit("cold_start", result, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
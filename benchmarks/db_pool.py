@@ -0,0 +1,159 @@
+"""
+Load test: many concurrent workers sharing a small psycopg connection pool.
+
+Every worker is a thread with its own Django connection wrapper, exactly like
+gunicorn threads or celery greenlets, while the pool underneath is shared per
+process. A monitor samples ``pg_stat_activity`` to prove the server never sees
+more connections than the pool allows.
+
+Run it against the database from ``DATABASE_URL``::
+
+    python -m benchmarks.db_pool --workers 500 --pool-size 8
+
+``--no-pool`` runs the same load with one connection per worker for comparison.
+"""
+
+import argparse
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.utils import emit
+from benchmarks.utils import percentile
+from benchmarks.utils import setup_django
+
+APPLICATION_NAME = "yfiles-db-pool-benchmark"
+
+
+def configure_databases(*, pool_size: int, timeout: float, use_pool: bool) -> None:
+    """Point the default alias at a pool before any connection is opened."""
+    from django.conf import settings
+
+    default = settings.DATABASES["default"]
+    default["CONN_MAX_AGE"] = 0
+    default["ATOMIC_REQUESTS"] = False
+    default["OPTIONS"] = {**default.get("OPTIONS", {})}
+    monitor = {**default, "OPTIONS": {**default["OPTIONS"]}}
+    default["OPTIONS"]["application_name"] = APPLICATION_NAME
+    if use_pool:
+        default["OPTIONS"]["pool"] = {
+            "min_size": pool_size,
+            "max_size": pool_size,
+            "timeout": timeout,
+        }
+    settings.DATABASES["monitor"] = monitor
+
+
+def run(  # noqa: PLR0913
+    *,
+    workers: int,
+    queries: int,
+    hold: float,
+    pool_size: int,
+    timeout: float,
+    use_pool: bool,
+) -> dict:
+    configure_databases(pool_size=pool_size, timeout=timeout, use_pool=use_pool)
+    from django.db import connections
+
+    waits: list[float] = []
+    latencies: list[float] = []
+    errors: list[str] = []
+    peak = 0
+    lock = threading.Lock()
+    done = threading.Event()
+    barrier = threading.Barrier(workers + 1)
+
+    def monitor() -> None:
+        nonlocal peak
+        with connections["monitor"].cursor() as cursor:
+            while not done.is_set():
+                cursor.execute(
+                    "SELECT count(*) FROM pg_stat_activity WHERE application_name = %s",
+                    [APPLICATION_NAME],
+                )
+                peak = max(peak, cursor.fetchone()[0])
+                time.sleep(0.005)
+        connections["monitor"].close()
+
+    def worker() -> None:
+        connection = connections["default"]
+        barrier.wait()
+        for _ in range(queries):
+            started = time.perf_counter()
+            try:
+                connection.ensure_connection()
+                acquired = time.perf_counter()
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT pg_sleep(%s)", [hold])
+            except Exception as exc:  # noqa: BLE001
+                with lock:
+                    errors.append(type(exc).__name__)
+            else:
+                finished = time.perf_counter()
+                with lock:
+                    waits.append(acquired - started)
+                    latencies.append(finished - started)
+            finally:
+                # Returns the connection to the pool (or closes it without one).
+                connection.close()
+
+    monitor_thread = threading.Thread(target=monitor, daemon=True)
+    monitor_thread.start()
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    monitor_thread.join()
+
+    return {
+        "workers": workers,
+        "queries_per_worker": queries,
+        "hold_seconds": hold,
+        "pool": use_pool,
+        "pool_size": pool_size if use_pool else None,
+        "elapsed_seconds": round(elapsed, 3),
+        "queries_per_second": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "peak_server_connections": peak,
+        "acquire_wait_p50_ms": round(percentile(waits, 50) * 1000, 2),
+        "acquire_wait_p99_ms": round(percentile(waits, 99) * 1000, 2),
+        "latency_p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "latency_p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "errors": len(errors),
+        "error_types": sorted(set(errors)),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--workers", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=5, help="queries per worker")
+    parser.add_argument("--hold", type=float, default=0.01, help="seconds per query")
+    parser.add_argument("--pool-size", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--no-pool", dest="use_pool", action="store_false")
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    setup_django()
+    result = run(
+        workers=args.workers,
+        queries=args.queries,
+        hold=args.hold,
+        pool_size=args.pool_size,
+        timeout=args.timeout,
+        use_pool=args.use_pool,
+    )
+    emit("db_pool", result, args.output)
+    if args.use_pool and result["peak_server_connections"] > args.pool_size:
+        return 1
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
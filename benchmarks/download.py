@@ -0,0 +1,215 @@
+"""
+End-to-end download benchmark: a whole job against an emulated Yandex Disk.
+
+Serves a generated public folder of ``--files`` files from a local stand-in of
+Yandex Disk, as slow and unreliable as asked (``--latency-ms``,
+``--bandwidth-mb`` per download, ``--error-rate`` and ``--reset-rate`` of
+downloads failing), and loads it into a scratch database and media directory
+with the real tasks. ``--pool eager`` runs every task in this process as it is
+queued; ``--pool threads`` starts an in-process worker with ``--concurrency``
+threads consuming from the broker in ``CELERY_BROKER_URL``, which no other
+worker may consume from::
+
+    python -m benchmarks.download --files 200 --file-size 4194304 \\
+        --pool threads --concurrency 8 --latency-ms 20 --error-rate 0.02
+
+Reports files/s, MB/s, p50/p99 chunk latency (from the start of a chunk
+fetch until it is written) and the peak RSS of the process as JSON. Given the
+JSON of an earlier run as ``--baseline`` it fails when throughput fell, or p99
+latency grew, by more than ``--max-regression``.
+"""
+
+import argparse
+import json
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from benchmarks.utils import emit
+from benchmarks.utils import percentile
+from benchmarks.utils import scratch_database
+from benchmarks.utils import setup_django
+from benchmarks.yandex_standin import StandIn
+
+
+class ChunkTimer:
+    """Time every chunk from the start of its fetch until it is recorded."""
+
+    def __init__(self):
+        self.latencies: list[float] = []
+        self._local = threading.local()
+
+    @contextmanager
+    def installed(self):
+        from yfiles.downloads import tasks
+
+        fetch_chunk, record_chunk = tasks.fetch_chunk, tasks.record_chunk
+
+        def timed_fetch_chunk(*args, **kwargs):
+            # Eager refills fetch chunks from within a fetch: keep a stack.
+            starts = self._local.__dict__.setdefault("starts", [])
+            starts.append(time.perf_counter())
+            try:
+                return fetch_chunk(*args, **kwargs)
+            finally:
+                starts.pop()
+
+        def timed_record_chunk(*args, **kwargs):
+            self.latencies.append(time.perf_counter() - self._local.starts[-1])
+            return record_chunk(*args, **kwargs)
+
+        tasks.fetch_chunk, tasks.record_chunk = timed_fetch_chunk, timed_record_chunk
+        try:
+            yield self
+        finally:
+            tasks.fetch_chunk, tasks.record_chunk = fetch_chunk, record_chunk
+
+
+def wait(job, timeout: float) -> None:
+    started = time.monotonic()
+    while time.monotonic() - started < timeout:
+        job.refresh_from_db()
+        if job.is_finished:
+            return
+        time.sleep(0.05)
+
+
+def run(args) -> dict:
+    from celery.contrib.testing.worker import start_worker
+    from django.conf import settings
+
+    from config.celery_app import app
+    from yfiles.downloads.models import DownloadedFile
+    from yfiles.downloads.models import DownloadJob
+    from yfiles.downloads.tasks import load_job
+    from yfiles.users.models import User
+
+    media = Path(tempfile.mkdtemp(prefix="download-benchmark-"))
+    settings.MEDIA_ROOT = str(media)
+    settings.DOWNLOADS_CHUNK_SIZE = args.chunk_size
+    # Injected faults are retried within the run.
+    settings.DOWNLOADS_RETRY_BACKOFF_MAX = 1
+    settings.CELERY_TASK_ALWAYS_EAGER = args.pool == "eager"
+    files = {f"/benchmark/{n:06}.bin": args.file_size for n in range(args.files)}
+    standin = StandIn(
+        files,
+        latency=args.latency_ms / 1000,
+        bandwidth=args.bandwidth_mb * 1024 * 1024 if args.bandwidth_mb else None,
+        error_rate=args.error_rate,
+        reset_rate=args.reset_rate,
+        seed=args.seed,
+    )
+    user = User.objects.create(email="download@example.com")
+    job = DownloadJob.objects.create(
+        user=user,
+        public_url="https://disk.yandex.ru/d/benchmark",
+    )
+    timer = ChunkTimer()
+    try:
+        with standin, timer.installed():
+            settings.YANDEX_DISK_API_URL = standin.api_url
+            started = time.perf_counter()
+            if args.pool == "eager":
+                load_job(job.pk)
+            else:
+                with start_worker(
+                    app,
+                    pool="threads",
+                    concurrency=args.concurrency,
+                    perform_ping_check=False,
+                    shutdown_timeout=60,
+                ):
+                    load_job.delay(job.pk)
+                    wait(job, args.timeout)
+            elapsed = time.perf_counter() - started
+    finally:
+        shutil.rmtree(media, ignore_errors=True)
+
+    job.refresh_from_db()
+    failed = job.files.filter(status=DownloadedFile.Status.FAILED).count()
+    return {
+        "pool": args.pool,
+        "concurrency": 1 if args.pool == "eager" else args.concurrency,
+        "files": args.files,
+        "file_size": args.file_size,
+        "chunk_size": args.chunk_size,
+        "latency_ms": args.latency_ms,
+        "bandwidth_mb": args.bandwidth_mb,
+        "error_rate": args.error_rate,
+        "reset_rate": args.reset_rate,
+        "status": job.status,
+        "failed_files": failed,
+        "faults": standin.faults,
+        "requests": standin.requests,
+        "chunks": len(timer.latencies),
+        "elapsed_s": round(elapsed, 2),
+        "files_per_s": round(job.done_files / elapsed, 1),
+        "mb_per_s": round(job.done_bytes / 1024 / 1024 / elapsed, 1),
+        "chunk_p50_ms": round(percentile(timer.latencies, 50) * 1000, 1),
+        "chunk_p99_ms": round(percentile(timer.latencies, 99) * 1000, 1),
+        # ru_maxrss is in kB on Linux.
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            1,
+        ),
+    }
+
+
+def regressions(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    """What got worse than ``baseline`` by more than ``tolerance``."""
+    return [
+        f"{key} fell from {baseline[key]} to {result[key]}"
+        for key in ("files_per_s", "mb_per_s")
+        if result[key] < baseline[key] * (1 - tolerance)
+    ] + [
+        f"{key} grew from {baseline[key]} to {result[key]}"
+        for key in ("chunk_p99_ms",)
+        if result[key] > baseline[key] * (1 + tolerance)
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--file-size", type=int, default=4 * 1024 * 1024)
+    parser.add_argument("--chunk-size", type=int, default=1024 * 1024)
+    parser.add_argument("--pool", choices=["eager", "threads"], default="eager")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--bandwidth-mb", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--reset-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=30 * 60)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    setup_django()
+    with scratch_database():
+        result = run(args)
+    emit("download", result, args.output)
+    if result["status"] != "done":
+        sys.stderr.write(
+            f"The job ended {result['status']} "
+            f"with {result['failed_files']} failed files.\n",
+        )
+        return 1
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        found = regressions(result, baseline, args.max_regression)
+        for regression in found:
+            sys.stderr.write(f"Regression: {regression}.\n")
+        if found:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,127 @@
+"""
+File browser benchmark: the last page of a huge job against the first one.
+
+Loads one job with ``--files`` rows into a scratch database and times keyset
+pages at the start and at the very end of every browser ordering, next to the
+``OFFSET`` query a regular paginator would run for that deep page. The query
+plan of each deep keyset page is reported too: it should be an index-only scan.
+
+Run it against the server from ``DATABASE_URL``::
+
+    python -m benchmarks.file_browser --files 200000
+"""
+
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+from benchmarks.utils import emit
+from benchmarks.utils import scratch_database
+from benchmarks.utils import setup_django
+
+SORTS = ("path", "size", "-size", "modified")
+
+
+def populate(files: int):
+    from django.db import connection
+
+    from yfiles.downloads.models import DownloadJob
+    from yfiles.users.models import User
+
+    user = User.objects.create(email="benchmark@example.com")
+    job = DownloadJob.objects.create(
+        user=user,
+        public_url="https://disk.yandex.ru/d/benchmark",
+        total_files=files,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO downloads_downloadedfile
+                (job_id, path, size, modified, md5, sha256, status, done_bytes,
+                 upload_id, preview)
+            SELECT %s, '/dir-' || mod(n, 1000) || '/file-' || n,
+                   mod(n * 7919, 100000), now() - n * interval '1 second',
+                   '', '', 'pending', 0, '', ''
+            FROM generate_series(1, %s) AS n
+            """,
+            [job.pk, files],
+        )
+        # Index-only scans need an up to date visibility map.
+        cursor.execute("VACUUM ANALYZE downloads_downloadedfile")
+    return job
+
+
+def timed(func, repeat: int) -> float:
+    """Median wall time of ``func`` in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return round(statistics.median(samples) * 1000, 3)
+
+
+def scan_node(func) -> str:
+    """The scan node of the plan of the last query ``func`` runs."""
+    from django.db import connection
+    from django.db import reset_queries
+    from django.test.utils import CaptureQueriesContext
+
+    # The log is bounded: a full one would hide the query from the context.
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        func()
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN " + queries.captured_queries[-1]["sql"])
+        lines = [row[0].strip() for row in cursor.fetchall()]
+    return next(line for line in lines if "Scan" in line)
+
+
+def run(*, files: int, per_page: int, repeat: int) -> dict:
+    from yfiles.downloads.pagination import KeysetPaginator
+    from yfiles.downloads.views import FILE_SORTS
+
+    job = populate(files)
+    queryset = job.files.only("job", "path", "size", "modified", "status")
+    depth = files - per_page
+    results: dict = {"files": files, "per_page": per_page, "sorts": {}}
+    for sort in SORTS:
+        ordering = FILE_SORTS[sort]
+        paginator = KeysetPaginator(queryset, ordering, per_page)
+        # Position the cursor on the last page once; browsing gets there by hops.
+        cursor = paginator.encode(queryset.order_by(*ordering)[depth - 1])
+
+        def deep_page(paginator=paginator, cursor=cursor):
+            return paginator.page(after=cursor)
+
+        def offset_page(ordering=ordering):
+            return list(queryset.order_by(*ordering)[depth : depth + per_page])
+
+        results["sorts"][sort] = {
+            "first_page_ms": timed(paginator.page, repeat),
+            "last_page_ms": timed(deep_page, repeat),
+            "last_page_offset_ms": timed(offset_page, repeat),
+            "last_page_plan": scan_node(deep_page),
+        }
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--files", type=int, default=200_000)
+    parser.add_argument("--per-page", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    setup_django()
+    with scratch_database():
+        result = run(files=args.files, per_page=args.per_page, repeat=args.repeat)
+    emit("file_browser", result, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,103 @@
+"""
+File search benchmark: substring queries over millions of file paths.
+
+Loads ``--files`` paths spread over ``--users`` users into a scratch database,
+builds the trigram index and times ``search_files`` for a handful of queries,
+first against Postgres and then from the cache.
+
+Run it against the server from ``DATABASE_URL``::
+
+    python -m benchmarks.file_search --files 10000000
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from benchmarks.utils import emit
+from benchmarks.utils import percentile
+from benchmarks.utils import scratch_database
+from benchmarks.utils import setup_django
+
+QUERIES = ("holiday", "IMG_1234", "report-2024", "dir-42/", "beach.jpg", "zzzz")
+WORDS = ("holiday", "report", "beach", "invoice", "scan", "IMG", "video", "notes")
+
+
+def populate(*, files: int, users: int) -> list[int]:
+    from django.db import connection
+
+    from yfiles.downloads.models import DownloadJob
+    from yfiles.users.models import User
+
+    job_ids = []
+    for n in range(users):
+        user = User.objects.create(email=f"benchmark-{n}@example.com")
+        job = DownloadJob.objects.create(user=user, public_url=f"https://x.ru/d/{n}")
+        job_ids.append(job.pk)
+    words = "ARRAY[" + ",".join(f"'{word}'" for word in WORDS) + "]"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO downloads_downloadedfile
+                (job_id, path, size, modified, md5, sha256, status, done_bytes,
+                 upload_id, preview)
+            SELECT (%s::int[])[1 + mod(n, %s)],
+                   '/dir-' || mod(n, 1000) || '/' || ({words})[1 + mod(n / %s, 8)]
+                       || '_' || n || '-' || (2000 + mod(n, 25))
+                       || '.jpg',
+                   n, now(), '', '', 'done', n, '', ''
+            FROM generate_series(1, %s) AS n
+            """,  # noqa: S608
+            [job_ids, users, users, files],
+        )
+        cursor.execute("VACUUM ANALYZE downloads_downloadedfile")
+    return [
+        DownloadJob.objects.values_list("user_id", flat=True).get(pk=job_id)
+        for job_id in job_ids
+    ]
+
+
+def run(*, files: int, users: int, repeat: int) -> dict:
+    from django.core.cache import cache
+
+    from yfiles.downloads.search import search_files
+
+    user_ids = populate(files=files, users=users)
+    results: dict = {"files": files, "users": users, "queries": {}}
+    for query in QUERIES:
+        cold, warm = [], []
+        for n in range(repeat):
+            user_id = user_ids[n % users]
+            cache.clear()
+            started = time.perf_counter()
+            found = search_files(user_id, query)
+            cold.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            search_files(user_id, query)
+            warm.append(time.perf_counter() - started)
+        results["queries"][query] = {
+            "results": len(found),
+            "db_p50_ms": round(percentile(cold, 50) * 1000, 2),
+            "db_p99_ms": round(percentile(cold, 99) * 1000, 2),
+            "cached_p50_ms": round(percentile(warm, 50) * 1000, 3),
+        }
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--files", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    setup_django()
+    with scratch_database():
+        result = run(files=args.files, users=args.users, repeat=args.repeat)
+    emit("file_search", result, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,158 @@
+"""
+Gunicorn workers benchmark: boot time and memory of the web tier's workers.
+
+Starts gunicorn on ``config.asgi`` with ``config/gunicorn.py`` three times: as
+it is, preloading the application and freezing it before each fork; preloading
+without the freeze; and with every worker importing the application itself, as
+gunicorn does by default. Each worker runs a full collection once it has
+booted, as it would within its first requests. Reports:
+
+- ``boot_ms``: from the start until every worker is ready
+- ``respawn_ms``: from killing a worker until its replacement is ready, as
+  after ``max_requests``
+- per worker, the median ``rss_mb``, ``pss_mb`` (shared pages divided among
+  the processes sharing them) and ``uss_mb`` (pages of its own), and the
+  ``pss_mb`` of the whole tier, master included
+
+Settings that production reads from the environment fall back to placeholders,
+nothing connects to Postgres or Redis::
+
+    python -m benchmarks.gunicorn_workers --workers 4
+"""
+
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.utils import emit
+from benchmarks.worker_startup import PLACEHOLDER_ENV
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+CONFIG = """
+import gc, json, os, time
+
+exec(compile(open({config!r}).read(), {config!r}, "exec"))
+bind = "127.0.0.1:0"
+chdir = {chdir!r}
+workers = {workers}
+preload_app = {preload}
+worker_tmp_dir = {tmp!r}
+if not {freeze}:
+    def pre_fork(server, worker):
+        pass
+
+def post_worker_init(worker):
+    gc.collect()
+    with open({ready!r}, "a") as ready:
+        ready.write(json.dumps({{"pid": os.getpid(), "at": time.time()}}) + "\\n")
+"""
+SMAPS_FIELDS = ("Rss", "Pss", "Private_Clean", "Private_Dirty")
+
+
+def memory(pid: int) -> dict[str, float]:
+    """Memory of a process from ``/proc/<pid>/smaps_rollup``, in MB."""
+    fields = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines():
+        name, _, value = line.partition(":")
+        if name in SMAPS_FIELDS:
+            fields[name] = int(value.split()[0]) / 1024
+    return {
+        "rss_mb": fields["Rss"],
+        "pss_mb": fields["Pss"],
+        "uss_mb": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def wait_ready(ready: Path, count: int, timeout: float = 300) -> list[dict]:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if ready.exists():
+            lines = ready.read_text().splitlines()
+            if len(lines) >= count:
+                return [json.loads(line) for line in lines]
+        time.sleep(0.05)
+    msg = f"{count} workers were not ready in {timeout} seconds"
+    raise TimeoutError(msg)
+
+
+def run(*, workers: int, preload: bool, freeze: bool) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        ready = Path(directory) / "ready"
+        config = Path(directory) / "gunicorn.py"
+        config.write_text(
+            CONFIG.format(
+                config=str(BASE_DIR / "config" / "gunicorn.py"),
+                chdir=str(BASE_DIR),
+                workers=workers,
+                preload=preload,
+                freeze=freeze,
+                tmp=directory,
+                ready=str(ready),
+            ),
+        )
+        env = {
+            **PLACEHOLDER_ENV,
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": "config.settings.production",
+        }
+        started = time.time()
+        master = subprocess.Popen(  # noqa: S603
+            [sys.executable, "-m", "gunicorn", "config.asgi", "--config", config],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            marks = wait_ready(ready, workers)
+            boot_ms = (max(mark["at"] for mark in marks) - started) * 1000
+            pids = [mark["pid"] for mark in marks]
+            samples = [memory(pid) for pid in pids]
+            tier_pss = sum(s["pss_mb"] for s in samples) + memory(master.pid)["pss_mb"]
+
+            killed = time.time()
+            os.kill(pids[0], signal.SIGKILL)
+            respawn = wait_ready(ready, workers + 1)[-1]
+            respawn_ms = (respawn["at"] - killed) * 1000
+        finally:
+            master.terminate()
+            master.wait()
+    return {
+        "boot_ms": round(boot_ms),
+        "respawn_ms": round(respawn_ms),
+        "worker": {
+            key: round(statistics.median(s[key] for s in samples), 1)
+            for key in ("rss_mb", "pss_mb", "uss_mb")
+        },
+        "tier_pss_mb": round(tier_pss, 1),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    results = {
+        "workers": args.workers,
+        "preload": run(workers=args.workers, preload=True, freeze=True),
+        "preload_without_freeze": run(
+            workers=args.workers,
+            preload=True,
+            freeze=False,
+        ),
+        "per_worker_import": run(workers=args.workers, preload=False, freeze=False),
+    }
+    emit("gunicorn_workers", results, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,149 @@
+"""
+Load test of the web tier: the allauth login, the user pages and job progress.
+
+Every simulated user logs in as one of the users ``benchmarks.web_seed`` wrote
+to ``--seed-file``. It then browses its detail page, ``users:redirect`` and
+``users:update`` (submitting the form now and then), polls and long-polls the
+status of its jobs and opens their progress stream. Once in a while it logs out
+and in again. Requests are named after their views, so locust reports throughput
+and latency percentiles per view; ``--report`` also writes them as JSON when
+the run ends. Run it from the repository root so ``benchmarks`` is importable::
+
+    python -m locust -f benchmarks/locustfile.py --host http://localhost:8000 \\
+        --headless --users 200 --spawn-rate 20 --run-time 2m --report web.json
+"""
+
+import itertools
+import json
+from pathlib import Path
+
+from locust import HttpUser
+from locust import between
+from locust import events
+from locust import task
+from locust.clients import ResponseContextManager
+
+from benchmarks.utils import emit
+
+PERCENTILES = (0.5, 0.95, 0.99)
+
+seeded: "itertools.cycle[dict]"
+
+
+@events.init_command_line_parser.add_listener
+def add_arguments(parser) -> None:
+    parser.add_argument(
+        "--seed-file",
+        default="loadtest-users.json",
+        help="Users written by benchmarks.web_seed",
+    )
+    parser.add_argument("--report", default="", help="Write per-view stats as JSON")
+
+
+@events.init.add_listener
+def load_users(environment, **kwargs) -> None:
+    global seeded  # noqa: PLW0603
+    seeded = itertools.cycle(
+        json.loads(Path(environment.parsed_options.seed_file).read_text()),
+    )
+
+
+@events.quitting.add_listener
+def write_report(environment, **kwargs) -> None:
+    if not environment.parsed_options.report:
+        return
+    views = {}
+    for entry in [*environment.stats.entries.values(), environment.stats.total]:
+        views[f"{entry.method or ''} {entry.name}".strip()] = {
+            "requests": entry.num_requests,
+            "failures": entry.num_failures,
+            "requests_per_s": round(entry.total_rps, 1),
+            **{
+                f"p{round(q * 100)}_ms": entry.get_response_time_percentile(q)
+                for q in PERCENTILES
+            },
+        }
+    emit("web_load", {"views": views}, Path(environment.parsed_options.report))
+
+
+class WebUser(HttpUser):
+    wait_time = between(0.5, 2)
+
+    def on_start(self) -> None:
+        self.user = next(seeded)
+        self.login()
+
+    def post_form(self, url: str, data: dict, name: str) -> None:
+        """Submit a form as a browser would, and expect a redirect."""
+        data = {"csrfmiddlewaretoken": self.client.cookies.get("csrftoken"), **data}
+        with self.client.post(
+            url,
+            data,
+            headers={"Referer": f"{self.host}{url}"},
+            allow_redirects=False,
+            name=name,
+            catch_response=True,
+        ) as response:
+            assert isinstance(response, ResponseContextManager)  # type guard
+            if response.status_code != 302:  # noqa: PLR2004
+                response.failure(f"Expected a redirect, got {response.status_code}")
+
+    def login(self) -> None:
+        self.client.get("/accounts/login/", name="account_login")
+        self.post_form(
+            "/accounts/login/",
+            {"login": self.user["email"], "password": self.user["password"]},
+            name="account_login",
+        )
+
+    @task
+    def relogin(self) -> None:
+        self.post_form("/accounts/logout/", {}, name="account_logout")
+        self.login()
+
+    @task(10)
+    def detail(self) -> None:
+        self.client.get(f"/users/{self.user['id']}/", name="users:detail")
+
+    @task(5)
+    def redirect(self) -> None:
+        self.client.get(
+            "/users/~redirect/",
+            allow_redirects=False,
+            name="users:redirect",
+        )
+
+    @task(3)
+    def update(self) -> None:
+        self.client.get("/users/~update/", name="users:update")
+        self.post_form(
+            "/users/~update/",
+            {"name": f"Load {self.user['id']}"},
+            name="users:update",
+        )
+
+    @task(10)
+    def status(self) -> None:
+        self.client.get(
+            f"/downloads/{self.user['done_job']}/status/",
+            name="downloads:status",
+        )
+
+    @task(2)
+    def long_poll(self) -> None:
+        # Held for the whole wait: the running job is never updated.
+        url = f"/downloads/{self.user['running_job']}/status/"
+        revision = self.client.get(url, name="downloads:status").json()["revision"]
+        self.client.get(
+            url,
+            params={"wait": 2, "since": revision},
+            name="downloads:status?wait",
+        )
+
+    @task(3)
+    def progress(self) -> None:
+        # The stream of a finished job ends after its one event.
+        self.client.get(
+            f"/downloads/{self.user['done_job']}/progress/",
+            name="downloads:progress",
+        )
@@ -0,0 +1,147 @@
+"""
+Logging overhead benchmark: time a chunk spends logging, by handler.
+
+Logs what a chunk logs, correlation fields included, ``--chunks`` times from
+``--threads`` threads, as download workers do, to a stream that takes
+``--write-latency-us`` per line, like a pipe to a busy log collector:
+
+- ``sync_text``: the former ``StreamHandler`` with the verbose text format
+- ``queue_json``: ``QueueStreamHandler`` with ``JsonFormatter``
+
+each with the chunk DEBUG records off, on (``_debug``), and on but rate limited
+by ``RateLimitFilter`` to ``--rate`` a second (``_debug_limited``).
+
+Reports the logging time per chunk in the logging threads (p50/p99, in
+microseconds), the lines written and the records dropped::
+
+    python -m benchmarks.logging_overhead --chunks 20000 --threads 8
+"""
+
+import argparse
+import logging
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.utils import emit
+from benchmarks.utils import percentile
+from benchmarks.utils import setup_django
+
+VERBOSE = "%(levelname)s %(asctime)s %(module)s %(process)d %(thread)d %(message)s"
+
+
+class SlowStream:
+    """Discards lines, taking ``latency`` seconds for each."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.lines = 0
+
+    def write(self, text: str) -> None:
+        self.lines += text.count("\n")
+        time.sleep(self.latency)
+
+    def flush(self) -> None:
+        pass
+
+
+def handler(mode: str, stream: SlowStream) -> logging.Handler:
+    from yfiles.core import logs
+
+    if mode.startswith("sync_text"):
+        sync = logging.StreamHandler(stream)
+        sync.setFormatter(logging.Formatter(VERBOSE))
+        return sync
+    queued = logs.QueueStreamHandler(stream)
+    queued.setFormatter(logs.JsonFormatter())
+    queued.addFilter(logs.ContextFilter())
+    return queued
+
+
+def run(mode: str, *, chunks: int, threads: int, latency: float, rate: float):
+    from yfiles.core import logs
+
+    stream = SlowStream(latency)
+    target = handler(mode, stream)
+    chunk_logger = logging.getLogger("yfiles.downloads.chunks")
+    chunk_logger.handlers = [target]
+    chunk_logger.propagate = False
+    chunk_logger.setLevel(logging.DEBUG if "_debug" in mode else logging.INFO)
+    chunk_logger.filters = []
+    if mode.endswith("_limited"):
+        chunk_logger.addFilter(logs.RateLimitFilter(rate))
+
+    timings: list[float] = []
+
+    def worker(first: int) -> None:
+        local = []
+        for n in range(first, chunks, threads):
+            started = time.perf_counter()
+            with logs.context(file_id=n // 8, offset=n % 8 * 8_388_608):
+                with logs.context(job_id=1):
+                    chunk_logger.debug("Chunk of %d bytes done", 8_388_608)
+                if n % 100 == 0:
+                    # Failures are rarer than chunks, and always logged.
+                    chunk_logger.info("Chunk failed, retrying in %ss: %r", 4, "Timeout")
+            local.append(time.perf_counter() - started)
+        timings.extend(local)
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    logged = time.perf_counter() - started
+    dropped = getattr(target, "dropped", 0)
+    target.flush()
+    target.close()
+    return {
+        "logging_s": round(logged, 3),
+        "drained_s": round(time.perf_counter() - started, 3),
+        "per_chunk_p50_us": round(percentile(timings, 50) * 1e6, 1),
+        "per_chunk_p99_us": round(percentile(timings, 99) * 1e6, 1),
+        "lines": stream.lines,
+        "dropped": dropped,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--chunks", type=int, default=20_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--write-latency-us", type=float, default=200)
+    parser.add_argument("--rate", type=float, default=10)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    setup_django()
+    results = {
+        mode: run(
+            mode,
+            chunks=args.chunks,
+            threads=args.threads,
+            latency=args.write_latency_us / 1e6,
+            rate=args.rate,
+        )
+        for mode in (
+            f"{output}{debug}"
+            for output in ("sync_text", "queue_json")
+            for debug in ("", "_debug", "_debug_limited")
+        )
+    }
+    emit(
+        "logging_overhead",
+        {
+            "chunks": args.chunks,
+            "threads": args.threads,
+            "write_latency_us": args.write_latency_us,
+            **results,
+        },
+        args.output,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
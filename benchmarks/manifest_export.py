@@ -0,0 +1,128 @@
+"""
+Manifest export benchmark: memory and throughput of exporting large jobs.
+
+Seeds a job of each of the ``--files`` sizes with generated rows and exports
+it in each mode:
+
+- ``write_jsonl``, ``write_csv``: ``manifest.write``, as the management command
+- ``stream_jsonl``: ``manifest.stream``, as the view
+- ``buffered_jsonl``: one query and one string, as a view building it would
+
+Reports, per job size and mode, rows/s and the peak of Python allocations in
+MB (tracemalloc). The streaming modes stay flat whatever the size of the job;
+the buffered one grows with it::
+
+    python -m benchmarks.manifest_export --files 10000 100000 1000000
+"""
+
+import argparse
+import io
+import time
+import tracemalloc
+from pathlib import Path
+
+from asgiref.sync import async_to_sync
+
+from benchmarks.utils import emit
+from benchmarks.utils import scratch_database
+from benchmarks.utils import setup_django
+
+MODES = ("write_jsonl", "write_csv", "stream_jsonl", "buffered_jsonl")
+
+
+class Sink(io.TextIOBase):
+    """Counts what is written and keeps none of it."""
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, text: str) -> int:
+        self.size += len(text)
+        return len(text)
+
+
+def seed(files: int) -> int:
+    from django.db import connection
+
+    from yfiles.downloads.models import DownloadJob
+    from yfiles.users.tests.factories import UserFactory
+
+    job = DownloadJob.objects.create(
+        user=UserFactory(),
+        public_url=f"https://disk.yandex.ru/d/manifest-{files}",
+        status=DownloadJob.Status.DONE,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO downloads_downloadedfile
+                (job_id, path, size, modified, md5, sha256, status, done_bytes,
+                 upload_id, preview)
+            SELECT %s, '/dir-' || mod(n, 1000) || '/file-' || n, n, now(),
+                   md5(n::text), encode(sha256(n::text::bytea), 'hex'),
+                   'done', n, '', ''
+            FROM generate_series(1, %s) AS n
+            """,
+            [job.pk, files],
+        )
+    return job.pk
+
+
+def export(mode: str, job_id: int) -> int:
+    """Export a job in ``mode``; returns the characters written."""
+    from yfiles.downloads import manifest
+
+    sink = Sink()
+    if mode.startswith("write_"):
+        manifest.write(sink, job_id, mode.removeprefix("write_"))
+    elif mode == "stream_jsonl":
+
+        async def consume():
+            async for text in manifest.stream(job_id, "jsonl"):
+                sink.write(text)
+
+        async_to_sync(consume)()
+    else:
+        rows = list(manifest._files(job_id, None))  # noqa: SLF001
+        sink.write(manifest.encode([row[1:] for row in rows], "jsonl"))
+    return sink.size
+
+
+def measure(mode: str, job_id: int, files: int) -> dict:
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = export(mode, job_id)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "rows_per_s": round(files / elapsed),
+        "peak_mb": round(peak / 1e6, 2),
+        "output_mb": round(size / 1e6, 1),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--files",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000, 1_000_000],
+    )
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    setup_django()
+    results = {}
+    with scratch_database():
+        for files in args.files:
+            job_id = seed(files)
+            results[str(files)] = {mode: measure(mode, job_id, files) for mode in MODES}
+
+    emit("manifest_export", {"files": results}, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
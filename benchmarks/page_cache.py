@@ -0,0 +1,76 @@
+"""
+Page cache benchmark: rendered pages against cache hits.
+
+Times the anonymous home page and the ``users/user_detail.html`` page of a
+signed in user through the test client, once with an empty cache and once
+served from it. The home page comes from the page cache whole, the user page
+still renders its layout but takes the user fragment from the cache.
+
+    python -m benchmarks.page_cache
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from benchmarks.utils import emit
+from benchmarks.utils import percentile
+from benchmarks.utils import scratch_database
+from benchmarks.utils import setup_django
+
+
+def measure(get, repeat: int) -> dict:
+    from django.core.cache import cache
+
+    cold, warm = [], []
+    for _ in range(repeat):
+        cache.clear()
+        started = time.perf_counter()
+        get()
+        cold.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        get()
+        warm.append(time.perf_counter() - started)
+    return {
+        "render_p50_ms": round(percentile(cold, 50) * 1000, 3),
+        "cached_p50_ms": round(percentile(warm, 50) * 1000, 3),
+    }
+
+
+def run(*, repeat: int) -> dict:
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+    from django.urls import reverse
+
+    from yfiles.users.models import User
+
+    setup_test_environment()
+    anonymous = Client()
+    signed_in = Client()
+    user = User.objects.create(email="benchmark@example.com", name="Benchmark")
+    signed_in.force_login(user)
+    detail = reverse("users:detail", kwargs={"pk": user.pk})
+    # The first request of each kind loads templates and URL resolvers.
+    anonymous.get("/")
+    signed_in.get(detail)
+    return {
+        "home": measure(lambda: anonymous.get("/"), repeat),
+        "user_detail": measure(lambda: signed_in.get(detail), repeat),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    setup_django()
+    with scratch_database():
+        result = run(repeat=args.repeat)
+    emit("page_cache", result, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,181 @@
+"""
+Preview benchmark: throughput of making the previews of a folder of images.
+
+Writes ``--images`` JPEGs of ``--width`` x ``--height`` pixels as the done files
+of one job, each with bytes of its own so that none shares a preview, and
+previews them the way the ``downloads-previews`` queue does: batched by
+``tasks.queue_previews``, and each batch made by ``tasks.make_previews`` in one
+of ``--processes`` forked processes, like the children of a prefork worker.
+Three runs:
+
+- ``plain``: every image decoded at full size and resampled, no fast paths
+- ``fast``: decoded at a fraction of its size (``draft``) and ``reduce``-d
+- ``cached``: the same images again, their previews stored under their hash
+
+Reports images/s, source MB/s and the time per batch (p50/p99) of each::
+
+    python -m benchmarks.previews --images 10000 --processes 8
+"""
+
+import argparse
+import io
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from benchmarks.utils import emit
+from benchmarks.utils import percentile
+from benchmarks.utils import scratch_database
+from benchmarks.utils import setup_django
+
+# Distinct pictures the images are made of; each image adds bytes of its own.
+PICTURES = 8
+
+
+def picture(width: int, height: int, seed: int) -> bytes:
+    from PIL import Image
+
+    noise = Image.effect_noise((width, height), 16 + seed)
+    gradient = Image.linear_gradient("L").resize((width, height))
+    turned = gradient.rotate(45 * seed).resize((width, height))
+    output = io.BytesIO()
+    Image.merge("RGB", (gradient, noise, turned)).save(output, "JPEG", quality=85)
+    return output.getvalue()
+
+
+def write_images(count: int, width: int, height: int) -> int:
+    """Create a job of ``count`` done images and write them; returns its id."""
+    from django.utils import timezone
+
+    from yfiles.downloads.models import DownloadedFile
+    from yfiles.downloads.models import DownloadJob
+    from yfiles.users.tests.factories import UserFactory
+
+    pictures = [picture(width, height, seed) for seed in range(PICTURES)]
+    job = DownloadJob.objects.create(
+        user=UserFactory(),
+        public_url="https://disk.yandex.ru/d/previews",
+        status=DownloadJob.Status.DONE,
+    )
+    files = []
+    for n in range(count):
+        # Decoders stop at the end of image marker; what follows only changes
+        # the hash.
+        data = pictures[n % PICTURES] + b"%d" % n
+        file = DownloadedFile(
+            job=job,
+            path=f"/photos/{n:06}.jpg",
+            size=len(data),
+            modified=timezone.now(),
+            status=DownloadedFile.Status.DONE,
+        )
+        file.local_path.parent.mkdir(parents=True, exist_ok=True)
+        file.local_path.write_bytes(data)
+        files.append(file)
+    DownloadedFile.objects.bulk_create(files, batch_size=1000)
+    return job.pk
+
+
+def make_batch(batch: list[int]) -> float:
+    from yfiles.downloads import tasks
+
+    started = time.perf_counter()
+    tasks.make_previews(batch)
+    return time.perf_counter() - started
+
+
+def run(job_id: int, *, processes: int) -> dict:
+    from django.db import connections
+    from django.db.models import Sum
+
+    from yfiles.downloads import tasks
+    from yfiles.downloads.models import DownloadedFile
+
+    batches: list[list[int]] = []
+
+    def capture(task, args, **options) -> int:
+        batches.extend(batch for (batch,) in args)
+        return len(batches)
+
+    send_many = tasks.send_many
+    tasks.send_many = capture
+    try:
+        tasks.queue_previews(job_id)
+    finally:
+        tasks.send_many = send_many
+    files = DownloadedFile.objects.filter(job_id=job_id)
+    size = files.aggregate(size=Sum("size"))["size"]
+
+    # Forked children open connections of their own.
+    connections.close_all()
+    context = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(processes, mp_context=context) as pool:
+        started = time.perf_counter()
+        timings = list(pool.map(make_batch, batches))
+        elapsed = time.perf_counter() - started
+
+    images = sum(len(batch) for batch in batches)
+    return {
+        "images": images,
+        "batches": len(batches),
+        "previewed": files.exclude(preview="").count(),
+        "seconds": round(elapsed, 2),
+        "images_per_s": round(images / elapsed, 1),
+        "source_mb_per_s": round(size / elapsed / 1e6, 1),
+        "batch_p50_ms": round(percentile(timings, 50) * 1000, 1),
+        "batch_p99_ms": round(percentile(timings, 99) * 1000, 1),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--images", type=int, default=10_000)
+    parser.add_argument("--width", type=int, default=1600)
+    parser.add_argument("--height", type=int, default=1200)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+
+    from yfiles.downloads import previews
+    from yfiles.downloads.models import DownloadedFile
+
+    fast = previews.REDUCING_GAP
+    media = Path(tempfile.mkdtemp(prefix="previews-"))
+    settings.MEDIA_ROOT = str(media)
+    results = {}
+    try:
+        with scratch_database():
+            job_id = write_images(args.images, args.width, args.height)
+            for mode in ("plain", "fast", "cached"):
+                DownloadedFile.objects.update(preview="")
+                if mode != "cached":
+                    shutil.rmtree(media / "previews", ignore_errors=True)
+                previews.REDUCING_GAP = None if mode == "plain" else fast
+                results[mode] = run(job_id, processes=args.processes)
+    finally:
+        shutil.rmtree(media)
+
+    emit(
+        "previews",
+        {
+            "images": args.images,
+            "width": args.width,
+            "height": args.height,
+            "processes": args.processes,
+            "preview_size": settings.DOWNLOADS_PREVIEW_SIZE,
+            **results,
+        },
+        args.output,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,101 @@
+"""
+Fan-out benchmark: thousands of progress subscribers in one process.
+
+Every subscriber is an open progress stream as the ASGI views hold it. The
+publisher sends snapshots through Redis exactly like the download tasks do,
+and the benchmark reports delivery latency and the Redis connections used.
+
+Run it against the Redis from ``REDIS_URL``::
+
+    python -m benchmarks.progress_fanout --subscribers 5000 --jobs 50
+"""
+
+import argparse
+import asyncio
+import resource
+import time
+from pathlib import Path
+
+from benchmarks.utils import emit
+from benchmarks.utils import percentile
+from benchmarks.utils import setup_django
+
+
+async def run(*, subscribers: int, jobs: int, messages: int) -> dict:
+    import redis.asyncio
+    from asgiref.sync import sync_to_async
+    from django.conf import settings
+
+    from yfiles.downloads.progress import hub
+    from yfiles.downloads.progress import publish
+
+    client = redis.asyncio.Redis.from_url(settings.REDIS_URL)
+    clients_before = (await client.info("clients"))["connected_clients"]
+    latencies: list[float] = []
+    ready = asyncio.Event()
+    subscribed = 0
+
+    async def subscriber(job_id: int) -> None:
+        nonlocal subscribed
+        async with hub.subscribe(job_id) as queue:
+            subscribed += 1
+            if subscribed == subscribers:
+                ready.set()
+            for _ in range(messages):
+                event = await queue.get()
+                latencies.append(time.time() - event.data["sent"])
+
+    tasks = [asyncio.create_task(subscriber(n % jobs)) for n in range(subscribers)]
+    await ready.wait()
+    # Let the pattern subscription settle before publishing.
+    await asyncio.sleep(0.5)
+    clients_during = (await client.info("clients"))["connected_clients"]
+
+    def publish_all() -> None:
+        for _ in range(messages):
+            for job_id in range(jobs):
+                publish(job_id, {"id": job_id, "sent": time.time()})
+            time.sleep(0.05)
+
+    started = time.perf_counter()
+    await sync_to_async(publish_all, thread_sensitive=False)()
+    await asyncio.wait_for(asyncio.gather(*tasks), timeout=60)
+    elapsed = time.perf_counter() - started
+    await client.aclose()
+
+    return {
+        "subscribers": subscribers,
+        "jobs": jobs,
+        "messages_per_job": messages,
+        "deliveries": len(latencies),
+        "elapsed_seconds": round(elapsed, 3),
+        "deliveries_per_second": round(len(latencies) / elapsed, 1),
+        "latency_p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "latency_p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        # Only the hub listener: every stream in the process shares it.
+        "redis_connections_added": clients_during - clients_before,
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            1,
+        ),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--jobs", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=10, help="per job")
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    setup_django()
+    result = asyncio.run(
+        run(subscribers=args.subscribers, jobs=args.jobs, messages=args.messages),
+    )
+    emit("progress_fanout", result, args.output)
+    return 0 if result["deliveries"] == args.subscribers * args.messages else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
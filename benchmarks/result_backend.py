@@ -0,0 +1,109 @@
+"""
+Result backend benchmark: Redis memory held per million download chunks.
+
+Writes the result of ``--chunks`` chunk tasks to a Redis database the way the
+worker's result backend stores them, with the extended metadata the project
+enables, and without it for comparison. Measures ``used_memory`` and
+extrapolates to a million chunks. Chunk tasks now ignore their results, so the
+"after" figure is what a million chunks leave in the backend: nothing.
+
+Uses database 15 of the Redis from ``CELERY_BROKER_URL`` unless told otherwise,
+and deletes what it wrote::
+
+    python -m benchmarks.result_backend --chunks 100000
+"""
+
+import argparse
+import os
+import uuid
+from pathlib import Path
+from urllib.parse import urlsplit
+from urllib.parse import urlunsplit
+
+from benchmarks.utils import emit
+from benchmarks.utils import setup_django
+
+CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def default_redis_url() -> str:
+    url = urlsplit(os.environ.get("CELERY_BROKER_URL", "redis://localhost:6379/0"))
+    return urlunsplit(url._replace(path="/15"))
+
+
+def used_memory(client) -> int:
+    return client.info("memory")["used_memory"]
+
+
+def store_chunk_results(backend, chunks: int) -> None:
+    """Store chunk results like a worker does after each successful chunk."""
+    from celery.app.task import Context
+    from celery.states import SUCCESS
+
+    for n in range(chunks):
+        request = Context(
+            id=str(uuid.uuid4()),
+            task="yfiles.downloads.tasks.download_chunk",
+            args=[1_000_000 + n // 16, (n % 16) * CHUNK_SIZE, CHUNK_SIZE],
+            kwargs={},
+            hostname="celery@worker-1",
+            retries=0,
+            delivery_info={"routing_key": "celery"},
+        )
+        backend.store_result(request.id, None, SUCCESS, request=request)
+
+
+def measure(app, url: str, chunks: int, *, extended: bool) -> dict:
+    from celery.backends.redis import RedisBackend
+
+    # The app reads its settings from the CELERY_ namespace of Django's.
+    app.conf.CELERY_RESULT_EXTENDED = extended
+    backend = RedisBackend(app=app, url=url)
+    client = backend.client
+    before = used_memory(client)
+    store_chunk_results(backend, chunks)
+    held = used_memory(client) - before
+    keys = client.dbsize()
+    for key in client.scan_iter(match=backend.task_keyprefix + b"*", count=1000):
+        client.delete(key)
+    return {
+        "keys": keys,
+        "bytes_per_chunk": round(held / chunks),
+        "mb_per_million_chunks": round(held / chunks * 1_000_000 / 1024**2),
+    }
+
+
+def run(*, url: str, chunks: int) -> dict:
+    from config.celery_app import app
+    from yfiles.downloads.tasks import download_chunk
+
+    extended = app.conf.CELERY_RESULT_EXTENDED
+    try:
+        return {
+            "chunks": chunks,
+            "before_extended_results": measure(app, url, chunks, extended=True),
+            "before_plain_results": measure(app, url, chunks, extended=False),
+            "after": {
+                "ignore_result": download_chunk.ignore_result,
+                "mb_per_million_chunks": 0 if download_chunk.ignore_result else None,
+            },
+        }
+    finally:
+        app.conf.CELERY_RESULT_EXTENDED = extended
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--redis-url", default=default_redis_url())
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    setup_django()
+    result = run(url=args.redis_url, chunks=args.chunks)
+    emit("result_backend", result, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,133 @@
+"""
+Settings boot benchmark: what resolving the environment costs a process.
+
+In fresh interpreters, under the production and the worker settings, times:
+
+- ``resolve_us``: one ``environment.resolve()``, without and with a ``.env`` of
+  ``--dot-env-lines`` variables (``DJANGO_READ_DOT_ENV_FILE``)
+- ``settings_ms``: importing the settings module, the snapshot included
+- ``setup_ms``: ``django.setup()`` after that
+- ``fork_ms``: a child forked after ``django.setup()``, as the Celery pool and
+  preloaded gunicorn workers are, until it has the settings; ``fork_resolved``
+  says whether it resolved the environment again
+
+Settings that production reads from the environment fall back to placeholders,
+nothing connects to Postgres or Redis::
+
+    python -m benchmarks.settings_boot
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks.utils import emit
+from benchmarks.worker_startup import PLACEHOLDER_ENV
+from benchmarks.worker_startup import SETTINGS
+
+BOOT = """
+import importlib, json, os, sys, tempfile, time, timeit
+from pathlib import Path
+
+started = time.perf_counter()
+importlib.import_module(os.environ["DJANGO_SETTINGS_MODULE"])
+settings_ms = (time.perf_counter() - started) * 1000
+started = time.perf_counter()
+import django
+django.setup()
+setup_ms = (time.perf_counter() - started) * 1000
+
+from config.settings import environment
+
+def resolve_us():
+    return min(timeit.repeat(environment.resolve, number=100, repeat=5)) * 10_000
+
+plain_us = resolve_us()
+with tempfile.TemporaryDirectory() as directory:
+    lines = int(sys.argv[1])
+    Path(directory, ".env").write_text(
+        "".join(f"BENCHMARK_{n}=value-{n}\\n" for n in range(lines)),
+    )
+    environment.BASE_DIR = Path(directory)
+    os.environ["DJANGO_READ_DOT_ENV_FILE"] = "true"
+    dot_env_us = resolve_us()
+
+misses = environment.load.cache_info().misses
+read, write = os.pipe()
+started = time.perf_counter()
+if (pid := os.fork()) == 0:
+    from django.conf import settings
+    settings.DATABASES, settings.CELERY_BROKER_URL
+    environment.load()
+    os.write(write, json.dumps({
+        "fork_ms": (time.perf_counter() - started) * 1000,
+        "fork_resolved": environment.load.cache_info().misses > misses,
+    }).encode())
+    os._exit(0)
+os.waitpid(pid, 0)
+child = json.loads(os.read(read, 4096))
+json.dump({
+    "settings_ms": settings_ms,
+    "setup_ms": setup_ms,
+    "resolve_us": plain_us,
+    "resolve_dot_env_us": dot_env_us,
+    **child,
+}, sys.stdout)
+"""
+
+
+def boot(settings_module: str, dot_env_lines: int) -> dict:
+    env = {**PLACEHOLDER_ENV, **os.environ, "DJANGO_SETTINGS_MODULE": settings_module}
+    env.pop("DJANGO_READ_DOT_ENV_FILE", None)
+    process = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", BOOT, str(dot_env_lines)],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(process.stdout)
+
+
+def run(*, repeat: int, dot_env_lines: int) -> dict:
+    results = {}
+    for label, settings_module in SETTINGS.items():
+        samples = [boot(settings_module, dot_env_lines) for _ in range(repeat)]
+        results[label] = {
+            "settings_ms": round(statistics.median(s["settings_ms"] for s in samples)),
+            "setup_ms": round(statistics.median(s["setup_ms"] for s in samples)),
+            "resolve_us": {
+                "environment": round(
+                    statistics.median(s["resolve_us"] for s in samples),
+                ),
+                "dot_env": round(
+                    statistics.median(s["resolve_dot_env_us"] for s in samples),
+                ),
+            },
+            "fork_ms": round(statistics.median(s["fork_ms"] for s in samples), 2),
+            "fork_resolved": any(s["fork_resolved"] for s in samples),
+        }
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--dot-env-lines", type=int, default=50)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    emit(
+        "settings_boot",
+        run(repeat=args.repeat, dot_env_lines=args.dot_env_lines),
+        args.output,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
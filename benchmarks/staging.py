@@ -0,0 +1,193 @@
+"""
+Staging benchmark: write throughput of downloads to an emulated network mount.
+
+Serves a generated public folder from a local stand-in of Yandex Disk and runs
+its job in process, with eager tasks, twice: writing chunks in place under a
+slow ``MEDIA_ROOT``, then staging them on local disk and moving verified files
+to the same slow ``MEDIA_ROOT``. The slow mount is a local directory whose
+writes pay ``--latency-ms`` per call plus ``--bandwidth-mb`` MB/s, the way a
+round trip to NFS does; reads are not charged, which only flatters the
+in-place writes::
+
+    python -m benchmarks.staging --files 20 --file-size 33554432
+
+Reports, for each run, the time spent writing to the mount and the effective
+write throughput, and fails unless staging is ``--min-speedup`` times faster.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from benchmarks.utils import emit
+from benchmarks.utils import scratch_database
+from benchmarks.utils import setup_django
+from benchmarks.yandex_standin import StandIn
+
+
+class SlowMount:
+    """Charge writes to file descriptors under ``root`` like a network mount."""
+
+    def __init__(self, root: Path, *, latency: float, bandwidth: float):
+        self.root = str(root)
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.calls = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def slow(self, fd: int) -> bool:
+        return str(Path(f"/proc/self/fd/{fd}").readlink()).startswith(self.root)
+
+    def charge(self, fd: int, nbytes: int) -> None:
+        if not self.slow(fd):
+            return
+        cost = self.latency + nbytes / self.bandwidth
+        time.sleep(cost)
+        with self._lock:
+            self.calls += 1
+            self.seconds += cost
+
+    @contextmanager
+    def mounted(self):
+        pwrite, copy_file_range = os.pwrite, os.copy_file_range
+        sendfile, write, fsync = os.sendfile, os.write, os.fsync
+
+        def slow_pwrite(fd, data, offset):
+            written = pwrite(fd, data, offset)
+            self.charge(fd, written)
+            return written
+
+        def slow_copy_file_range(src, dst, count, *args):
+            copied = copy_file_range(src, dst, count, *args)
+            self.charge(dst, copied)
+            return copied
+
+        def slow_sendfile(out_fd, in_fd, offset, count):
+            sent = sendfile(out_fd, in_fd, offset, count)
+            self.charge(out_fd, sent)
+            return sent
+
+        def slow_write(fd, data):
+            written = write(fd, data)
+            self.charge(fd, written)
+            return written
+
+        def slow_fsync(fd):
+            fsync(fd)
+            self.charge(fd, 0)
+
+        os.pwrite, os.copy_file_range = slow_pwrite, slow_copy_file_range
+        os.sendfile, os.write, os.fsync = slow_sendfile, slow_write, slow_fsync
+        try:
+            yield self
+        finally:
+            os.pwrite, os.copy_file_range = pwrite, copy_file_range
+            os.sendfile, os.write, os.fsync = sendfile, write, fsync
+
+
+def load(standin: StandIn, user, *, staging_root: str) -> dict:
+    from django.conf import settings
+
+    from yfiles.downloads.models import DownloadJob
+    from yfiles.downloads.tasks import load_job
+
+    settings.DOWNLOADS_STAGING_ROOT = staging_root
+    job = DownloadJob.objects.create(
+        user=user,
+        public_url="https://disk.yandex.ru/d/staging",
+    )
+    started = time.perf_counter()
+    load_job(job.pk)
+    elapsed = time.perf_counter() - started
+    job.refresh_from_db()
+    return {"status": job.status, "bytes": job.done_bytes, "elapsed_s": elapsed}
+
+
+def run(args) -> dict:
+    from django.conf import settings
+
+    from yfiles.users.models import User
+
+    root = Path(tempfile.mkdtemp(prefix="staging-benchmark-"))
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    settings.DOWNLOADS_CHUNK_SIZE = args.chunk_size
+    settings.MEDIA_ROOT = str(root / "slow")
+    user = User.objects.create(email="staging@example.com")
+    files = {f"/staging/{n:04}.bin": args.file_size for n in range(args.files)}
+    result: dict = {
+        "files": args.files,
+        "file_size": args.file_size,
+        "chunk_size": args.chunk_size,
+        "latency_ms": args.latency_ms,
+        "bandwidth_mb": args.bandwidth_mb,
+    }
+    try:
+        with StandIn(files) as standin:
+            settings.YANDEX_DISK_API_URL = standin.api_url
+            for name, staging_root in (
+                ("in_place", ""),
+                ("staged", str(root / "local")),
+            ):
+                mount = SlowMount(
+                    root / "slow",
+                    latency=args.latency_ms / 1000,
+                    bandwidth=args.bandwidth_mb * 1024 * 1024,
+                )
+                with mount.mounted():
+                    loaded = load(standin, user, staging_root=staging_root)
+                result[name] = {
+                    "status": loaded["status"],
+                    "elapsed_s": round(loaded["elapsed_s"], 2),
+                    "mount_calls": mount.calls,
+                    "mount_write_s": round(mount.seconds, 2),
+                    "write_mb_s": round(
+                        loaded["bytes"] / 1024 / 1024 / mount.seconds,
+                        1,
+                    ),
+                }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    result["speedup"] = round(
+        result["in_place"]["mount_write_s"] / result["staged"]["mount_write_s"],
+        1,
+    )
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--file-size", type=int, default=32 * 1024 * 1024)
+    parser.add_argument("--chunk-size", type=int, default=8 * 1024 * 1024)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--bandwidth-mb", type=float, default=200.0)
+    parser.add_argument("--min-speedup", type=float, default=2.0)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    setup_django()
+    with scratch_database():
+        result = run(args)
+    emit("staging", result, args.output)
+    for name in ("in_place", "staged"):
+        if result[name]["status"] != "done":
+            sys.stderr.write(f"The {name} job ended {result[name]['status']}.\n")
+            return 1
+    if result["speedup"] < args.min_speedup:
+        sys.stderr.write(
+            f"Staging wrote {result['speedup']} times faster, "
+            f"less than {args.min_speedup}.\n",
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
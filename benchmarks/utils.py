@@ -0,0 +1,49 @@
+"""Helpers shared by the benchmark scripts in this package."""
+
+import contextlib
+import json
+import os
+import sys
+from collections.abc import Iterator
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+
+def setup_django(settings_module: str = "config.settings.test") -> None:
+    """Configure Django for a standalone benchmark process."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    import django
+
+    django.setup()
+
+
+@contextlib.contextmanager
+def scratch_database() -> Iterator[None]:
+    """Run against a freshly migrated test database, dropped on exit."""
+    from django.test.utils import setup_databases
+    from django.test.utils import teardown_databases
+
+    config = setup_databases(verbosity=0, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(config, verbosity=0)
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of ``values``, ``q`` in the ``[0, 100]`` range."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def emit(name: str, metrics: dict[str, Any], output: Path | None = None) -> None:
+    """Write one benchmark result as JSON to ``output`` or stdout."""
+    payload = json.dumps({"benchmark": name, **metrics}, indent=2, sort_keys=True)
+    if output is None:
+        sys.stdout.write(payload + "\n")
+    else:
+        output.write_text(payload + "\n")
@@ -0,0 +1,82 @@
+"""
+Seed users and download jobs for the web tier load test.
+
+Creates ``--users`` users with verified emails, each with a finished job of
+``--files`` files and a running one, from the test factories, and writes their
+credentials and job ids as JSON for ``benchmarks/locustfile.py``. Seeding again
+reuses the users. Run it against the database the web tier serves, which is
+left in place::
+
+    python -m benchmarks.web_seed --users 200 --output loadtest-users.json
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+from benchmarks.utils import setup_django
+
+PASSWORD = "load-test-password"  # noqa: S105
+
+
+def seed(*, users: int, files: int) -> list[dict]:
+    from allauth.account.models import EmailAddress
+
+    from yfiles.downloads.models import DownloadedFile
+    from yfiles.downloads.models import DownloadJob
+    from yfiles.downloads.tests.factories import DownloadedFileFactory
+    from yfiles.downloads.tests.factories import DownloadJobFactory
+    from yfiles.users.tests.factories import UserFactory
+
+    seeded = []
+    for n in range(users):
+        user = UserFactory(email=f"load-{n}@example.com", password=PASSWORD)
+        EmailAddress.objects.update_or_create(
+            user=user,
+            email=user.email,
+            defaults={"verified": True, "primary": True},
+        )
+        jobs = {job.status: job for job in user.download_jobs.all()}
+        if DownloadJob.Status.DONE not in jobs:
+            job = DownloadJobFactory(
+                user=user,
+                status=DownloadJob.Status.DONE,
+                total_files=files,
+                done_files=files,
+            )
+            DownloadedFileFactory.create_batch(
+                files,
+                job=job,
+                status=DownloadedFile.Status.DONE,
+            )
+            jobs[job.status] = job
+        if DownloadJob.Status.RUNNING not in jobs:
+            job = DownloadJobFactory(user=user, status=DownloadJob.Status.RUNNING)
+            jobs[job.status] = job
+        seeded.append(
+            {
+                "id": user.pk,
+                "email": user.email,
+                "password": PASSWORD,
+                "done_job": jobs[DownloadJob.Status.DONE].pk,
+                "running_job": jobs[DownloadJob.Status.RUNNING].pk,
+            },
+        )
+    return seeded
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--output", type=Path, default=Path("loadtest-users.json"))
+    args = parser.parse_args()
+
+    setup_django("config.settings.local")
+    users = seed(users=args.users, files=args.files)
+    args.output.write_text(json.dumps(users, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
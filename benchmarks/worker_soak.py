@@ -0,0 +1,206 @@
+"""
+Worker soak test: thousands of chunk tasks through a real prefork worker.
+
+Serves a generated public folder from a local stand-in of Yandex Disk, starts
+``celery worker`` against a scratch database and the broker from
+``CELERY_BROKER_URL``, queues the folder and samples the resident memory of
+every pool child until the job is done. It fails when the children's memory
+keeps growing instead of staying flat, and reports how often the watchdog saw
+them recycled.
+
+Use a broker no other worker consumes from::
+
+    python -m benchmarks.worker_soak --files 200 --file-size 1048576 --chunk-size 65536
+
+That is 3200 chunk tasks. ``--max-memory-per-child`` (kB) lowers the recycle
+threshold to exercise recycling.
+"""
+
+import argparse
+import os
+import re
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+from urllib.parse import urlunsplit
+
+from benchmarks.utils import emit
+from benchmarks.utils import scratch_database
+from benchmarks.utils import setup_django
+from benchmarks.yandex_standin import StandIn
+
+RECYCLED = re.compile(r"Recycling worker child after \d+ tasks \((\w+)\)")
+
+
+def rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:  # noqa: PTH123
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def children(pid: int) -> list[int]:
+    """Pool children of the worker, found by parent pid."""
+    found = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:  # noqa: PTH123
+                # The command name may contain spaces; fields follow the last ")".
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            found.append(int(entry))
+    return found
+
+
+def database_url(name: str) -> str:
+    """``DATABASE_URL`` pointed at the scratch database."""
+    url = urlsplit(os.environ["DATABASE_URL"])
+    return urlunsplit(url._replace(path=f"/{name}"))
+
+
+def start_worker(*, standin: StandIn, args, log: Path) -> subprocess.Popen:
+    from django.db import connection
+
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": "config.settings.test",
+        "DATABASE_URL": database_url(connection.settings_dict["NAME"]),
+        "YANDEX_DISK_API_URL": standin.api_url,
+        "DOWNLOADS_CHUNK_SIZE": str(args.chunk_size),
+    }
+    if args.max_memory_per_child:
+        env["CELERY_WORKER_MAX_MEMORY_PER_CHILD"] = str(args.max_memory_per_child)
+    return subprocess.Popen(  # noqa: S603
+        [
+            sys.executable,
+            "-m",
+            "celery",
+            "-A",
+            "config.celery_app",
+            "worker",
+            "--pool=prefork",
+            f"--concurrency={args.concurrency}",
+            "--loglevel=WARNING",
+            "--without-heartbeat",
+            "--without-gossip",
+            "--without-mingle",
+        ],
+        env=env,
+        stdout=log.open("w"),
+        stderr=subprocess.STDOUT,
+    )
+
+
+def run(args) -> dict:
+    from django.conf import settings
+
+    from yfiles.downloads.models import DownloadJob
+    from yfiles.downloads.tasks import load_job
+    from yfiles.users.models import User
+
+    files = {f"/soak/{n:05}.bin": args.file_size for n in range(args.files)}
+    chunks = args.files * -(-args.file_size // args.chunk_size)
+    user = User.objects.create(email="soak@example.com")
+    job = DownloadJob.objects.create(
+        user=user,
+        public_url="https://disk.yandex.ru/d/soak",
+    )
+    log = Path(tempfile.mkstemp(prefix="worker-soak-", suffix=".log")[1])
+
+    samples: list[tuple[float, list[int]]] = []
+    pids: set[int] = set()
+    with StandIn(files) as standin:
+        worker = start_worker(standin=standin, args=args, log=log)
+        try:
+            load_job.delay(job.pk)
+            started = time.monotonic()
+            while time.monotonic() - started < args.timeout:
+                job.refresh_from_db()
+                if job.is_finished:
+                    break
+                pool = children(worker.pid)
+                pids.update(pool)
+                sizes = [rss_kb(pid) for pid in pool]
+                if sizes and job.total_bytes:
+                    samples.append((job.done_bytes / job.total_bytes, sizes))
+                time.sleep(args.interval)
+            elapsed = time.monotonic() - started
+        finally:
+            worker.send_signal(signal.SIGTERM)
+            worker.wait(timeout=60)
+            shutil.rmtree(job.local_root, ignore_errors=True)
+    output = log.read_text()
+    log.unlink()
+
+    def window(low: float, high: float) -> float:
+        """Median RSS of the largest child over a part of the download, in MB."""
+        sizes = [max(s) for progress, s in samples if low <= progress < high]
+        return round(statistics.median(sizes) / 1024, 1) if sizes else 0.0
+
+    recycles: dict[str, int] = {}
+    for reason in RECYCLED.findall(output):
+        recycles[reason] = recycles.get(reason, 0) + 1
+    # The first quarter warms up the children; compare the second with the last.
+    growth = round(window(0.75, 1.01) - window(0.25, 0.5), 1)
+    return {
+        "status": job.status,
+        "chunks": chunks,
+        "elapsed_s": round(elapsed, 1),
+        "chunks_per_s": round(chunks / elapsed, 1),
+        "concurrency": args.concurrency,
+        "max_memory_per_child_kb": args.max_memory_per_child
+        or settings.CELERY_WORKER_MAX_MEMORY_PER_CHILD,
+        "children_seen": len(pids),
+        "recycles": recycles,
+        "child_rss_mb": {
+            "second_quarter": window(0.25, 0.5),
+            "last_quarter": window(0.75, 1.01),
+            "peak": round(max((max(s) for _, s in samples), default=0) / 1024, 1),
+        },
+        "growth_mb": growth,
+        "worker_errors": [line for line in output.splitlines() if "ERROR" in line][:10],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--file-size", type=int, default=1024 * 1024)
+    parser.add_argument("--chunk-size", type=int, default=64 * 1024)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--max-memory-per-child", type=int)
+    parser.add_argument("--max-growth-mb", type=float, default=10.0)
+    parser.add_argument("--interval", type=float, default=0.5)
+    parser.add_argument("--timeout", type=float, default=30 * 60)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    setup_django()
+    with scratch_database():
+        result = run(args)
+    emit("worker_soak", result, args.output)
+    if result["status"] != "done":
+        sys.stderr.write(f"The job ended {result['status']}.\n")
+        return 1
+    if result["growth_mb"] > args.max_growth_mb:
+        sys.stderr.write(
+            f"Child memory grew by {result['growth_mb']} MB, "
+            f"more than {args.max_growth_mb} MB.\n",
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
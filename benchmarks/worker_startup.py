@@ -0,0 +1,127 @@
+"""
+Worker startup benchmark: imports, boot time and memory of a Celery worker.
+
+Boots the worker's Django and Celery stack in fresh interpreters under
+``python -X importtime``, once with the full production settings and once with
+``config.settings.worker``, the way ``/start-celeryworker`` starts it. Reports
+the wall time to a loaded task registry, the number of modules and the peak
+resident memory, plus the packages that take the longest to import.
+
+Settings that production reads from the environment fall back to placeholders,
+nothing connects to Postgres or Redis::
+
+    python -m benchmarks.worker_startup
+
+``--max-modules`` makes it fail when the worker settings import more modules,
+so it can guard against a web-only import creeping back into the worker.
+"""
+
+import argparse
+import collections
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from benchmarks.utils import emit
+
+SETTINGS = {
+    "production": "config.settings.production",
+    "worker": "config.settings.worker",
+}
+# Required by the production settings; a real environment takes precedence.
+PLACEHOLDER_ENV = {
+    "DJANGO_SECRET_KEY": "benchmark",
+    "DJANGO_ADMIN_URL": "admin/",
+    "MAILGUN_API_KEY": "benchmark",
+    "MAILGUN_DOMAIN": "example.com",
+    "DATABASE_URL": "postgres:///benchmark",
+    "REDIS_URL": "redis://localhost:6379/0",
+    "CELERY_BROKER_URL": "redis://localhost:6379/0",
+}
+WEB_PACKAGES = ("allauth", "crispy_forms", "django.contrib.admin", "anymail")
+BOOT = """
+import json, resource, sys
+import django
+django.setup()
+from config.celery_app import app
+app.loader.import_default_modules()
+json.dump({
+    "modules": sorted(sys.modules),
+    "tasks": len(app.tasks),
+    "maxrss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}, sys.stdout)
+"""
+IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+\d+ \| *(\S+)")
+
+
+def boot(settings_module: str) -> dict:
+    env = {**PLACEHOLDER_ENV, **os.environ, "DJANGO_SETTINGS_MODULE": settings_module}
+    if settings_module == SETTINGS["worker"]:
+        env["CELERY_SKIP_CHECKS"] = "true"
+    started = time.perf_counter()
+    process = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", BOOT],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - started
+    packages: collections.Counter = collections.Counter()
+    for match in IMPORTTIME.finditer(process.stderr):
+        packages[match[2].split(".")[0]] += int(match[1])
+    return {"elapsed": elapsed, "packages": packages, **json.loads(process.stdout)}
+
+
+def run(*, repeat: int, top: int) -> dict:
+    results: dict = {}
+    for label, settings_module in SETTINGS.items():
+        samples = [boot(settings_module) for _ in range(repeat)]
+        packages: collections.Counter = collections.Counter()
+        for sample in samples:
+            packages.update(sample["packages"])
+        modules = samples[0]["modules"]
+        results[label] = {
+            "boot_ms": round(statistics.median(s["elapsed"] for s in samples) * 1000),
+            "import_self_ms": round(sum(packages.values()) / repeat / 1000),
+            "modules": len(modules),
+            "maxrss_mb": round(
+                statistics.median(s["maxrss_kb"] for s in samples) / 1024,
+                1,
+            ),
+            "tasks": samples[0]["tasks"],
+            "web_packages": [package for package in WEB_PACKAGES if package in modules],
+            "slowest_packages_ms": {
+                package: round(us / repeat / 1000, 1)
+                for package, us in packages.most_common(top)
+            },
+        }
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--max-modules", type=int)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    result = run(repeat=args.repeat, top=args.top)
+    emit("worker_startup", result, args.output)
+    if args.max_modules and result["worker"]["modules"] > args.max_modules:
+        sys.stderr.write(
+            f"The worker imports {result['worker']['modules']} modules, "
+            f"more than {args.max_modules}.\n",
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,217 @@
+"""
+Local stand-in for the public resources API of Yandex Disk.
+
+Serves one public folder of generated files: the listing with its pagination,
+the download link resolver and the downloads themselves with HTTP Range
+support. File contents are generated from their path, so a folder of any size
+costs no memory and every download can be verified against its md5.
+
+    with StandIn({"/a.bin": 1024, "/b.bin": 2048}) as standin:
+        settings.YANDEX_DISK_API_URL = standin.api_url
+
+Like the real service over a real network it can be slow and unreliable: every
+response waits ``latency`` seconds, every download is throttled to
+``bandwidth`` bytes per second, and downloads fail at random, ``error_rate`` of
+them with a 503 and ``reset_rate`` of them with the connection dropped halfway.
+"""
+
+import functools
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qs
+from urllib.parse import quote
+from urllib.parse import unquote
+from urllib.parse import urlsplit
+
+API_PATH = "/v1/disk/public/resources"
+FILES_PATH = "/files"
+MODIFIED = "2024-01-01T00:00:00+00:00"
+PATTERN_SIZE = 4096
+RANGE = re.compile(r"bytes=(\d+)-(\d+)")
+
+
+@functools.lru_cache(maxsize=1024)
+def pattern(path: str) -> bytes:
+    seed = hashlib.sha256(path.encode()).digest()
+    return (seed * (PATTERN_SIZE // len(seed) + 1))[:PATTERN_SIZE]
+
+
+def content(path: str, offset: int, length: int) -> bytes:
+    """Bytes ``offset`` to ``offset + length`` of the generated file ``path``."""
+    block = pattern(path)
+    start = offset % PATTERN_SIZE
+    repeats = (start + length) // PATTERN_SIZE + 1
+    return (block * repeats)[start : start + length]
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "StandInServer"
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+    def do_GET(self):  # noqa: N802
+        standin = self.server.standin
+        standin.requests += 1
+        if standin.latency:
+            time.sleep(standin.latency)
+        url = urlsplit(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path == API_PATH:
+            self.send_json(standin.listing(params))
+        elif url.path == API_PATH + "/download" and params.get("path") in standin.files:
+            href = standin.base_url + FILES_PATH + quote(params["path"])
+            self.send_json({"href": href})
+        elif unquote(url.path.removeprefix(FILES_PATH)) in standin.files:
+            self.send_file(unquote(url.path.removeprefix(FILES_PATH)))
+        else:
+            self.send_json({"description": "Not found"}, HTTPStatus.NOT_FOUND)
+
+    def send_json(self, payload: dict, status: int = HTTPStatus.OK) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_file(self, path: str) -> None:
+        standin = self.server.standin
+        fault = standin.fault()
+        if fault == "error":
+            self.send_json(
+                {"description": "Service unavailable"},
+                HTTPStatus.SERVICE_UNAVAILABLE,
+            )
+            return
+        size = standin.files[path]
+        start, end = 0, size - 1
+        match = RANGE.fullmatch(self.headers.get("Range", ""))
+        if match:
+            start, end = int(match[1]), min(int(match[2]), size - 1)
+            self.send_response(HTTPStatus.PARTIAL_CONTENT)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        for offset in range(start, end + 1, standin.block_size):
+            if fault == "reset" and offset - start >= (end + 1 - start) // 2:
+                self.close_connection = True
+                return
+            length = min(standin.block_size, end + 1 - offset)
+            self.wfile.write(content(path, offset, length))
+            if standin.bandwidth:
+                time.sleep(length / standin.bandwidth)
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+    standin: "StandIn"
+
+
+class StandIn:
+    """Threaded HTTP server on a free local port, for use as a context manager."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        files: dict[str, int],
+        *,
+        block_size: int = 256 * 1024,
+        latency: float = 0.0,
+        bandwidth: float | None = None,
+        error_rate: float = 0.0,
+        reset_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.files = files
+        self.block_size = block_size
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.reset_rate = reset_rate
+        self.requests = 0
+        # Faults injected, by kind.
+        self.faults = {"error": 0, "reset": 0}
+        # Seeded, so that a run can be repeated.
+        self._random = random.Random(seed)  # noqa: S311
+        self._lock = threading.Lock()
+        self._md5: dict[str, str] = {}
+        self._server = StandInServer(("127.0.0.1", 0), Handler)
+        self._server.standin = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        if isinstance(host, bytes):
+            host = host.decode()
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self) -> str:
+        """Value for ``YANDEX_DISK_API_URL``."""
+        return self.base_url + API_PATH
+
+    def __enter__(self) -> "StandIn":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def fault(self) -> str | None:
+        """Draw the fault of the next download, if it gets one."""
+        with self._lock:
+            draw = self._random.random()
+            if draw < self.error_rate:
+                fault = "error"
+            elif draw < self.error_rate + self.reset_rate:
+                fault = "reset"
+            else:
+                return None
+            self.faults[fault] += 1
+        return fault
+
+    def md5(self, path: str) -> str:
+        if path not in self._md5:
+            digest = hashlib.md5(usedforsecurity=False)
+            size = self.files[path]
+            for offset in range(0, size, self.block_size):
+                length = min(self.block_size, size - offset)
+                digest.update(content(path, offset, length))
+            self._md5[path] = digest.hexdigest()
+        return self._md5[path]
+
+    def listing(self, params: dict[str, str]) -> dict:
+        paths = sorted(self.files)
+        offset = int(params.get("offset", 0))
+        limit = int(params.get("limit", 20))
+        return {
+            "type": "dir",
+            "name": "",
+            "path": "/",
+            "_embedded": {
+                "total": len(paths),
+                "items": [
+                    {
+                        "type": "file",
+                        "path": path,
+                        "size": self.files[path],
+                        "modified": MODIFIED,
+                        "md5": self.md5(path),
+                        "sha256": "",
+                    }
+                    for path in paths[offset : offset + limit]
+                ],
+            },
+        }
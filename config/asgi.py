@@ -0,0 +1,35 @@
+# ruff: noqa
+"""
+ASGI config for yfiles project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Gunicorn serves it with uvicorn workers, so long-lived responses such as the
+download progress streams wait on the event loop instead of holding a worker.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/dev/howto/deployment/asgi/
+
+"""
+
+import os
+import sys
+from pathlib import Path
+
+from django.core.asgi import get_asgi_application
+
+# This allows easy placement of apps within the interior
+# yfiles directory.
+BASE_DIR = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(BASE_DIR / "yfiles"))
+# If DJANGO_SETTINGS_MODULE is unset, default to the production settings
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.production")
+
+# This application object is used by any ASGI server configured to use this file.
+application = get_asgi_application()
+
+# Parse every template into the cached loader now rather than during the first
+# requests this worker serves. Gunicorn preloads this module (config/gunicorn.py),
+# so the master parses them once for all of its workers.
+from yfiles.core.templating import compile_templates
+
+compile_templates()
@@ -0,0 +1,76 @@
+"""
+Gunicorn settings for the production web tier::
+
+    gunicorn --config config/gunicorn.py config.asgi
+
+The master imports the application once (``preload_app``), templates compiled
+and all, and forks the workers from it, so they share those pages instead of
+each importing Django and allauth again. Before each fork ``gc.freeze()`` moves
+every object loaded so far out of the collector's reach: a collection in a
+worker would otherwise write to the header of each of them and copy every page
+they are on into the worker.
+
+Each worker is an event loop, so there are as many as CPUs the container may
+use (``cpu_limit()``), at least two so one can restart while the other serves.
+``WEB_CONCURRENCY`` overrides the count. Workers restart after
+``GUNICORN_MAX_REQUESTS`` requests, with a jitter so they do not all restart at
+once.
+"""
+
+import gc
+import logging
+import math
+import os
+from pathlib import Path
+
+CGROUP = Path("/sys/fs/cgroup")
+
+
+def cpu_limit(cgroup: Path = CGROUP) -> float:
+    """The CPUs this process may use: its cgroup quota, else its CPU affinity."""
+    cpus = float(len(os.sched_getaffinity(0)))
+    try:
+        # cgroup v2: "<quota> <period>", or "max <period>" without a quota.
+        quota, period = (cgroup / "cpu.max").read_text().split()
+    except FileNotFoundError:
+        try:
+            # cgroup v1: a quota of -1 means none.
+            quota = (cgroup / "cpu" / "cpu.cfs_quota_us").read_text().strip()
+            period = (cgroup / "cpu" / "cpu.cfs_period_us").read_text().strip()
+        except FileNotFoundError:
+            return cpus
+    if quota in ("max", "-1"):
+        return cpus
+    return min(cpus, int(quota) / int(period))
+
+
+def default_workers(cgroup: Path = CGROUP) -> int:
+    if concurrency := os.environ.get("WEB_CONCURRENCY"):
+        return int(concurrency)
+    return max(2, math.ceil(cpu_limit(cgroup)))
+
+
+bind = "0.0.0.0:5000"
+chdir = "/app"
+worker_class = "uvicorn_worker.UvicornWorker"
+workers = default_workers()
+preload_app = True
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = max_requests // 10
+# The heartbeat files of the workers, in memory rather than on the overlay.
+worker_tmp_dir = "/dev/shm"  # noqa: S108
+
+
+def pre_fork(server, worker) -> None:
+    # Nothing is connected before the fork, but a connection opened while
+    # loading the application would be shared by every worker.
+    from django.db import connections
+
+    connections.close_all()
+    gc.freeze()
+
+
+def worker_exit(server, worker) -> None:
+    """Write out the records still queued for the log."""
+    for handler in logging.getLogger().handlers:
+        handler.flush()
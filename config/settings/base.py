@@ -4,16 +4,18 @@
 from pathlib import Path
 
 import environ
+from kombu import Queue
+
+from .environment import load
 
 BASE_DIR = Path(__file__).resolve(strict=True).parent.parent.parent
 # yfiles/
 APPS_DIR = BASE_DIR / "yfiles"
 env = environ.Env()
 
-READ_DOT_ENV_FILE = env.bool("DJANGO_READ_DOT_ENV_FILE", default=False)
-if READ_DOT_ENV_FILE:
-    # OS environment variables take precedence over variables from .env
-    env.read_env(str(BASE_DIR / ".env"))
+# Reads .env too, with DJANGO_READ_DOT_ENV_FILE; see config/settings/environment.py.
+ENVIRONMENT = load()
+READ_DOT_ENV_FILE = ENVIRONMENT.read_dot_env_file
 
 # GENERAL
 # ------------------------------------------------------------------------------
@@ -45,7 +47,7 @@ LOCALE_PATHS = [str(BASE_DIR / "locale")]
 # DATABASES
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#databases
-DATABASES = {"default": env.db("DATABASE_URL")}
+DATABASES = {"default": ENVIRONMENT.database_settings()}
 DATABASES["default"]["ATOMIC_REQUESTS"] = True
 # https://docs.djangoproject.com/en/stable/ref/settings/#std:setting-DEFAULT_AUTO_FIELD
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
@@ -56,6 +58,8 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 ROOT_URLCONF = "config.urls"
 # https://docs.djangoproject.com/en/dev/ref/settings/#wsgi-application
 WSGI_APPLICATION = "config.wsgi.application"
+# https://docs.djangoproject.com/en/dev/ref/settings/#asgi-application
+ASGI_APPLICATION = "config.asgi.application"
 
 # APPS
 # ------------------------------------------------------------------------------
@@ -68,6 +72,7 @@ DJANGO_APPS = [
     "django.contrib.staticfiles",
     # "django.contrib.humanize", # Handy template tags
     "django.contrib.admin",
+    "django.contrib.postgres",
     "django.forms",
 ]
 THIRD_PARTY_APPS = [
@@ -83,6 +88,8 @@ THIRD_PARTY_APPS = [
 LOCAL_APPS = [
     "yfiles.users",
     # Your stuff: custom apps go here
+    "yfiles.core",
+    "yfiles.downloads",
 ]
 # https://docs.djangoproject.com/en/dev/ref/settings/#installed-apps
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
@@ -132,6 +139,7 @@ AUTH_PASSWORD_VALIDATORS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "yfiles.core.profiling.RequestProfileMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -239,54 +247,117 @@ DJANGO_ADMIN_FORCE_ALLAUTH = env.bool("DJANGO_ADMIN_FORCE_ALLAUTH", default=Fals
 # https://docs.djangoproject.com/en/dev/ref/settings/#logging
 # See https://docs.djangoproject.com/en/dev/topics/logging for
 # more details on how to customize your logging configuration.
+# Records are written as JSON lines from a thread, so logging never blocks on the
+# stream (yfiles.core.logs).
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
+    "filters": {
+        "context": {"()": "yfiles.core.logs.ContextFilter"},
+        "hot_path": {
+            "()": "yfiles.core.logs.RateLimitFilter",
+            "rate": env.float("LOG_HOT_PATH_RATE", default=10),
+        },
+    },
     "formatters": {
         "verbose": {
             "format": "%(levelname)s %(asctime)s %(module)s %(process)d %(thread)d %(message)s",
         },
+        "json": {"()": "yfiles.core.logs.JsonFormatter"},
     },
     "handlers": {
         "console": {
             "level": "DEBUG",
-            "class": "logging.StreamHandler",
-            "formatter": "verbose",
+            # A factory, not "class": dictConfig rebuilds QueueHandler classes
+            # given as a "class" around a queue of its own since Python 3.12.
+            "()": "yfiles.core.logs.QueueStreamHandler",
+            "filters": ["context"],
+            "formatter": "json",
         },
     },
     "root": {"level": "INFO", "handlers": ["console"]},
+    "loggers": {
+        # A record per chunk: set DEBUG to see a few a second of each.
+        "yfiles.downloads.chunks": {
+            "level": env("DOWNLOADS_CHUNK_LOG_LEVEL", default="INFO"),
+            "filters": ["hot_path"],
+        },
+    },
 }
 
+# Redis
+# ------------------------------------------------------------------------------
+# A local Redis unless set; production requires it.
+REDIS_URL = ENVIRONMENT.redis_url or "redis://localhost:6379/0"
+
 # Celery
 # ------------------------------------------------------------------------------
 if USE_TZ:
     # https://docs.celeryq.dev/en/stable/userguide/configuration.html#std:setting-timezone
     CELERY_TIMEZONE = TIME_ZONE
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#std:setting-broker_url
-CELERY_BROKER_URL = env("CELERY_BROKER_URL")
+CELERY_BROKER_URL = ENVIRONMENT.celery_broker_url
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#std:setting-result_backend
 CELERY_RESULT_BACKEND = CELERY_BROKER_URL
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#result-extended
+# Only job-level tasks store results; download chunks ignore theirs and count
+# their progress on the job row instead.
 CELERY_RESULT_EXTENDED = True
+# https://docs.celeryq.dev/en/stable/userguide/configuration.html#result-expires
+# Seconds a stored result is kept; the Redis backend makes it the key's TTL.
+CELERY_RESULT_EXPIRES = env.int("CELERY_RESULT_EXPIRES", default=24 * 60 * 60)
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#result-backend-always-retry
 # https://github.com/celery/celery/pull/6122
 CELERY_RESULT_BACKEND_ALWAYS_RETRY = True
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#result-backend-max-retries
 CELERY_RESULT_BACKEND_MAX_RETRIES = 10
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#std:setting-accept_content
-CELERY_ACCEPT_CONTENT = ["json"]
+# Internal download tasks travel as msgpack; everything else stays JSON.
+CELERY_ACCEPT_CONTENT = ["json", "msgpack"]
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#std:setting-task_serializer
 CELERY_TASK_SERIALIZER = "json"
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#std:setting-result_serializer
 CELERY_RESULT_SERIALIZER = "json"
+# https://docs.celeryq.dev/en/stable/userguide/configuration.html#task-queues
+# Workers consume every queue listed here unless started with -Q. Failed download
+# chunks are retried from their own queue, so fresh chunks never wait behind them.
+# Previews are rendered from theirs, which a worker of CPU-bound processes can
+# take on its own with -Q downloads-previews.
+CELERY_TASK_QUEUES = [
+    Queue("celery", routing_key="celery"),
+    Queue("downloads-retry", routing_key="downloads-retry"),
+    Queue("downloads-previews", routing_key="downloads-previews"),
+]
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#task-time-limit
 # TODO: set to whatever value is adequate in your circumstances
 CELERY_TASK_TIME_LIMIT = 5 * 60
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#task-soft-time-limit
 # TODO: set to whatever value is adequate in your circumstances
 CELERY_TASK_SOFT_TIME_LIMIT = 60
+# https://docs.celeryq.dev/en/stable/userguide/configuration.html#worker-max-memory-per-child
+# kB of peak RSS after which a prefork child is replaced, once its task is done.
+CELERY_WORKER_MAX_MEMORY_PER_CHILD = env.int(
+    "CELERY_WORKER_MAX_MEMORY_PER_CHILD",
+    default=256 * 1024,
+)
+# https://docs.celeryq.dev/en/stable/userguide/configuration.html#worker-max-tasks-per-child
+CELERY_WORKER_MAX_TASKS_PER_CHILD = env.int(
+    "CELERY_WORKER_MAX_TASKS_PER_CHILD",
+    default=1000,
+)
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#beat-scheduler
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
+# https://docs.celeryq.dev/en/stable/userguide/configuration.html#beat-schedule
+CELERY_BEAT_SCHEDULE = {
+    "prune-task-results": {
+        "task": "yfiles.core.tasks.prune_task_results",
+        "schedule": 60 * 60,
+    },
+    "prune-staging": {
+        "task": "yfiles.downloads.tasks.prune_staging",
+        "schedule": 60 * 60,
+    },
+}
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#worker-send-task-events
 CELERY_WORKER_SEND_TASK_EVENTS = True
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#std-setting-task_send_sent_event
@@ -316,3 +387,78 @@ SOCIALACCOUNT_FORMS = {"signup": "yfiles.users.forms.UserSocialSignupForm"}
 
 # Your stuff...
 # ------------------------------------------------------------------------------
+# Yandex Disk REST API for public resources.
+# https://yandex.com/dev/disk-api/doc/en/reference/public
+YANDEX_DISK_API_URL = env(
+    "YANDEX_DISK_API_URL",
+    default="https://cloud-api.yandex.net/v1/disk/public/resources",
+)
+# Seconds to wait for Yandex Disk to connect and to send the next bytes.
+YANDEX_DISK_TIMEOUT = env.float("YANDEX_DISK_TIMEOUT", default=30.0)
+# Files are fetched in HTTP Range chunks of this size.
+DOWNLOADS_CHUNK_SIZE = env.int("DOWNLOADS_CHUNK_SIZE", default=8 * 1024 * 1024)
+# One task fetches up to this many chunks, and at most this many bytes, so that
+# it still ends well within CELERY_TASK_SOFT_TIME_LIMIT.
+DOWNLOADS_CHUNKS_PER_TASK = env.int("DOWNLOADS_CHUNKS_PER_TASK", default=64)
+DOWNLOADS_BYTES_PER_TASK = env.int(
+    "DOWNLOADS_BYTES_PER_TASK",
+    default=32 * 1024 * 1024,
+)
+# A failed chunk is retried up to this many times, with exponential backoff
+# capped at DOWNLOADS_RETRY_BACKOFF_MAX seconds, before it is quarantined.
+DOWNLOADS_MAX_RETRIES = env.int("DOWNLOADS_MAX_RETRIES", default=5)
+DOWNLOADS_RETRY_BACKOFF_MAX = env.int("DOWNLOADS_RETRY_BACKOFF_MAX", default=10 * 60)
+# Bytes of chunks kept queued per running job; the queue is refilled from the
+# job's files once workers have drained half of it.
+DOWNLOADS_QUEUE_AHEAD = env.int("DOWNLOADS_QUEUE_AHEAD", default=1024 * 1024 * 1024)
+# Local directory chunks are written to before a verified file is moved to
+# MEDIA_ROOT in large sequential copies; set it when MEDIA_ROOT is network
+# storage. Every worker that takes chunks must share it. Empty: write in place.
+DOWNLOADS_STAGING_ROOT = env("DOWNLOADS_STAGING_ROOT", default="")
+# Images of finished jobs up to DOWNLOADS_PREVIEW_MAX_BYTES get a preview of
+# DOWNLOADS_PREVIEW_SIZE pixels on the longer side. One task renders up to
+# DOWNLOADS_PREVIEWS_PER_TASK of them, and at most DOWNLOADS_PREVIEW_BYTES_PER_TASK
+# bytes of sources, unless it is a single image.
+DOWNLOADS_PREVIEW_SIZE = env.int("DOWNLOADS_PREVIEW_SIZE", default=256)
+DOWNLOADS_PREVIEW_MAX_BYTES = env.int(
+    "DOWNLOADS_PREVIEW_MAX_BYTES",
+    default=64 * 1024 * 1024,
+)
+DOWNLOADS_PREVIEWS_PER_TASK = env.int("DOWNLOADS_PREVIEWS_PER_TASK", default=50)
+DOWNLOADS_PREVIEW_BYTES_PER_TASK = env.int(
+    "DOWNLOADS_PREVIEW_BYTES_PER_TASK",
+    default=32 * 1024 * 1024,
+)
+# Upper bound for the ``wait`` of the long-polling job status endpoint.
+DOWNLOADS_LONG_POLL_TIMEOUT = env.int("DOWNLOADS_LONG_POLL_TIMEOUT", default=30)
+# Seconds between keep-alive comments on idle progress streams.
+DOWNLOADS_PROGRESS_HEARTBEAT = env.int("DOWNLOADS_PROGRESS_HEARTBEAT", default=15)
+# Seconds anonymous pages are served from the cache, unless a deploy migrates.
+PAGES_CACHE_TIMEOUT = env.int("PAGES_CACHE_TIMEOUT", default=10 * 60)
+# Seconds a file search result stays cached, unless the user's files change.
+DOWNLOADS_SEARCH_CACHE_TIMEOUT = env.int(
+    "DOWNLOADS_SEARCH_CACHE_TIMEOUT",
+    default=5 * 60,
+)
+# Fraction of requests whose queries, cache lookups and latency are logged and
+# counted per view (yfiles.core.profiling).
+REQUEST_PROFILE_SAMPLE_RATE = env.float("REQUEST_PROFILE_SAMPLE_RATE", default=0.0)
+# Most queries one request to a view may run. Sampled requests over the budget
+# are logged; with QUERY_BUDGETS_ENFORCED every request is checked, and fails.
+QUERY_BUDGETS = {
+    # Session and user.
+    "home": 2,
+    "about": 2,
+    "users:update": 2,
+    "users:redirect": 2,
+    "users:detail": 3,
+    "downloads:search": 3,
+    "downloads:status": 3,
+    "downloads:progress": 3,
+    "downloads:manifest": 3,
+    # Job, page and the first row of the next page.
+    "downloads:files": 5,
+    # Session, user and file.
+    "downloads:preview": 3,
+}
+QUERY_BUDGETS_ENFORCED = False
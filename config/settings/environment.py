@@ -0,0 +1,78 @@
+"""
+The service URLs of the environment, resolved once per process.
+
+``load()`` reads ``.env`` (with ``DJANGO_READ_DOT_ENV_FILE``), then parses and
+validates ``DATABASE_URL``, ``REDIS_URL`` and ``CELERY_BROKER_URL`` into a frozen
+``Environment`` that the settings take them from. Every invalid or missing
+variable is reported at once, rather than one per failed boot. The Celery worker
+and gunicorn (with ``preload_app``) import the settings before they fork, so
+their children inherit the snapshot instead of resolving it again.
+"""
+
+import copy
+import dataclasses
+import functools
+from collections.abc import Mapping
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any
+from urllib.parse import urlsplit
+
+import environ
+from django.core.exceptions import ImproperlyConfigured
+
+BASE_DIR = Path(__file__).resolve(strict=True).parent.parent.parent
+DATABASE_SCHEMES = ("postgres", "postgresql", "pgsql")
+REDIS_SCHEMES = ("redis", "rediss")
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Environment:
+    read_dot_env_file: bool
+    database: Mapping[str, Any]
+    # Empty when not set: only the production settings require it.
+    redis_url: str
+    celery_broker_url: str
+
+    def database_settings(self) -> dict[str, Any]:
+        """A copy of the ``DATABASES["default"]`` parsed from ``DATABASE_URL``."""
+        return copy.deepcopy(dict(self.database))
+
+
+def resolve(env: environ.Env | None = None) -> Environment:
+    """Read the environment into an ``Environment``; raises ImproperlyConfigured."""
+    env = env or environ.Env()
+    read_dot_env_file = env.bool("DJANGO_READ_DOT_ENV_FILE", default=False)
+    if read_dot_env_file:
+        # OS environment variables take precedence over variables from .env
+        env.read_env(str(BASE_DIR / ".env"))
+
+    errors: list[str] = []
+
+    def url(var: str, schemes: tuple[str, ...], *, required: bool = True) -> str:
+        value = env.str(var, default="")
+        if not value:
+            if required:
+                errors.append(f"{var} is not set")
+        elif urlsplit(value).scheme not in schemes:
+            errors.append(f"{var} is not a {'/'.join(schemes)} URL")
+        return value
+
+    database_url = url("DATABASE_URL", DATABASE_SCHEMES)
+    redis_url = url("REDIS_URL", REDIS_SCHEMES, required=False)
+    celery_broker_url = url("CELERY_BROKER_URL", REDIS_SCHEMES)
+    if errors:
+        msg = "Invalid environment: " + "; ".join(errors) + "."
+        raise ImproperlyConfigured(msg)
+    return Environment(
+        read_dot_env_file=read_dot_env_file,
+        database=MappingProxyType(env.db_url_config(database_url)),
+        redis_url=redis_url,
+        celery_broker_url=celery_broker_url,
+    )
+
+
+@functools.cache
+def load() -> Environment:
+    """The ``Environment`` of this process, resolved on first use."""
+    return resolve()
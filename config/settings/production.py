@@ -1,7 +1,11 @@
 # ruff: noqa: E501
+from django.core.exceptions import ImproperlyConfigured
+
 from .base import *  # noqa: F403
 from .base import DATABASES
+from .base import ENVIRONMENT
 from .base import INSTALLED_APPS
+from .base import TEMPLATES
 from .base import env
 
 # GENERAL
@@ -13,14 +17,41 @@ ALLOWED_HOSTS = env.list("DJANGO_ALLOWED_HOSTS", default=["example.com"])
 
 # DATABASES
 # ------------------------------------------------------------------------------
-DATABASES["default"]["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=60)
+DATABASES["default"].setdefault("OPTIONS", {})
+# https://docs.djangoproject.com/en/dev/ref/databases/#connection-pool
+if env.bool("DJANGO_DATABASE_POOL", default=False):
+    # The pool owns connection lifetimes, so persistent connections must be off.
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": env.int("DJANGO_DATABASE_POOL_MIN_SIZE", default=2),
+        "max_size": env.int("DJANGO_DATABASE_POOL_MAX_SIZE", default=4),
+        "timeout": env.float("DJANGO_DATABASE_POOL_TIMEOUT", default=30.0),
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=60)
+# PgBouncer in transaction pooling mode hands every transaction a possibly
+# different server connection, so nothing may outlive a transaction.
+# https://docs.djangoproject.com/en/dev/ref/databases/#transaction-pooling-server-side-cursors
+if env.bool("DJANGO_DATABASE_PGBOUNCER", default=False):
+    DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = True
+    # https://www.psycopg.org/psycopg3/docs/advanced/prepare.html#using-prepared-statements-with-pgbouncer
+    DATABASES["default"]["OPTIONS"]["prepare_threshold"] = None
+
+# REDIS
+# ------------------------------------------------------------------------------
+# No local default here: the cache ignores its errors, so a missing URL would
+# only show as a cold cache and progress that never arrives.
+if not ENVIRONMENT.redis_url:
+    msg = "Invalid environment: REDIS_URL is not set."
+    raise ImproperlyConfigured(msg)
+REDIS_URL = ENVIRONMENT.redis_url
 
 # CACHES
 # ------------------------------------------------------------------------------
 CACHES = {
     "default": {
         "BACKEND": "django_redis.cache.RedisCache",
-        "LOCATION": env("REDIS_URL"),
+        "LOCATION": REDIS_URL,
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
             # Mimicing memcache behavior.
@@ -61,17 +92,50 @@ SECURE_CONTENT_TYPE_NOSNIFF = env.bool(
     default=True,
 )
 
+# STORAGES
+# ------------------------------------------------------------------------------
+# With a bucket, downloaded files are uploaded to S3 (or MinIO, Ceph...) in
+# parts, straight from the chunk tasks; without one they go to MEDIA_ROOT.
+# https://django-storages.readthedocs.io/en/latest/backends/amazon-S3.html
+AWS_STORAGE_BUCKET_NAME = env("DJANGO_AWS_STORAGE_BUCKET_NAME", default="")
+if AWS_STORAGE_BUCKET_NAME:
+    INSTALLED_APPS += ["storages"]
+    AWS_ACCESS_KEY_ID = env("DJANGO_AWS_ACCESS_KEY_ID")
+    AWS_SECRET_ACCESS_KEY = env("DJANGO_AWS_SECRET_ACCESS_KEY")
+    AWS_S3_REGION_NAME = env("DJANGO_AWS_S3_REGION_NAME", default=None)
+    # An S3-compatible store other than AWS, e.g. "http://minio:9000".
+    AWS_S3_ENDPOINT_URL = env("DJANGO_AWS_S3_ENDPOINT_URL", default=None)
+    AWS_S3_ADDRESSING_STYLE = env("DJANGO_AWS_S3_ADDRESSING_STYLE", default=None)
+
 # STATIC & MEDIA
 # ------------------------
 STORAGES = {
     "default": {
-        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "BACKEND": "yfiles.downloads.storage.MultipartStorage"
+        if AWS_STORAGE_BUCKET_NAME
+        else "django.core.files.storage.FileSystemStorage",
     },
     "staticfiles": {
         "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
     },
 }
 
+# TEMPLATES
+# ------------------------------------------------------------------------------
+# https://docs.djangoproject.com/en/dev/ref/templates/api/#django.template.loaders.cached.Loader
+# Spelled out so that the loaders stay cached whatever DEBUG is; config.asgi
+# compiles every template into this cache when a worker boots.
+TEMPLATES[0]["APP_DIRS"] = False
+TEMPLATES[0]["OPTIONS"]["loaders"] = [  # type: ignore[index]
+    (
+        "django.template.loaders.cached.Loader",
+        [
+            "django.template.loaders.filesystem.Loader",
+            "django.template.loaders.app_directories.Loader",
+        ],
+    ),
+]
+
 # EMAIL
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#default-from-email
@@ -119,11 +183,19 @@ ANYMAIL = {
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
-    "filters": {"require_debug_false": {"()": "django.utils.log.RequireDebugFalse"}},
+    "filters": {
+        "require_debug_false": {"()": "django.utils.log.RequireDebugFalse"},
+        "context": {"()": "yfiles.core.logs.ContextFilter"},
+        "hot_path": {
+            "()": "yfiles.core.logs.RateLimitFilter",
+            "rate": env.float("LOG_HOT_PATH_RATE", default=10),
+        },
+    },
     "formatters": {
         "verbose": {
             "format": "%(levelname)s %(asctime)s %(module)s %(process)d %(thread)d %(message)s",
         },
+        "json": {"()": "yfiles.core.logs.JsonFormatter"},
     },
     "handlers": {
         "mail_admins": {
@@ -133,12 +205,19 @@ LOGGING = {
         },
         "console": {
             "level": "DEBUG",
-            "class": "logging.StreamHandler",
-            "formatter": "verbose",
+            # A factory, not "class": dictConfig rebuilds QueueHandler classes
+            # given as a "class" around a queue of its own since Python 3.12.
+            "()": "yfiles.core.logs.QueueStreamHandler",
+            "filters": ["context"],
+            "formatter": "json",
         },
     },
     "root": {"level": "INFO", "handlers": ["console"]},
     "loggers": {
+        "yfiles.downloads.chunks": {
+            "level": env("DOWNLOADS_CHUNK_LOG_LEVEL", default="INFO"),
+            "filters": ["hot_path"],
+        },
         "django.request": {
             "handlers": ["mail_admins"],
             "level": "ERROR",
@@ -7,11 +7,19 @@ from django.urls import path
 from django.views import defaults as default_views
 from django.views.generic import TemplateView
 
+from yfiles.core.cache import cache_anonymous_page
+
+cache_page = cache_anonymous_page(settings.PAGES_CACHE_TIMEOUT)
+
 urlpatterns = [
-    path("", TemplateView.as_view(template_name="pages/home.html"), name="home"),
+    path(
+        "",
+        cache_page(TemplateView.as_view(template_name="pages/home.html")),
+        name="home",
+    ),
     path(
         "about/",
-        TemplateView.as_view(template_name="pages/about.html"),
+        cache_page(TemplateView.as_view(template_name="pages/about.html")),
         name="about",
     ),
     # Django Admin, use {% url 'admin:index' %}
@@ -20,6 +28,7 @@ urlpatterns = [
     path("users/", include("yfiles.users.urls", namespace="users")),
     path("accounts/", include("allauth.urls")),
     # Your stuff: custom urls includes go here
+    path("downloads/", include("yfiles.downloads.urls", namespace="downloads")),
     # ...
     # Media files
     *static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT),
@@ -1,27 +1,151 @@
 # ruff: noqa
+"""
+Merge the production dotenv files of one or more deployments into their `.env`:
+
+    python merge_production_dotenvs_in_dotenv.py [DIRECTORY ...]
+
+Each directory (this one by default) gets `.env` from `.envs/.production/.django`
+and `.envs/.production/.postgres`, several directories at a time. Files are read
+a line at a time and only a digest of each value is kept, so memory grows with
+the number of keys, not the size of the files. A key set again to the same value
+is written once and reported; set to another value, or a line that is not
+`KEY=value`, is an error and leaves `.env` as it was. `.env` is replaced in one
+`os.replace`, so readers never see it half written.
+"""
+
+import hashlib
 import os
+import re
+import sys
+import tempfile
+from collections.abc import Iterator
 from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 BASE_DIR = Path(__file__).parent.resolve()
+PRODUCTION_DOTENV_NAMES = (".django", ".postgres")
 PRODUCTION_DOTENVS_DIR = BASE_DIR / ".envs" / ".production"
 PRODUCTION_DOTENV_FILES = [
-    PRODUCTION_DOTENVS_DIR / ".django",
-    PRODUCTION_DOTENVS_DIR / ".postgres",
+    PRODUCTION_DOTENVS_DIR / name for name in PRODUCTION_DOTENV_NAMES
 ]
 DOTENV_FILE = BASE_DIR / ".env"
 
+ASSIGNMENT = re.compile(r"\s*(?:export\s+)?([A-Za-z_][A-Za-z0-9_]*)\s*=(.*)")
+
+
+class DotenvError(ValueError):
+    def __init__(self, errors: Sequence[str]):
+        super().__init__("\n".join(errors))
+        self.errors = list(errors)
+
+
+def _digest(value: str) -> bytes:
+    # Values are secrets: compare them by digest and never echo them.
+    return hashlib.blake2b(value.strip().encode(), digest_size=16).digest()
+
 
 def merge(
     output_file: Path,
     files_to_merge: Sequence[Path],
-) -> None:
-    merged_content = ""
-    for merge_file in files_to_merge:
-        merged_content += merge_file.read_text()
-        merged_content += os.linesep
-    output_file.write_text(merged_content)
+) -> list[str]:
+    """Merge ``files_to_merge`` into ``output_file``; returns the duplicate keys."""
+    seen: dict[str, tuple[bytes, str]] = {}
+    duplicates: list[str] = []
+    errors: list[str] = []
+
+    def lines() -> Iterator[str]:
+        for merge_file in files_to_merge:
+            with merge_file.open(encoding="utf-8") as content:
+                for number, line in enumerate(content, start=1):
+                    location = f"{merge_file}:{number}"
+                    match = ASSIGNMENT.fullmatch(line.rstrip("\r\n"))
+                    if match is None:
+                        if line.strip() and not line.lstrip().startswith("#"):
+                            errors.append(f"{location}: not a KEY=value line")
+                        yield line
+                        continue
+                    key, value = match.groups()
+                    digest = _digest(value)
+                    if key not in seen:
+                        seen[key] = (digest, location)
+                        yield line
+                    elif seen[key][0] == digest:
+                        duplicates.append(
+                            f"{location}: {key} is already set in {seen[key][1]}"
+                        )
+                    else:
+                        errors.append(
+                            f"{location}: {key} conflicts with {seen[key][1]}"
+                        )
+            yield "\n"
+
+    fd, temp_file = tempfile.mkstemp(
+        dir=output_file.parent,
+        prefix=f".{output_file.name}.",
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as output:
+            output.writelines(lines())
+            if errors:
+                raise DotenvError(errors)
+            output.flush()
+            os.fsync(output.fileno())
+        os.replace(temp_file, output_file)
+    except BaseException:
+        Path(temp_file).unlink(missing_ok=True)
+        raise
+    return duplicates
+
+
+def merge_directory(directory: Path) -> list[str]:
+    dotenvs_dir = directory / ".envs" / ".production"
+    return merge(
+        directory / ".env",
+        [dotenvs_dir / name for name in PRODUCTION_DOTENV_NAMES],
+    )
+
+
+def merge_directories(
+    directories: Sequence[Path],
+    workers: int | None = None,
+) -> dict[Path, list[str]]:
+    """
+    Merge each of ``directories`` in a pool of ``workers`` threads, as the work is
+    mostly waiting on the disk; returns the duplicate keys of each. Raises
+    DotenvError with the errors of every directory that failed, once all have run.
+    """
+    with ThreadPoolExecutor(workers) as executor:
+        futures = {
+            directory: executor.submit(merge_directory, directory)
+            for directory in directories
+        }
+    duplicates = {}
+    errors = []
+    for directory, future in futures.items():
+        try:
+            duplicates[directory] = future.result()
+        except DotenvError as exc:
+            errors.extend(exc.errors)
+        except OSError as exc:
+            errors.append(f"{directory}: {exc}")
+    if errors:
+        raise DotenvError(errors)
+    return duplicates
+
+
+def main(argv: Sequence[str]) -> int:
+    directories = [Path(arg) for arg in argv] or [BASE_DIR]
+    try:
+        duplicates = merge_directories(directories)
+    except DotenvError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    for warnings in duplicates.values():
+        for warning in warnings:
+            print(f"warning: {warning}", file=sys.stderr)
+    return 0
 
 
 if __name__ == "__main__":
-    merge(DOTENV_FILE, PRODUCTION_DOTENV_FILES)
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,57 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from config.gunicorn import cpu_limit
+from config.gunicorn import default_workers
+
+
+@pytest.fixture(autouse=True)
+def _eight_cpus(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(8)))
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+
+
+@pytest.mark.parametrize(
+    ("cpu_max", "expected"),
+    [
+        ("150000 100000\n", 1.5),
+        ("max 100000\n", 8),
+        ("1600000 100000\n", 8),
+    ],
+)
+def test_cpu_limit_cgroup_v2(tmp_path: Path, cpu_max: str, expected: float):
+    (tmp_path / "cpu.max").write_text(cpu_max)
+
+    assert cpu_limit(tmp_path) == expected
+
+
+@pytest.mark.parametrize(("quota", "expected"), [("200000", 2), ("-1", 8)])
+def test_cpu_limit_cgroup_v1(tmp_path: Path, quota: str, expected: float):
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text(f"{quota}\n")
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+
+    assert cpu_limit(tmp_path) == expected
+
+
+def test_cpu_limit_without_cgroup(tmp_path: Path):
+    assert cpu_limit(tmp_path) == 8  # noqa: PLR2004
+
+
+@pytest.mark.parametrize(("cpu_max", "expected"), [("50000 100000", 2), ("", 8)])
+def test_default_workers(tmp_path: Path, cpu_max: str, expected: int):
+    if cpu_max:
+        (tmp_path / "cpu.max").write_text(cpu_max)
+
+    assert default_workers(tmp_path) == expected
+
+
+def test_default_workers_from_environment(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+
+    assert default_workers(tmp_path) == 3  # noqa: PLR2004
@@ -0,0 +1,39 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from tests.test_worker_settings import PRODUCTION_ENV
+
+BOOT = """
+import logging
+import django
+django.setup()
+logging.getLogger("yfiles").warning("booted")
+for handler in logging.getLogger().handlers:
+    handler.flush()
+"""
+
+
+@pytest.mark.parametrize(
+    "settings_module",
+    ["config.settings.production", "config.settings.worker"],
+)
+def test_logging_writes_json_records(settings_module):
+    env = {
+        **os.environ,
+        **PRODUCTION_ENV,
+        "DJANGO_SETTINGS_MODULE": settings_module,
+        "CELERY_SKIP_CHECKS": "true",
+    }
+    process = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", BOOT],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    records = [json.loads(line) for line in process.stderr.splitlines()]
+    assert [record["message"] for record in records] == ["booted"]
@@ -1,8 +1,12 @@
+import tracemalloc
 from pathlib import Path
 
 import pytest
 
+from merge_production_dotenvs_in_dotenv import DotenvError
+from merge_production_dotenvs_in_dotenv import main
 from merge_production_dotenvs_in_dotenv import merge
+from merge_production_dotenvs_in_dotenv import merge_directories
 
 
 @pytest.mark.parametrize(
@@ -32,3 +36,113 @@ def test_merge(
     merge(output_file, files_to_merge)
 
     assert output_file.read_text() == expected_output
+
+
+def write_dotenvs(directory: Path, django: str, postgres: str) -> None:
+    dotenvs_dir = directory / ".envs" / ".production"
+    dotenvs_dir.mkdir(parents=True)
+    (dotenvs_dir / ".django").write_text(django)
+    (dotenvs_dir / ".postgres").write_text(postgres)
+
+
+def test_merge_skips_comments_and_duplicates(tmp_path: Path):
+    first = tmp_path / ".first"
+    first.write_text("# Django\nexport A=0\n\nB = 1\n")
+    second = tmp_path / ".second"
+    second.write_text("A=0\nC=2\n")
+    output_file = tmp_path / ".env"
+
+    duplicates = merge(output_file, [first, second])
+
+    assert output_file.read_text() == "# Django\nexport A=0\n\nB = 1\n\nC=2\n\n"
+    assert duplicates == [f"{second}:1: A is already set in {first}:2"]
+
+
+@pytest.mark.parametrize(
+    ("input_content", "error"),
+    [
+        ("A=0\nA=1\n", ":2: A conflicts with "),
+        ("A=0\nB\n", ":2: not a KEY=value line"),
+    ],
+)
+def test_merge_errors_leave_output_alone(
+    tmp_path: Path,
+    input_content: str,
+    error: str,
+):
+    merge_file = tmp_path / ".django"
+    merge_file.write_text(input_content)
+    output_file = tmp_path / ".env"
+    output_file.write_text("OLD=1\n")
+
+    with pytest.raises(DotenvError, match=error):
+        merge(output_file, [merge_file])
+
+    assert output_file.read_text() == "OLD=1\n"
+    assert sorted(path.name for path in tmp_path.iterdir()) == [".django", ".env"]
+
+
+def test_merge_conflict_does_not_show_values(tmp_path: Path):
+    merge_file = tmp_path / ".django"
+    merge_file.write_text("SECRET=hunter2\nSECRET=hunter3\n")
+
+    with pytest.raises(DotenvError) as exc_info:
+        merge(tmp_path / ".env", [merge_file])
+
+    assert "hunter" not in str(exc_info.value)
+
+
+def test_merge_many_keys(tmp_path: Path):
+    files_to_merge = []
+    for name in (".django", ".postgres"):
+        merge_file = tmp_path / name
+        merge_file.write_text("".join(f"{name[1:]}_{n}={n}\n" for n in range(100_000)))
+        files_to_merge.append(merge_file)
+    output_file = tmp_path / ".env"
+
+    assert merge(output_file, files_to_merge) == []
+    assert len(output_file.read_text().splitlines()) == 200_002  # noqa: PLR2004
+
+
+def test_merge_memory_does_not_grow_with_files(tmp_path: Path):
+    value = "x" * 256 * 1024
+    merge_file = tmp_path / ".django"
+    with merge_file.open("w") as output:
+        for n in range(64):
+            output.write(f"KEY_{n}={value}\n")
+    output_file = tmp_path / ".env"
+
+    tracemalloc.start()
+    merge(output_file, [merge_file])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert output_file.stat().st_size > 16 * 1024 * 1024
+    assert peak < 4 * 1024 * 1024
+
+
+def test_merge_directories(tmp_path: Path):
+    for n in range(8):
+        write_dotenvs(tmp_path / f"node{n}", f"NODE={n}\n", "POSTGRES_DB=yfiles\n")
+    write_dotenvs(tmp_path / "broken", "NODE=0\n", "NODE=1\n")
+    directories = sorted(tmp_path.iterdir())
+
+    with pytest.raises(DotenvError) as exc_info:
+        merge_directories(directories, workers=4)
+
+    assert exc_info.value.errors == [
+        f"{tmp_path}/broken/.envs/.production/.postgres:1: "
+        f"NODE conflicts with {tmp_path}/broken/.envs/.production/.django:1",
+    ]
+    assert not (tmp_path / "broken" / ".env").exists()
+    assert (tmp_path / "node7" / ".env").read_text() == (
+        "NODE=7\n\nPOSTGRES_DB=yfiles\n\n"
+    )
+
+
+def test_main(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    write_dotenvs(tmp_path, "A=0\n", "A=0\n")
+
+    assert main([str(tmp_path)]) == 0
+    assert "warning: " in capsys.readouterr().err
+    assert main([str(tmp_path / "missing")]) == 1
@@ -0,0 +1,46 @@
+import json
+import os
+import subprocess
+import sys
+
+from config.celery_app import app
+
+BOOT = """
+import json, sys
+import django
+django.setup()
+from config.celery_app import app
+app.loader.import_default_modules()
+json.dump({"modules": sorted(sys.modules), "tasks": sorted(app.tasks)}, sys.stdout)
+"""
+PRODUCTION_ENV = {
+    "DJANGO_SECRET_KEY": "test",
+    "DJANGO_ADMIN_URL": "admin/",
+    "MAILGUN_API_KEY": "test",
+    "MAILGUN_DOMAIN": "example.com",
+    "DATABASE_URL": "postgres:///test",
+    "REDIS_URL": "redis://localhost:6379/0",
+    "CELERY_BROKER_URL": "redis://localhost:6379/0",
+}
+
+
+def test_worker_loads_every_task_without_web_apps():
+    env = {
+        **os.environ,
+        **PRODUCTION_ENV,
+        "DJANGO_SETTINGS_MODULE": "config.settings.worker",
+        "CELERY_SKIP_CHECKS": "true",
+    }
+    process = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", BOOT],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    worker = json.loads(process.stdout)
+
+    app.loader.import_default_modules()
+    assert worker["tasks"] == sorted(app.tasks)
+    for package in ("allauth", "crispy_forms", "django.contrib.admin", "anymail"):
+        assert package not in worker["modules"]
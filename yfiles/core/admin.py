@@ -0,0 +1,32 @@
+from collections.abc import Sequence
+
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+
+from .paginator import EstimatedCountPaginator
+
+
+class OnlyChangeList(ChangeList):
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        list_only = getattr(self.model_admin, "list_only", ())
+        if list_only:
+            queryset = queryset.only(*list_only)
+        return queryset
+
+
+class LargeTableAdminMixin:
+    """
+    Changelist settings for tables with millions of rows.
+
+    Counts come from the planner statistics, the "N total" link that counts
+    the whole table again is off, and ``list_only`` limits the columns loaded
+    for each row of the changelist.
+    """
+
+    paginator: type[Paginator] = EstimatedCountPaginator
+    show_full_result_count = False
+    list_only: Sequence[str] = ()
+
+    def get_changelist(self, request, **kwargs):
+        return OnlyChangeList
@@ -0,0 +1,13 @@
+import contextlib
+
+from django.apps import AppConfig
+from django.utils.translation import gettext_lazy as _
+
+
+class CoreConfig(AppConfig):
+    name = "yfiles.core"
+    verbose_name = _("Core")
+
+    def ready(self):
+        with contextlib.suppress(ImportError):
+            import yfiles.core.signals  # noqa: F401
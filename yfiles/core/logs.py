@@ -0,0 +1,205 @@
+"""
+Structured logging that never blocks on the output stream.
+
+``QueueStreamHandler`` only puts records on a bounded queue; a thread writes
+them out, so a worker fetching chunks does not wait on a slow or full stdout.
+When the queue is full records are dropped and counted, and the next record
+written carries the count as ``dropped``.
+
+``JsonFormatter`` writes one JSON object per line with the correlation fields
+of the record: those set with ``context()`` around a piece of work, such as
+the job, file and offset of a chunk, the Celery task id, and any ``extra``.
+
+``RateLimitFilter`` keeps debug logging of hot paths affordable: it lets a
+few records a second through from each line of code, and the next one let
+through carries the number held back as ``suppressed``.
+"""
+
+import contextlib
+import contextvars
+import copy
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Iterator
+from logging.handlers import QueueHandler
+from logging.handlers import QueueListener
+from queue import Full
+from queue import Queue
+
+from celery import current_task
+
+# Never changed in place: context() sets a new dict.
+_context: contextvars.ContextVar[dict] = contextvars.ContextVar(
+    "log_context",
+    default={},
+)
+
+# Attributes of every record, which JsonFormatter does not repeat as fields.
+RECORD_ATTRIBUTES = frozenset(
+    [
+        *logging.LogRecord("", 0, "", 0, "", (), None).__dict__,
+        "message",
+        "asctime",
+    ],
+)
+
+
+@contextlib.contextmanager
+def context(**fields) -> Iterator[None]:
+    """Add ``fields`` to every record logged within, in this thread or task."""
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copy the correlation fields onto records as they are logged."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for name, value in _context.get().items():
+            setattr(record, name, value)
+        if current_task:
+            record.task_id = current_task.request.id
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.datetime.fromtimestamp(
+                record.created,
+                tz=datetime.UTC,
+            ).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+            "thread": record.thread,
+        }
+        entry.update(
+            (name, value)
+            for name, value in record.__dict__.items()
+            if name not in RECORD_ATTRIBUTES
+        )
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class _Listener(QueueListener):
+    queue: Queue
+
+    def enqueue_sentinel(self) -> None:
+        # Wait for room rather than fail to stop when the queue is full.
+        self.queue.put(self._sentinel)  # type: ignore[attr-defined]
+
+
+class QueueStreamHandler(QueueHandler):
+    """
+    Write records to ``stream`` from a thread, through a queue of ``capacity``.
+
+    A forked child, such as a prefork pool worker, starts a thread of its own.
+    """
+
+    queue: Queue
+
+    def __init__(self, stream=None, capacity: int = 10_000):
+        super().__init__(Queue(capacity))
+        self.capacity = capacity
+        self.dropped = 0
+        self.target = logging.StreamHandler(stream)
+        self._start()
+        os.register_at_fork(after_in_child=self._restart)
+
+    def _start(self) -> None:
+        self.listener = _Listener(self.queue, self.target)
+        self.listener.start()
+        self.running = True
+
+    def _restart(self) -> None:
+        # The thread of the parent does not exist in the child, and the
+        # queue may hold records the parent is writing.
+        if self.running:
+            self.queue = Queue(self.capacity)
+            self.dropped = 0
+            self._start()
+
+    def setFormatter(self, fmt: logging.Formatter | None) -> None:  # noqa: N802
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting is left to the thread, but the arguments are merged now:
+        # they may change or go away before it gets to them.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if self.dropped:
+            record.dropped = self.dropped
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except Full:
+            self.dropped += 1
+        else:
+            self.dropped -= getattr(record, "dropped", 0)
+
+    def flush(self) -> None:
+        """Wait until the thread has written every record queued so far."""
+        if self.running:
+            self.queue.join()
+        self.target.flush()
+
+    def close(self) -> None:
+        if self.running:
+            self.running = False
+            self.listener.stop()
+        self.target.close()
+        super().close()
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Let through ``rate`` records a second, in bursts of up to as many, from each
+    line of code that logs at ``level`` or below. Records above it always pass.
+    """
+
+    def __init__(self, rate: float = 10, level: int | str = logging.DEBUG):
+        super().__init__()
+        self.rate = rate
+        self.level = logging.getLevelName(level) if isinstance(level, str) else level
+        # (path, line) -> [tokens, last refill, records held back].
+        self._sites: dict[tuple[str, int], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.level:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.setdefault(
+                (record.pathname, record.lineno),
+                [self.rate, now, 0],
+            )
+            site[0] = min(self.rate, site[0] + (now - site[1]) * self.rate)
+            site[1] = now
+            if site[0] < 1:
+                site[2] += 1
+                return False
+            site[0] -= 1
+            suppressed, site[2] = site[2], 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
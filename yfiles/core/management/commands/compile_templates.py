@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from yfiles.core.templating import compile_templates
+
+
+class Command(BaseCommand):
+    help = (
+        "Compile every template. Fails when a template of the project does not "
+        "compile; broken third-party templates are only reported."
+    )
+    # Runs while the image is built, without a database or real settings.
+    requires_system_checks: list[str] = []
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        result = compile_templates()
+        elapsed = time.perf_counter() - started
+
+        broken = []
+        for path, error in result.errors.items():
+            # Missing tag library errors go on to list every library there is.
+            reason = str(error).splitlines()[0]
+            if path.is_relative_to(settings.APPS_DIR):
+                broken.append(path)
+                self.stderr.write(self.style.ERROR(f"{path}: {reason}"))
+            elif options["verbosity"] > 1:
+                self.stderr.write(self.style.WARNING(f"{path}: {reason}"))
+
+        if broken:
+            msg = f"{len(broken)} project template(s) do not compile."
+            raise CommandError(msg)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Compiled {result.compiled} templates in {elapsed:.2f}s "
+                f"({len(result.errors)} third-party templates skipped).",
+            ),
+        )
@@ -0,0 +1,23 @@
+"""
+Counters shared by every process, kept in the default cache.
+
+In production the cache is Redis, so web processes and worker children count
+into the same keys. They are operational signals, not accounting: increments
+are lost while the cache is down.
+"""
+
+from django.core.cache import cache
+
+
+def metric_key(name: str) -> str:
+    return f"metrics:{name}"
+
+
+def increment(name: str, delta: int = 1) -> None:
+    key = metric_key(name)
+    cache.add(key, 0, None)
+    cache.incr(key, delta)
+
+
+def read(name: str) -> int:
+    return cache.get(metric_key(name), 0)
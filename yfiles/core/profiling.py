@@ -0,0 +1,225 @@
+"""
+Per-request profile of the queries and cache lookups a view makes.
+
+``RequestProfileMiddleware`` profiles a sampled fraction of requests,
+``REQUEST_PROFILE_SAMPLE_RATE``: the number of queries and their time, cache
+hits and misses, and the total latency. Each profile is logged, and added to
+per-view metrics (``yfiles.core.metrics``), so averages can be derived:
+``views.<view>.requests``, ``.queries``, ``.db_ms``, ``.cache_hits``,
+``.cache_misses`` and ``.ms``.
+
+``QUERY_BUDGETS`` caps the queries one request to a view may run, which
+catches N+1 queries. A sampled request over its budget is logged as a warning
+and counted in ``views.<view>.over_budget``. With ``QUERY_BUDGETS_ENFORCED``,
+as in tests, every request is profiled and going over raises
+``QueryBudgetError``.
+
+The profile of the request in hand lives in a context variable, which follows
+the request into ``sync_to_async`` threads, so async views are profiled too.
+Queries are counted by an execute wrapper on every connection, and cache
+lookups by wrapping the ``get`` and ``get_many`` of the cache backends. Both
+pass straight through outside of profiled requests.
+"""
+
+import contextvars
+import dataclasses
+import logging
+import random
+import time
+from collections.abc import Callable
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from asgiref.sync import markcoroutinefunction
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpRequest
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+# Transactions nested in the test transaction, as ATOMIC_REQUESTS makes them,
+# turn into savepoints; elsewhere they are not queries the wrappers see.
+SAVEPOINTS = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+class QueryBudgetError(Exception):
+    """A view ran more queries than its budget allows."""
+
+
+@dataclasses.dataclass
+class RequestProfile:
+    queries: int = 0
+    db_time: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    duration: float = 0.0
+    # Set while a cache lookup runs, so the lookups it makes are not counted.
+    in_cache: bool = False
+
+
+current: contextvars.ContextVar[RequestProfile | None] = contextvars.ContextVar(
+    "request_profile",
+    default=None,
+)
+
+
+def record_query(execute, sql, params, many, context):
+    profile = current.get()
+    if profile is None or sql.startswith(SAVEPOINTS):
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.db_time += time.perf_counter() - started
+        profile.queries += 1
+
+
+def install_query_wrapper(connection, **kwargs) -> None:
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def _counted_get(get: Callable) -> Callable:
+    @wraps(get)
+    def wrapper(self, key, default=None, *args, **kwargs):
+        profile = current.get()
+        if profile is None or profile.in_cache:
+            return get(self, key, default, *args, **kwargs)
+        profile.in_cache = True
+        try:
+            value = get(self, key, _MISSING, *args, **kwargs)
+        finally:
+            profile.in_cache = False
+        if value is _MISSING:
+            profile.cache_misses += 1
+            return default
+        profile.cache_hits += 1
+        return value
+
+    return wrapper
+
+
+def _counted_get_many(get_many: Callable) -> Callable:
+    @wraps(get_many)
+    def wrapper(self, keys, *args, **kwargs):
+        profile = current.get()
+        if profile is None or profile.in_cache:
+            return get_many(self, keys, *args, **kwargs)
+        keys = list(keys)
+        profile.in_cache = True
+        try:
+            found = get_many(self, keys, *args, **kwargs)
+        finally:
+            profile.in_cache = False
+        profile.cache_hits += len(found)
+        profile.cache_misses += len(keys) - len(found)
+        return found
+
+    return wrapper
+
+
+def instrument_caches() -> None:
+    """Count the lookups of every configured cache backend, once per process."""
+    for alias in settings.CACHES:
+        backend = import_string(settings.CACHES[alias]["BACKEND"])
+        if getattr(backend, "_profiled", False):
+            continue
+        backend.get = _counted_get(backend.get)
+        backend.get_many = _counted_get_many(backend.get_many)
+        backend._profiled = True  # noqa: SLF001
+
+
+def finish(request: HttpRequest, profile: RequestProfile) -> None:
+    """Report a profile and check it against the budget of its view."""
+    match = request.resolver_match
+    if match is None:
+        return
+    view = match.view_name
+    logger.info(
+        "%s: %d queries in %.1f ms, %d cache hits, %d misses, %.1f ms",
+        view,
+        profile.queries,
+        profile.db_time * 1000,
+        profile.cache_hits,
+        profile.cache_misses,
+        profile.duration * 1000,
+    )
+    for name, value in (
+        ("requests", 1),
+        ("queries", profile.queries),
+        ("db_ms", round(profile.db_time * 1000)),
+        ("cache_hits", profile.cache_hits),
+        ("cache_misses", profile.cache_misses),
+        ("ms", round(profile.duration * 1000)),
+    ):
+        metrics.increment(f"views.{view}.{name}", value)
+
+    budget = settings.QUERY_BUDGETS.get(view)
+    if budget is None or profile.queries <= budget:
+        return
+    message = f"{view} ran {profile.queries} queries, over its budget of {budget}"
+    if settings.QUERY_BUDGETS_ENFORCED:
+        raise QueryBudgetError(message)
+    logger.warning(message)
+    metrics.increment(f"views.{view}.over_budget")
+
+
+class RequestProfileMiddleware:
+    """Profile a sample of requests, or all of them while budgets are enforced."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        instrument_caches()
+        connection_created.connect(install_query_wrapper, dispatch_uid=__name__)
+        for connection in connections.all(initialized_only=True):
+            install_query_wrapper(connection)
+
+    def sampled(self) -> bool:
+        return (
+            settings.QUERY_BUDGETS_ENFORCED
+            or random.random() < settings.REQUEST_PROFILE_SAMPLE_RATE  # noqa: S311
+        )
+
+    def __call__(self, request: HttpRequest):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        profile = RequestProfile()
+        token = current.set(profile)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            profile.duration = time.perf_counter() - started
+            current.reset(token)
+        finish(request, profile)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        if not self.sampled():
+            return await self.get_response(request)
+        profile = RequestProfile()
+        token = current.set(profile)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profile.duration = time.perf_counter() - started
+            current.reset(token)
+        # Reporting increments the metrics in the cache, a blocking call.
+        await sync_to_async(finish)(request, profile)
+        return response
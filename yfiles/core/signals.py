@@ -0,0 +1,39 @@
+import logging
+
+from celery.signals import task_postrun
+from celery.signals import worker_process_init
+from celery.signals import worker_process_shutdown
+from django.db.models.signals import post_migrate
+from django.dispatch import receiver
+
+from . import watchdog
+from .cache import PAGES
+from .cache import bump_version
+
+
+@receiver(post_migrate)
+def expire_pages(sender, **kwargs) -> None:
+    """Migrations run with every deploy, which may change any page."""
+    bump_version(PAGES)
+
+
+@worker_process_init.connect
+def start_child_memory(**kwargs) -> None:
+    watchdog.child.reset()
+
+
+@task_postrun.connect
+def sample_child_memory(**kwargs) -> None:
+    watchdog.child.sample()
+
+
+@worker_process_shutdown.connect
+def record_child_exit(exitcode: int | None = None, **kwargs) -> None:
+    watchdog.record_exit(exitcode)
+
+
+@worker_process_shutdown.connect
+def flush_logs(**kwargs) -> None:
+    """Children exit without running atexit: write out the queued records."""
+    for handler in logging.getLogger().handlers:
+        handler.flush()
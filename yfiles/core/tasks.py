@@ -0,0 +1,41 @@
+from itertools import islice
+
+from celery import current_app
+from celery import shared_task
+
+SCAN_BATCH_SIZE = 1000
+
+
+@shared_task(ignore_result=True)
+def prune_task_results() -> int:
+    """
+    Make sure every stored task result expires.
+
+    The Redis result backend writes results with ``CELERY_RESULT_EXPIRES`` as
+    their TTL, but results written while it was disabled, or by an older
+    deploy, never go away. This gives them the current TTL; backends that do
+    not expire keys themselves are cleaned up by their own sweep instead.
+    """
+    backend = current_app.backend
+    if not backend.supports_autoexpire:
+        backend.cleanup()
+        return 0
+    if not backend.expires:
+        return 0
+
+    client = backend.client
+    keys = client.scan_iter(match=backend.task_keyprefix + b"*", count=SCAN_BATCH_SIZE)
+    pruned = 0
+    while batch := list(islice(keys, SCAN_BATCH_SIZE)):
+        with client.pipeline(transaction=False) as pipe:
+            for key in batch:
+                pipe.ttl(key)
+            ttls = pipe.execute()
+        # -1 is a key without a TTL, -2 one that is already gone.
+        eternal = [key for key, ttl in zip(batch, ttls, strict=True) if ttl == -1]
+        with client.pipeline(transaction=False) as pipe:
+            for key in eternal:
+                pipe.expire(key, backend.expires)
+            pipe.execute()
+        pruned += len(eternal)
+    return pruned
@@ -0,0 +1,15 @@
+from django import template
+
+from yfiles.core.cache import instance_version
+
+register = template.Library()
+
+
+@register.filter
+def cache_version(instance) -> int:
+    """
+    Version of a model instance, to vary ``{% cache %}`` fragments on::
+
+        {% cache 3600 profile user.pk user|cache_version %}
+    """
+    return instance_version(instance)
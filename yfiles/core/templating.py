@@ -0,0 +1,75 @@
+"""
+Compile templates ahead of the first request.
+
+The cached template loader parses a template the first time it is used and
+keeps it for the life of the process. Right after a deploy or a worker restart
+the first render of every page pays for parsing its whole template tree:
+allauth's templates, crispy's and the form widgets' among them.
+"""
+
+import dataclasses
+from collections.abc import Iterable
+from collections.abc import Iterator
+from pathlib import Path
+
+from django.template import TemplateSyntaxError
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.template.loaders.base import Loader
+from django.template.loaders.cached import Loader as CachedLoader
+
+TEMPLATE_SUFFIXES = (".html", ".txt")
+
+
+@dataclasses.dataclass
+class CompileResult:
+    compiled: int = 0
+    # Template file -> why it did not compile.
+    errors: dict[Path, TemplateSyntaxError] = dataclasses.field(default_factory=dict)
+
+
+def template_dirs(loaders: Iterable[Loader]) -> Iterator[Path]:
+    """Directories the loaders search, in order, through cached loaders."""
+    for loader in loaders:
+        if isinstance(loader, CachedLoader):
+            yield from template_dirs(loader.loaders)
+        elif hasattr(loader, "get_dirs"):
+            yield from map(Path, loader.get_dirs())
+
+
+def template_files(backend: DjangoTemplates) -> dict[str, Path]:
+    """
+    Every template name the backend can load, with the file it resolves to.
+
+    Directories are searched in loader order, so a project template that
+    overrides a third-party one wins like it does at render time.
+    """
+    files: dict[str, Path] = {}
+    for root in template_dirs(backend.engine.template_loaders):
+        for path in sorted(root.rglob("*")):
+            if path.suffix in TEMPLATE_SUFFIXES and path.is_file():
+                files.setdefault(path.relative_to(root).as_posix(), path)
+    return files
+
+
+def compile_templates() -> CompileResult:
+    """
+    Load every template of every Django template engine.
+
+    With the cached loader the compiled templates stay in memory, so calling
+    this at boot moves their parsing out of the first requests. Templates
+    that do not compile are collected rather than raised: some third-party
+    templates load tag libraries of apps that are not installed.
+    """
+    result = CompileResult()
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        for name, path in template_files(backend).items():
+            try:
+                backend.engine.get_template(name)
+            except TemplateSyntaxError as error:
+                result.errors[path] = error
+            else:
+                result.compiled += 1
+    return result
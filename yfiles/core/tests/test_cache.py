@@ -0,0 +1,76 @@
+import pytest
+from django.contrib import messages
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.cache import SessionStore
+from django.test import RequestFactory
+from django.urls import reverse
+
+from yfiles.core.cache import PAGES
+from yfiles.core.cache import bump_version
+from yfiles.core.cache import get_version
+from yfiles.core.cache import instance_version
+from yfiles.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+def test_versions():
+    assert get_version("things", 1) == 1
+    bump_version("things", 1)
+    assert get_version("things", 1) == 2  # noqa: PLR2004
+    assert get_version("things", 2) == 1
+
+
+def test_instance_version(user: User):
+    version = instance_version(user)
+    user.save()
+    assert instance_version(user) == version + 1
+    assert instance_version(User()) == 0
+
+
+class TestAnonymousPageCache:
+    def test_served_from_cache(self, client):
+        first = client.get(reverse("home"))
+        second = client.get(reverse("home"))
+        assert first.templates
+        assert not second.templates
+        assert second.content == first.content
+
+    def test_deploy_expires_pages(self, client):
+        client.get(reverse("home"))
+        bump_version(PAGES)
+        assert client.get(reverse("home")).templates
+
+    def test_signed_in_users_render(self, client, user: User):
+        client.force_login(user)
+        client.get(reverse("home"))
+        assert client.get(reverse("home")).templates
+
+    def test_pending_messages_render(self, rf: RequestFactory):
+        from config.urls import urlpatterns
+
+        view = urlpatterns[0].callback
+        request = rf.get("/")
+        request.user = AnonymousUser()
+        request.session = SessionStore()
+        request._messages = FallbackStorage(request)  # type: ignore[attr-defined] # noqa: SLF001
+        view(request).render()
+        messages.info(request, "Signed out.")
+        response = view(request)
+        assert not response.is_rendered
+
+
+class TestUserFragments:
+    def test_detail_fragment_expires_on_save(self, client, user: User):
+        client.force_login(user)
+        url = reverse("users:detail", kwargs={"pk": user.pk})
+        assert f"<h2>{user.name}</h2>" in client.get(url).content.decode()
+
+        # A queryset update sends no signal: the fragment stays as it was.
+        User.objects.filter(pk=user.pk).update(name="Quiet Rename")
+        assert "<h2>Quiet Rename</h2>" not in client.get(url).content.decode()
+
+        user.name = "Loud Rename"
+        user.save()
+        assert "<h2>Loud Rename</h2>" in client.get(url).content.decode()
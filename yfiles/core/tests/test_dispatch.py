@@ -0,0 +1,75 @@
+import json
+
+import pytest
+import redis
+from kombu.transport.redis import Channel as RedisChannel
+
+from yfiles.core import dispatch
+from yfiles.core.dispatch import send_many
+from yfiles.core.dispatch import sized_batches
+from yfiles.users.tasks import get_users_count
+
+QUEUE = "test-dispatch"
+
+
+@pytest.fixture
+def broker(settings):
+    """The Redis broker itself, with the test queue emptied afterwards."""
+    settings.CELERY_TASK_ALWAYS_EAGER = False
+    client = redis.Redis.from_url(settings.CELERY_BROKER_URL)
+    client.delete(QUEUE)
+    yield client
+    client.delete(QUEUE)
+    client.close()
+
+
+def test_send_many_runs_eager_tasks(settings, monkeypatch):
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    calls: list[tuple] = []
+    monkeypatch.setattr(get_users_count, "apply_async", calls.append)
+
+    assert send_many(get_users_count, ((),) * 3) == 3  # noqa: PLR2004
+    assert calls == [(), (), ()]
+
+
+def test_send_many_publishes_through_redis(broker, monkeypatch):
+    channels = []
+    original = dispatch.pipelined
+
+    def pipelined(channel):
+        channels.append(channel)
+        return original(channel)
+
+    monkeypatch.setattr(dispatch, "pipelined", pipelined)
+
+    assert send_many(get_users_count, ((),) * 5, queue=QUEUE) == 5  # noqa: PLR2004
+
+    messages = [json.loads(message) for message in broker.lrange(QUEUE, 0, -1)]
+    assert len(messages) == 5  # noqa: PLR2004
+    assert {message["headers"]["task"] for message in messages} == {
+        get_users_count.name,
+    }
+    # Batches of 1, 2 and 2 messages, each on a pipeline of the Redis channel.
+    assert len(channels) == 3  # noqa: PLR2004
+    for channel in channels:
+        assert isinstance(channel, RedisChannel)
+        assert "_put" not in vars(channel)
+        assert "_put_fanout" not in vars(channel)
+        assert channel._put.__func__ is RedisChannel._put  # noqa: SLF001
+        assert channel._put_fanout.__func__ is RedisChannel._put_fanout  # noqa: SLF001
+
+    # The channel publishes on its own again once the pipeline is sent.
+    get_users_count.apply_async(queue=QUEUE)
+    assert broker.llen(QUEUE) == 6  # noqa: PLR2004
+
+
+def test_sized_batches():
+    items = ["aaaa", "bbbb", "c", "d", "e" * 20, "ff"]
+
+    assert list(sized_batches(items, len, 3, 10)) == [
+        ["aaaa", "bbbb", "c"],
+        ["d"],
+        ["e" * 20],
+        ["ff"],
+    ]
+    assert list(sized_batches([], len, 3, 10)) == []
@@ -0,0 +1,124 @@
+import io
+import json
+import logging
+import logging.config
+from queue import Queue
+
+import pytest
+
+from yfiles.core import logs
+
+
+@pytest.fixture
+def stream() -> io.StringIO:
+    return io.StringIO()
+
+
+@pytest.fixture
+def handler(stream):
+    handler = logs.QueueStreamHandler(stream)
+    handler.setFormatter(logs.JsonFormatter())
+    handler.addFilter(logs.ContextFilter())
+    yield handler
+    handler.close()
+
+
+@pytest.fixture
+def logger(handler):
+    logger = logging.getLogger("yfiles.tests.logs")
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    yield logger
+    logger.removeHandler(handler)
+
+
+def _lines(handler, stream) -> list[dict]:
+    handler.flush()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_json_lines_with_context(logger, handler, stream):
+    items = ["a"]
+    with logs.context(job_id=1), logs.context(file_id=2, offset=0):
+        logger.info("Got %s", items, extra={"size": 3})
+    # Arguments are merged when logged, not when written.
+    items.append("b")
+    logger.info("Outside")
+
+    first, second = _lines(handler, stream)
+    assert first["message"] == "Got ['a']"
+    assert first["level"] == "INFO"
+    assert first["logger"] == "yfiles.tests.logs"
+    assert (first["job_id"], first["file_id"], first["offset"]) == (1, 2, 0)
+    assert first["size"] == 3  # noqa: PLR2004
+    assert "job_id" not in second
+
+
+def test_exception(logger, handler, stream):
+    try:
+        1 / 0  # noqa: B018
+    except ZeroDivisionError:
+        logger.exception("Failed")
+
+    (line,) = _lines(handler, stream)
+    assert "ZeroDivisionError" in line["exception"]
+
+
+def test_task_id(logger, handler, stream):
+    from yfiles.users.tasks import get_users_count
+
+    def log_in_task(*args, **kwargs):
+        logger.info("In a task")
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(get_users_count, "run", log_in_task)
+        result = get_users_count.apply()
+
+    (line,) = _lines(handler, stream)
+    assert line["task_id"] == result.id
+
+
+def test_full_queue_drops_and_counts(logger, handler, stream):
+    handler.close()
+    handler.queue = Queue(2)
+    handler.running = False
+    for n in range(5):
+        logger.info("Record %d", n)
+    handler._start()  # noqa: SLF001
+    logger.info("After")
+
+    lines = _lines(handler, stream)
+    assert [line["message"] for line in lines] == ["Record 0", "Record 1", "After"]
+    assert lines[-1]["dropped"] == 3  # noqa: PLR2004
+
+
+def test_rate_limit(logger, handler, stream, monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(logs.time, "monotonic", lambda: now[0])
+    handler.addFilter(logs.RateLimitFilter(rate=2))
+
+    def hot():
+        logger.debug("Hot")
+
+    for _ in range(5):
+        hot()
+    logger.warning("Always")
+    now[0] = 1.0
+    hot()
+
+    lines = _lines(handler, stream)
+    assert [line["message"] for line in lines] == ["Hot", "Hot", "Always", "Hot"]
+    assert lines[-1]["suppressed"] == 3  # noqa: PLR2004
+
+
+def test_settings_logging(settings, capsys):
+    logging.config.dictConfig(settings.LOGGING)
+    (handler,) = logging.getLogger().handlers
+    assert isinstance(handler, logs.QueueStreamHandler)
+    assert isinstance(handler.formatter, logs.JsonFormatter)
+
+    logging.getLogger("yfiles.tests.settings").warning("configured")
+    handler.flush()
+
+    assert json.loads(capsys.readouterr().err)["message"] == "configured"
@@ -0,0 +1,60 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from yfiles.core.paginator import EstimatedCountPaginator
+from yfiles.core.paginator import estimate_count
+from yfiles.users.models import User
+from yfiles.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def _analyzed_users() -> None:
+    UserFactory.create_batch(5)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE users_user")
+
+
+def _count(queryset, threshold: int) -> tuple[int, list[str]]:
+    paginator = EstimatedCountPaginator(queryset, 10)
+    paginator.exact_count_threshold = threshold
+    with CaptureQueriesContext(connection) as queries:
+        count = paginator.count
+    return count, [query["sql"] for query in queries]
+
+
+def test_small_table_counted_exactly():
+    UserFactory.create_batch(3)
+    count, queries = _count(User.objects.order_by("id"), threshold=10_000)
+    assert count == User.objects.count()
+    assert "COUNT(*)" in queries[-1]
+
+
+@pytest.mark.usefixtures("_analyzed_users")
+def test_table_estimated_from_reltuples():
+    count, queries = _count(User.objects.order_by("id"), threshold=1)
+    assert count == estimate_count(User)
+    assert not any("COUNT(" in sql for sql in queries)
+
+
+@pytest.mark.usefixtures("_analyzed_users")
+def test_filtered_queryset_estimated_from_plan():
+    count, queries = _count(
+        User.objects.filter(is_active=True).order_by("id"),
+        threshold=1,
+    )
+    assert count >= 1
+    assert queries[-1].startswith("EXPLAIN")
+
+
+def test_never_analyzed_table_counted_exactly(monkeypatch):
+    monkeypatch.setattr("yfiles.core.paginator.estimate_count", lambda *args: None)
+    UserFactory()
+    count, _ = _count(User.objects.order_by("id"), threshold=1)
+    assert count == User.objects.count()
+
+
+def test_lists_are_counted():
+    assert EstimatedCountPaginator([1, 2, 3], 2).count == 3  # noqa: PLR2004
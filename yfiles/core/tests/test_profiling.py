@@ -0,0 +1,91 @@
+import logging
+
+import pytest
+from asgiref.sync import async_to_sync
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import resolve
+
+from yfiles.core import metrics
+from yfiles.core.profiling import QueryBudgetError
+from yfiles.core.profiling import RequestProfileMiddleware
+from yfiles.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+def view(request):
+    cache.set("present", 1)
+    cache.get("present")
+    cache.get("absent")
+    cache.get_many(["present", "absent"])
+    User.objects.count()
+    User.objects.count()
+    return HttpResponse()
+
+
+async def async_view(request):
+    await sync_to_async(view)(request)
+    return HttpResponse()
+
+
+def _request():
+    request = RequestFactory().get("/users/~redirect/")
+    request.resolver_match = resolve("/users/~redirect/")
+    return request
+
+
+@pytest.fixture
+def _sampled(settings):
+    settings.QUERY_BUDGETS_ENFORCED = False
+    settings.REQUEST_PROFILE_SAMPLE_RATE = 1.0
+
+
+@pytest.mark.usefixtures("_sampled")
+def test_profiles_a_sample(caplog):
+    with caplog.at_level(logging.INFO, logger="yfiles.core.profiling"):
+        RequestProfileMiddleware(view)(_request())
+
+    assert metrics.read("views.users:redirect.requests") == 1
+    assert metrics.read("views.users:redirect.queries") == 2  # noqa: PLR2004
+    assert metrics.read("views.users:redirect.cache_hits") == 2  # noqa: PLR2004
+    assert metrics.read("views.users:redirect.cache_misses") == 2  # noqa: PLR2004
+    assert "users:redirect: 2 queries" in caplog.text
+
+
+@pytest.mark.usefixtures("_sampled")
+def test_profiles_async_views():
+    middleware = RequestProfileMiddleware(async_view)
+    async_to_sync(middleware)(_request())
+
+    assert metrics.read("views.users:redirect.queries") == 2  # noqa: PLR2004
+    assert metrics.read("views.users:redirect.cache_hits") == 2  # noqa: PLR2004
+
+
+def test_skips_unsampled_requests(settings):
+    settings.QUERY_BUDGETS_ENFORCED = False
+    settings.REQUEST_PROFILE_SAMPLE_RATE = 0.0
+
+    RequestProfileMiddleware(view)(_request())
+
+    assert metrics.read("views.users:redirect.requests") == 0
+
+
+@pytest.mark.usefixtures("_sampled")
+def test_logs_sampled_requests_over_budget(settings, caplog):
+    settings.QUERY_BUDGETS = {"users:redirect": 1}
+
+    with caplog.at_level(logging.WARNING, logger="yfiles.core.profiling"):
+        RequestProfileMiddleware(view)(_request())
+
+    assert metrics.read("views.users:redirect.over_budget") == 1
+    assert "ran 2 queries, over its budget of 1" in caplog.text
+
+
+def test_enforced_budget(settings):
+    settings.QUERY_BUDGETS = {"users:redirect": 1}
+
+    with pytest.raises(QueryBudgetError):
+        RequestProfileMiddleware(view)(_request())
@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+
+import pytest
+
+from yfiles.core import tasks
+from yfiles.core.tasks import prune_task_results
+
+
+class FakeRedis:
+    """The few Redis commands the pruning uses, over a dict of ``key -> ttl``."""
+
+    def __init__(self, ttls: dict[bytes, int]):
+        self.ttls = ttls
+        self.replies: list = []
+
+    def scan_iter(self, match: bytes, count: int):
+        return (key for key in list(self.ttls) if key.startswith(match.rstrip(b"*")))
+
+    def pipeline(self, transaction: bool):  # noqa: FBT001
+        return self
+
+    def __enter__(self):
+        self.replies = []
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def ttl(self, key: bytes) -> None:
+        self.replies.append(self.ttls.get(key, -2))
+
+    def expire(self, key: bytes, seconds: int) -> None:
+        self.ttls[key] = seconds
+        self.replies.append(True)
+
+    def execute(self) -> list:
+        return self.replies
+
+
+class FakeBackend:
+    supports_autoexpire = True
+    task_keyprefix = b"celery-task-meta-"
+    expires = 3600
+
+    def __init__(self, client: FakeRedis):
+        self.client = client
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = FakeRedis(
+        {
+            b"celery-task-meta-eternal": -1,
+            b"celery-task-meta-expiring": 60,
+            b"unrelated": -1,
+        },
+    )
+    monkeypatch.setattr(
+        tasks,
+        "current_app",
+        SimpleNamespace(backend=FakeBackend(client)),
+    )
+    return client
+
+
+def test_prune_task_results(client):
+    assert prune_task_results() == 1
+    assert client.ttls == {
+        b"celery-task-meta-eternal": 3600,
+        b"celery-task-meta-expiring": 60,
+        b"unrelated": -1,
+    }
+    assert prune_task_results() == 0
+
+
+def test_prune_task_results_without_expiry(client):
+    tasks.current_app.backend.expires = None
+    assert prune_task_results() == 0
+    assert client.ttls[b"celery-task-meta-eternal"] == -1
@@ -0,0 +1,51 @@
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import CommandError
+from django.core.management import call_command
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+
+from yfiles.core.templating import compile_templates
+from yfiles.core.templating import template_files
+
+
+def test_project_templates_override_third_party():
+    backend = engines["django"]
+    assert isinstance(backend, DjangoTemplates)
+    files = template_files(backend)
+    assert files["base.html"] == settings.APPS_DIR / "templates" / "base.html"
+    assert (
+        files["account/base_manage_password.html"]
+        == settings.APPS_DIR / "templates" / "account" / "base_manage_password.html"
+    )
+
+
+def test_compile_templates():
+    result = compile_templates()
+    assert result.compiled > 0
+    assert not [
+        path for path in result.errors if path.is_relative_to(settings.APPS_DIR)
+    ]
+
+
+def test_compile_templates_command():
+    out = StringIO()
+    call_command("compile_templates", stdout=out)
+    assert out.getvalue().startswith("Compiled ")
+
+
+def test_compile_templates_command_fails_on_project_template(settings, tmp_path):
+    (tmp_path / "broken.html").write_text("{% if %}")
+    settings.APPS_DIR = tmp_path
+    settings.TEMPLATES = [
+        {
+            **settings.TEMPLATES[0],
+            "DIRS": [str(tmp_path), *settings.TEMPLATES[0]["DIRS"]],
+        },
+    ]
+    err = StringIO()
+    with pytest.raises(CommandError, match="1 project template"):
+        call_command("compile_templates", stderr=err)
+    assert "broken.html" in err.getvalue()
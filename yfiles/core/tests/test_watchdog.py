@@ -0,0 +1,63 @@
+import logging
+
+import pytest
+from billiard.pool import EX_RECYCLE
+
+from yfiles.core import metrics
+from yfiles.core import watchdog
+from yfiles.users.tasks import get_users_count
+
+
+@pytest.fixture
+def rss(monkeypatch):
+    """Pretend the child's peak RSS is ``rss["kb"]``."""
+    value = {"kb": 100_000}
+    monkeypatch.setattr(watchdog, "mem_rss", lambda: value["kb"])
+    watchdog.child.reset()
+    return value
+
+
+@pytest.mark.django_db
+def test_samples_after_every_task(rss):
+    get_users_count.apply()
+    rss["kb"] = 120_000
+    get_users_count.apply()
+
+    assert watchdog.child.tasks == 2  # noqa: PLR2004
+    assert watchdog.child.first_rss_kb == 100_000  # noqa: PLR2004
+    assert watchdog.child.rss_kb == 120_000  # noqa: PLR2004
+
+
+def test_records_memory_recycle(settings, rss, caplog):
+    settings.CELERY_WORKER_MAX_MEMORY_PER_CHILD = 200_000
+    watchdog.child.sample()
+    rss["kb"] = 250_000
+    watchdog.child.sample()
+
+    with caplog.at_level(logging.WARNING):
+        watchdog.record_exit(EX_RECYCLE)
+
+    assert metrics.read("worker.recycled.memory") == 1
+    assert metrics.read("worker.recycled.tasks") == 0
+    assert "after 2 tasks (memory)" in caplog.text
+    assert "+150000 kB" in caplog.text
+
+
+def test_records_task_count_recycle(settings, rss):
+    settings.CELERY_WORKER_MAX_MEMORY_PER_CHILD = 200_000
+    watchdog.record_exit(EX_RECYCLE)
+    assert metrics.read("worker.recycled.tasks") == 1
+
+
+def test_ignores_other_exits(rss):
+    watchdog.record_exit(0)
+    watchdog.record_exit(None)
+    assert metrics.read("worker.recycled.memory") == 0
+    assert metrics.read("worker.recycled.tasks") == 0
+
+
+def test_metrics():
+    metrics.increment("things")
+    metrics.increment("things", 2)
+    assert metrics.read("things") == 3  # noqa: PLR2004
+    assert metrics.read("other.things") == 0
@@ -0,0 +1,65 @@
+"""
+Memory watchdog for prefork worker children.
+
+Long downloads fragment the heap of a child: freed blocks stay mapped and its
+resident size creeps up chunk after chunk. Billiard replaces a child once its
+peak RSS crosses ``CELERY_WORKER_MAX_MEMORY_PER_CHILD`` or it has run
+``CELERY_WORKER_MAX_TASKS_PER_CHILD`` tasks, and it does so gracefully: only
+after the task in hand, so between two chunks. The watchdog samples the RSS
+after every task and records every recycle, with its reason, as a metric.
+"""
+
+import dataclasses
+import logging
+
+from billiard.compat import mem_rss
+from billiard.pool import EX_RECYCLE
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class ChildMemory:
+    """RSS of the current child, in kB of peak RSS as billiard measures it."""
+
+    tasks: int = 0
+    first_rss_kb: int = 0
+    rss_kb: int = 0
+
+    def reset(self) -> None:
+        self.tasks = self.first_rss_kb = self.rss_kb = 0
+
+    def sample(self) -> None:
+        self.tasks += 1
+        self.rss_kb = mem_rss()
+        if self.tasks == 1:
+            self.first_rss_kb = self.rss_kb
+
+
+child = ChildMemory()
+
+
+def recycle_reason(exitcode: int | None, rss_kb: int) -> str | None:
+    """Why billiard retired a child that exited with ``exitcode``, if it did."""
+    if exitcode != EX_RECYCLE:
+        return None
+    limit = settings.CELERY_WORKER_MAX_MEMORY_PER_CHILD
+    return "memory" if limit and rss_kb > limit else "tasks"
+
+
+def record_exit(exitcode: int | None) -> None:
+    reason = recycle_reason(exitcode, mem_rss())
+    if reason is None:
+        return
+    metrics.increment(f"worker.recycled.{reason}")
+    logger.warning(
+        "Recycling worker child after %d tasks (%s): peak RSS %d kB, "
+        "%+d kB since its first task",
+        child.tasks,
+        reason,
+        child.rss_kb,
+        child.rss_kb - child.first_rss_kb,
+    )
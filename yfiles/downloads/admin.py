@@ -0,0 +1,113 @@
+from django.contrib import admin
+from django.contrib import messages
+from django.utils.translation import gettext_lazy as _
+from django.utils.translation import ngettext
+
+from yfiles.core.admin import LargeTableAdminMixin
+
+from .models import DownloadedFile
+from .models import DownloadJob
+from .models import FailedChunk
+from .tasks import cancel_jobs
+from .tasks import replay_failed_chunks
+from .tasks import requeue_jobs
+
+
+@admin.register(DownloadJob)
+class DownloadJobAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ["id", "public_url", "user", "status", "done_files", "total_files"]
+    list_filter = ["status"]
+    list_select_related = ["user"]
+    list_only = [
+        "public_url",
+        "user__email",
+        "status",
+        "done_files",
+        "total_files",
+    ]
+    # "^user__email" is served by the email prefix index of users.
+    search_fields = ["=id", "^user__email"]
+    raw_id_fields = ["user"]
+    readonly_fields = [
+        "status",
+        "total_files",
+        "done_files",
+        "total_bytes",
+        "done_bytes",
+        "error",
+        "created",
+        "modified",
+    ]
+    ordering = ["-id"]
+    actions = ["cancel", "requeue"]
+
+    @admin.action(description=_("Cancel selected jobs"))
+    def cancel(self, request, queryset):
+        count = cancel_jobs(queryset)
+        self.message_user(
+            request,
+            ngettext("%d job cancelled.", "%d jobs cancelled.", count) % count,
+            messages.SUCCESS,
+        )
+
+    @admin.action(description=_("Requeue failed or cancelled jobs"))
+    def requeue(self, request, queryset):
+        count = requeue_jobs(queryset)
+        self.message_user(
+            request,
+            ngettext("%d job requeued.", "%d jobs requeued.", count) % count,
+            messages.SUCCESS,
+        )
+
+
+@admin.register(DownloadedFile)
+class DownloadedFileAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ["id", "path", "job", "size", "status"]
+    list_filter = ["status"]
+    list_select_related = ["job"]
+    list_only = ["path", "job__public_url", "size", "status"]
+    # Served by the path trigram index.
+    search_fields = ["path"]
+    raw_id_fields = ["job"]
+    ordering = ["-id"]
+
+
+@admin.register(FailedChunk)
+class FailedChunkAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ["id", "file", "job", "offset", "length", "reason", "retries"]
+    list_filter = ["reason"]
+    list_select_related = ["file", "job"]
+    list_only = [
+        "file__path",
+        "job__public_url",
+        "offset",
+        "length",
+        "reason",
+        "retries",
+    ]
+    search_fields = ["=job__id", "=file__id"]
+    raw_id_fields = ["job", "file"]
+    readonly_fields = [
+        "job",
+        "file",
+        "offset",
+        "length",
+        "reason",
+        "error",
+        "retries",
+        "created",
+    ]
+    ordering = ["-id"]
+    actions = ["replay"]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description=_("Replay the files of selected chunks"))
+    def replay(self, request, queryset):
+        count = replay_failed_chunks(queryset)
+        self.message_user(
+            request,
+            ngettext("%d file replayed.", "%d files replayed.", count) % count,
+            messages.SUCCESS,
+        )
@@ -0,0 +1,54 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from yfiles.downloads import manifest
+from yfiles.downloads.models import DownloadJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the manifest of a download job (path, size, hashes and status of "
+        "each file) as JSON lines or CSV, reading its files a batch at a time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("job_id", type=int)
+        parser.add_argument(
+            "--format",
+            choices=sorted(manifest.CONTENT_TYPES),
+            default="jsonl",
+        )
+        parser.add_argument(
+            "--since",
+            help="Only the files listed or changed status since this ISO 8601 time.",
+        )
+        parser.add_argument(
+            "--output",
+            type=Path,
+            help="File to write instead of standard output.",
+        )
+
+    def handle(self, *args, **options):
+        job_id = options["job_id"]
+        if not DownloadJob.objects.filter(pk=job_id).exists():
+            msg = f"Download job {job_id} does not exist."
+            raise CommandError(msg)
+        since = None
+        if options["since"]:
+            try:
+                since = manifest.parse_since(options["since"])
+            except ValueError as exc:
+                raise CommandError(exc) from exc
+
+        if options["output"] is None:
+            # Lines end as the format has it.
+            self.stdout.ending = ""
+            manifest.write(self.stdout, job_id, options["format"], since)
+            return
+        with options["output"].open("w", newline="") as output:
+            count = manifest.write(output, job_id, options["format"], since)
+        self.stderr.write(
+            self.style.SUCCESS(f"Wrote {count} files to {options['output']}."),
+        )
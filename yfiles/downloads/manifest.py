@@ -0,0 +1,120 @@
+"""
+Manifests of the files of a job, as JSON lines or CSV, written as they are read.
+
+A job may hold hundreds of thousands of files, so a manifest is never built in
+memory: rows are read in keyset batches of ``BATCH_SIZE`` by primary key, and
+each batch is encoded and handed on before the next one is read. Server-side
+cursors (``iterator()``) would stream too, but production turns them off for
+PgBouncer, and without them psycopg fetches the whole result at once.
+
+``since`` limits a manifest to the files listed or changed status since then.
+To export deltas, pass the time the previous export started; files changed
+while it ran come again in the next one.
+"""
+
+import csv
+import datetime
+import io
+import json
+from collections.abc import AsyncIterator
+from collections.abc import Iterator
+
+from django.db.models import QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import DownloadedFile
+
+FIELDS = ("path", "size", "md5", "sha256", "status", "changed")
+CONTENT_TYPES = {
+    "jsonl": "application/x-ndjson",
+    "csv": "text/csv",
+}
+BATCH_SIZE = 2000
+
+
+def parse_since(value: str) -> datetime.datetime:
+    """An ISO 8601 time, in UTC unless it says otherwise; raises ValueError."""
+    since = parse_datetime(value)
+    if since is None:
+        msg = f"Not an ISO 8601 date and time: {value!r}"
+        raise ValueError(msg)
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since, datetime.UTC)
+    return since
+
+
+def _files(job_id: int, since: datetime.datetime | None) -> QuerySet:
+    files = DownloadedFile.objects.filter(job_id=job_id)
+    if since is not None:
+        files = files.filter(changed__gte=since)
+    return files.order_by("pk").values_list("pk", *FIELDS)
+
+
+def batches(job_id: int, since: datetime.datetime | None = None) -> Iterator[list]:
+    """The rows of ``FIELDS`` of a job's files, ``BATCH_SIZE`` at a time."""
+    files = _files(job_id, since)
+    last = 0
+    while batch := list(files.filter(pk__gt=last)[:BATCH_SIZE]):
+        yield [row[1:] for row in batch]
+        if len(batch) < BATCH_SIZE:
+            break
+        last = batch[-1][0]
+
+
+async def abatches(
+    job_id: int,
+    since: datetime.datetime | None = None,
+) -> AsyncIterator[list]:
+    files = _files(job_id, since)
+    last = 0
+    while batch := [row async for row in files.filter(pk__gt=last)[:BATCH_SIZE]]:
+        yield [row[1:] for row in batch]
+        if len(batch) < BATCH_SIZE:
+            break
+        last = batch[-1][0]
+
+
+def header(fmt: str) -> str:
+    if fmt == "csv":
+        return ",".join(FIELDS) + "\r\n"
+    return ""
+
+
+def encode(rows: list, fmt: str) -> str:
+    """Rows of ``FIELDS`` as lines of ``fmt``, "jsonl" or "csv"."""
+    rows = [(*row[:-1], row[-1].isoformat()) for row in rows]
+    if fmt == "csv":
+        output = io.StringIO()
+        csv.writer(output).writerows(rows)
+        return output.getvalue()
+    return "".join(
+        json.dumps(dict(zip(FIELDS, row, strict=True))) + "\n" for row in rows
+    )
+
+
+def write(
+    output: io.TextIOBase,
+    job_id: int,
+    fmt: str,
+    since: datetime.datetime | None = None,
+) -> int:
+    """Write the manifest of a job to ``output``; returns the number of files."""
+    output.write(header(fmt))
+    count = 0
+    for batch in batches(job_id, since):
+        output.write(encode(batch, fmt))
+        count += len(batch)
+    return count
+
+
+async def stream(
+    job_id: int,
+    fmt: str,
+    since: datetime.datetime | None = None,
+) -> AsyncIterator[str]:
+    """The manifest of a job, a batch of lines at a time."""
+    if text := header(fmt):
+        yield text
+    async for batch in abatches(job_id, since):
+        yield encode(batch, fmt)
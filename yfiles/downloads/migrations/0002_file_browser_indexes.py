@@ -0,0 +1,49 @@
+import django.utils.timezone
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("downloads", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="downloadedfile",
+            name="modified",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now,
+                verbose_name="Modified",
+            ),
+            preserve_default=False,
+        ),
+        migrations.RemoveConstraint(
+            model_name="downloadedfile",
+            name="downloads_file_job_path",
+        ),
+        migrations.AddConstraint(
+            model_name="downloadedfile",
+            constraint=models.UniqueConstraint(
+                fields=("job", "path"),
+                include=("id", "size", "modified", "status"),
+                name="downloads_file_job_path",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="downloadedfile",
+            index=models.Index(
+                fields=["job", "size", "path"],
+                include=["id", "modified", "status"],
+                name="downloads_file_job_size",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="downloadedfile",
+            index=models.Index(
+                fields=["job", "modified", "path"],
+                include=["id", "size", "status"],
+                name="downloads_file_job_modified",
+            ),
+        ),
+    ]
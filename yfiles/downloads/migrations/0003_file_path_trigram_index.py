@@ -0,0 +1,28 @@
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # The files table is large: build the index without locking out writers.
+    atomic = False
+
+    dependencies = [
+        ("downloads", "0002_file_browser_indexes"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name="downloadedfile",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("path"),
+                    name="gin_trgm_ops",
+                ),
+                name="downloads_file_path_trgm",
+            ),
+        ),
+    ]
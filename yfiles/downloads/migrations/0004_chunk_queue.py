@@ -0,0 +1,32 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    # The files table is large: build the index without locking out writers.
+    atomic = False
+
+    dependencies = [
+        ("downloads", "0003_file_path_trigram_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="downloadjob",
+            name="queue_cursor",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="downloadjob",
+            name="queued_bytes",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        AddIndexConcurrently(
+            model_name="downloadedfile",
+            index=models.Index(
+                fields=["job", "id"],
+                name="downloads_file_job_id",
+            ),
+        ),
+    ]
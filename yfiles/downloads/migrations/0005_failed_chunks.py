@@ -0,0 +1,72 @@
+import django.db.models.deletion
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("downloads", "0004_chunk_queue"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="downloadjob",
+            name="failed_bytes",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="FailedChunk",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("offset", models.PositiveBigIntegerField(verbose_name="Offset")),
+                ("length", models.PositiveBigIntegerField(verbose_name="Length")),
+                (
+                    "reason",
+                    models.CharField(
+                        choices=[
+                            ("not_found", "Gone from the public resource"),
+                            ("checksum", "Checksum mismatch"),
+                            ("time_limit", "Time limit exceeded"),
+                            ("retries", "Retries exhausted"),
+                        ],
+                        max_length=16,
+                        verbose_name="Reason",
+                    ),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="Error")),
+                (
+                    "retries",
+                    models.PositiveIntegerField(default=0, verbose_name="Retries"),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                (
+                    "file",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="failed_chunks",
+                        to="downloads.downloadedfile",
+                    ),
+                ),
+                (
+                    "job",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="failed_chunks",
+                        to="downloads.downloadjob",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "failed chunk",
+                "verbose_name_plural": "failed chunks",
+            },
+        ),
+    ]
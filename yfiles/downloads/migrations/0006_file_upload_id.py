@@ -0,0 +1,16 @@
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("downloads", "0005_failed_chunks"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="downloadedfile",
+            name="upload_id",
+            field=models.CharField(blank=True, max_length=1024),
+        ),
+    ]
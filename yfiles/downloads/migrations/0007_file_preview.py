@@ -0,0 +1,16 @@
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("downloads", "0006_file_upload_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="downloadedfile",
+            name="preview",
+            field=models.CharField(blank=True, max_length=100),
+        ),
+    ]
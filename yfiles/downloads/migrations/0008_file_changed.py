@@ -0,0 +1,20 @@
+import django.db.models.functions.datetime
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("downloads", "0007_file_preview"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="downloadedfile",
+            name="changed",
+            field=models.DateTimeField(
+                db_default=django.db.models.functions.datetime.Now(),
+                verbose_name="Changed",
+            ),
+        ),
+    ]
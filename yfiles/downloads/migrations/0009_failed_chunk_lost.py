@@ -0,0 +1,26 @@
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("downloads", "0008_file_changed"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="failedchunk",
+            name="reason",
+            field=models.CharField(
+                choices=[
+                    ("not_found", "Gone from the public resource"),
+                    ("checksum", "Checksum mismatch"),
+                    ("time_limit", "Time limit exceeded"),
+                    ("retries", "Retries exhausted"),
+                    ("lost", "Fetched bytes lost"),
+                ],
+                max_length=16,
+                verbose_name="Reason",
+            ),
+        ),
+    ]
@@ -0,0 +1,81 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.contrib.postgres.operations import RemoveIndexConcurrently
+from django.db import migrations
+from django.db import models
+
+# Django builds the unique constraint as a unique index. Build the new one
+# alongside it, so uniqueness holds throughout, then drop the old one and take
+# its name.
+CREATE_INDEX = """
+CREATE UNIQUE INDEX CONCURRENTLY downloads_file_job_path_new
+    ON downloads_downloadedfile (job_id, path) INCLUDE ({include})
+"""
+DROP_INDEX = "DROP INDEX CONCURRENTLY downloads_file_job_path"
+RENAME_INDEX = (
+    "ALTER INDEX downloads_file_job_path_new RENAME TO downloads_file_job_path"
+)
+
+
+class Migration(migrations.Migration):
+    # The files table is large: build the indexes without locking out writers.
+    atomic = False
+
+    dependencies = [
+        ("downloads", "0009_failed_chunk_lost"),
+    ]
+
+    operations = [
+        RemoveIndexConcurrently(
+            model_name="downloadedfile",
+            name="downloads_file_job_size",
+        ),
+        AddIndexConcurrently(
+            model_name="downloadedfile",
+            index=models.Index(
+                fields=["job", "size", "path"],
+                include=["id", "modified", "status", "preview"],
+                name="downloads_file_job_size",
+            ),
+        ),
+        RemoveIndexConcurrently(
+            model_name="downloadedfile",
+            name="downloads_file_job_modified",
+        ),
+        AddIndexConcurrently(
+            model_name="downloadedfile",
+            index=models.Index(
+                fields=["job", "modified", "path"],
+                include=["id", "size", "status", "preview"],
+                name="downloads_file_job_modified",
+            ),
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    CREATE_INDEX.format(include="id, size, modified, status, preview"),
+                    reverse_sql=RENAME_INDEX,
+                ),
+                migrations.RunSQL(DROP_INDEX, reverse_sql=DROP_INDEX),
+                migrations.RunSQL(
+                    RENAME_INDEX,
+                    reverse_sql=CREATE_INDEX.format(
+                        include="id, size, modified, status",
+                    ),
+                ),
+            ],
+            state_operations=[
+                migrations.RemoveConstraint(
+                    model_name="downloadedfile",
+                    name="downloads_file_job_path",
+                ),
+                migrations.AddConstraint(
+                    model_name="downloadedfile",
+                    constraint=models.UniqueConstraint(
+                        fields=("job", "path"),
+                        include=("id", "size", "modified", "status", "preview"),
+                        name="downloads_file_job_path",
+                    ),
+                ),
+            ],
+        ),
+    ]
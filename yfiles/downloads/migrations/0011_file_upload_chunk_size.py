@@ -0,0 +1,16 @@
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("downloads", "0010_file_browser_index_preview"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="downloadedfile",
+            name="upload_chunk_size",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("downloads", "0011_file_upload_chunk_size"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="failedchunk",
+            name="reason",
+            field=models.CharField(
+                choices=[
+                    ("not_found", "Gone from the public resource"),
+                    ("checksum", "Checksum mismatch"),
+                    ("time_limit", "Time limit exceeded"),
+                    ("retries", "Retries exhausted"),
+                    ("lost", "Fetched bytes lost"),
+                    ("unsafe_path", "Path outside the job"),
+                ],
+                max_length=16,
+                verbose_name="Reason",
+            ),
+        ),
+    ]
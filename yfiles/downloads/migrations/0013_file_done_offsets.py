@@ -0,0 +1,22 @@
+import django.contrib.postgres.fields
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("downloads", "0012_failed_chunk_unsafe_path"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="downloadedfile",
+            name="done_offsets",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.PositiveBigIntegerField(),
+                blank=True,
+                default=list,
+                size=None,
+            ),
+        ),
+    ]
@@ -0,0 +1,229 @@
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.indexes import OpClass
+from django.core.files.storage import storages
+from django.db.models import CASCADE
+from django.db.models import CharField
+from django.db.models import DateTimeField
+from django.db.models import ForeignKey
+from django.db.models import Index
+from django.db.models import Model
+from django.db.models import PositiveBigIntegerField
+from django.db.models import PositiveIntegerField
+from django.db.models import TextChoices
+from django.db.models import TextField
+from django.db.models import UniqueConstraint
+from django.db.models import URLField
+from django.db.models.functions import Now
+from django.db.models.functions import Upper
+from django.utils._os import safe_join
+from django.utils.translation import gettext_lazy as _
+
+# Paths of the files that get previews (yfiles.downloads.previews).
+IMAGE_PATTERN = r"\.(jpe?g|png|gif|webp|bmp|tiff?)$"
+
+
+class DownloadJob(Model):
+    """A public Yandex Disk folder (or file) being loaded for a user."""
+
+    class Status(TextChoices):
+        PENDING = "pending", _("Pending")
+        RUNNING = "running", _("Running")
+        DONE = "done", _("Done")
+        FAILED = "failed", _("Failed")
+        CANCELLED = "cancelled", _("Cancelled")
+
+    FINISHED = frozenset({Status.DONE, Status.FAILED, Status.CANCELLED})
+
+    user = ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=CASCADE,
+        related_name="download_jobs",
+    )
+    public_url = URLField(_("Public link"), max_length=2048)
+    status = CharField(
+        _("Status"),
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    total_files = PositiveIntegerField(default=0)
+    done_files = PositiveIntegerField(default=0)
+    total_bytes = PositiveBigIntegerField(default=0)
+    done_bytes = PositiveBigIntegerField(default=0)
+    # Chunks are queued as workers drain them: the bytes queued so far and the
+    # primary key of the last file whose chunks are queued.
+    queued_bytes = PositiveBigIntegerField(default=0)
+    queue_cursor = PositiveBigIntegerField(default=0)
+    # Bytes of failed files that were never fetched: no longer outstanding.
+    failed_bytes = PositiveBigIntegerField(default=0)
+    error = TextField(blank=True)
+    created = DateTimeField(auto_now_add=True)
+    modified = DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("download job")
+        verbose_name_plural = _("download jobs")
+
+    def __str__(self) -> str:
+        return self.public_url
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in self.FINISHED
+
+    @property
+    def local_root(self) -> Path:
+        """Directory the files of this job are written to."""
+        return Path(settings.MEDIA_ROOT) / "downloads" / str(self.pk)
+
+    def progress(self) -> dict:
+        """Snapshot of the job state as published to progress subscribers."""
+        return {
+            "id": self.pk,
+            "status": self.status,
+            "total_files": self.total_files,
+            "done_files": self.done_files,
+            "total_bytes": self.total_bytes,
+            "done_bytes": self.done_bytes,
+            "revision": f"{self.status}:{self.done_files}:{self.done_bytes}",
+        }
+
+
+class DownloadedFile(Model):
+    """A single file of a :class:`DownloadJob`."""
+
+    class Status(TextChoices):
+        PENDING = "pending", _("Pending")
+        DONE = "done", _("Done")
+        FAILED = "failed", _("Failed")
+
+    job = ForeignKey(DownloadJob, on_delete=CASCADE, related_name="files")
+    # Path inside the public resource, as reported by Yandex Disk: "/dir/name.ext".
+    path = TextField(_("Path"))
+    size = PositiveBigIntegerField(_("Size"), default=0)
+    modified = DateTimeField(_("Modified"))
+    md5 = CharField(max_length=32, blank=True)
+    sha256 = CharField(max_length=64, blank=True)
+    status = CharField(
+        _("Status"),
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    done_bytes = PositiveBigIntegerField(default=0)
+    # Offsets of the chunks counted in done_bytes, until the file is settled: a
+    # chunk delivered twice, or left queued from before a replay, counts once.
+    done_offsets = ArrayField(PositiveBigIntegerField(), default=list, blank=True)
+    # Multipart upload the chunks go to, when the storage takes parts, and the
+    # chunk size it was started with, which maps chunk offsets to part numbers.
+    upload_id = CharField(max_length=1024, blank=True)
+    upload_chunk_size = PositiveBigIntegerField(default=0)
+    # Name of the preview in the default storage, once one is made of an image.
+    preview = CharField(max_length=100, blank=True)
+    # When the file was listed or last changed status; manifests can be
+    # limited to the files changed since a given time.
+    changed = DateTimeField(_("Changed"), db_default=Now())
+
+    class Meta:
+        verbose_name = _("downloaded file")
+        verbose_name_plural = _("downloaded files")
+        # The file browser pages through a job with keysets over these indexes.
+        # INCLUDE carries every column it renders, so pages are index-only scans.
+        constraints = [
+            UniqueConstraint(
+                fields=["job", "path"],
+                include=["id", "size", "modified", "status", "preview"],
+                name="downloads_file_job_path",
+            ),
+        ]
+        indexes = [
+            Index(
+                fields=["job", "size", "path"],
+                include=["id", "modified", "status", "preview"],
+                name="downloads_file_job_size",
+            ),
+            Index(
+                fields=["job", "modified", "path"],
+                include=["id", "size", "status", "preview"],
+                name="downloads_file_job_modified",
+            ),
+            # Chunks are queued from a job's files in primary key order.
+            Index(fields=["job", "id"], name="downloads_file_job_id"),
+            # Serves ``path__icontains``, which Postgres runs as UPPER(path) LIKE.
+            GinIndex(
+                OpClass(Upper("path"), name="gin_trgm_ops"),
+                name="downloads_file_path_trgm",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return self.path
+
+    @property
+    def is_image(self) -> bool:
+        return re.search(IMAGE_PATTERN, self.path, re.IGNORECASE) is not None
+
+    @property
+    def preview_url(self) -> str:
+        """URL of the preview in the default storage; empty until one is made."""
+        return storages["default"].url(self.preview) if self.preview else ""
+
+    @property
+    def local_path(self) -> Path:
+        """
+        Where the file is written on disk.
+
+        Raises SuspiciousFileOperation if the upstream path escapes the job root.
+        """
+        return Path(safe_join(self.job.local_root, self.path.lstrip("/")))
+
+    @property
+    def storage_name(self) -> str:
+        """
+        Name of the file in the default storage.
+
+        Raises SuspiciousFileOperation if the upstream path escapes the job root.
+        """
+        root = f"/downloads/{self.job_id}"
+        return safe_join(root, self.path.lstrip("/")).removeprefix("/")
+
+
+class FailedChunk(Model):
+    """
+    A chunk that failed for good, kept with its reason until it is replayed.
+
+    Its file is failed along with it; replaying fetches the whole file again.
+    """
+
+    class Reason(TextChoices):
+        NOT_FOUND = "not_found", _("Gone from the public resource")
+        CHECKSUM = "checksum", _("Checksum mismatch")
+        TIME_LIMIT = "time_limit", _("Time limit exceeded")
+        RETRIES = "retries", _("Retries exhausted")
+        LOST = "lost", _("Fetched bytes lost")
+        UNSAFE_PATH = "unsafe_path", _("Path outside the job")
+
+    job = ForeignKey(DownloadJob, on_delete=CASCADE, related_name="failed_chunks")
+    file = ForeignKey(
+        DownloadedFile,
+        on_delete=CASCADE,
+        related_name="failed_chunks",
+    )
+    offset = PositiveBigIntegerField(_("Offset"))
+    length = PositiveBigIntegerField(_("Length"))
+    reason = CharField(_("Reason"), max_length=16, choices=Reason.choices)
+    error = TextField(_("Error"), blank=True)
+    retries = PositiveIntegerField(_("Retries"), default=0)
+    created = DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("failed chunk")
+        verbose_name_plural = _("failed chunks")
+
+    def __str__(self) -> str:
+        return f"{self.file_id}@{self.offset}"
@@ -0,0 +1,111 @@
+"""
+Previews of the images among downloaded files.
+
+When a job finishes, ``tasks.queue_previews`` sends its images to
+``tasks.make_previews`` in batches on the ``downloads-previews`` queue, many
+small images to a task. Rendering is CPU bound: the processes of the prefork
+pool that takes the queue render batches side by side, and chunk workers are
+not held up behind them.
+
+Previews are content addressed: each is stored in the default storage under
+the sha256 of its source, so an image loaded twice, by any user, is rendered
+once. Their URLs are cached as immutable, so the name also holds the preview
+size and ``VERSION``: a preview rendered differently gets a new name rather
+than a stale cached copy.
+"""
+
+import hashlib
+import io
+from collections.abc import Iterable
+from collections.abc import Iterator
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from PIL import Image
+from PIL import ImageOps
+
+from yfiles.core.dispatch import sized_batches
+
+from .models import DownloadedFile
+
+# A large JPEG is decoded straight at 1/2, 1/4 or 1/8 of its size (draft), then
+# shrunk by a whole factor (reduce), and only the last step of at most this
+# factor is resampled properly. None resamples all of the full-size image.
+REDUCING_GAP: float | None = 2.0
+QUALITY = 80
+# Bump when previews of the same size come out differently (format, quality).
+VERSION = 1
+
+
+class PreviewError(Exception):
+    """The file is not an image that can be read."""
+
+
+def preview_name(digest: str, size: int) -> str:
+    return f"previews/v{VERSION}/{size}/{digest[:2]}/{digest}.jpg"
+
+
+def render(data: bytes, size: int) -> bytes:
+    """JPEG of the image in ``data``, fit in a square of ``size`` pixels."""
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.thumbnail((size, size), reducing_gap=REDUCING_GAP)
+            ImageOps.exif_transpose(image, in_place=True)
+            preview = _flatten(image)
+    except (Image.DecompressionBombError, OSError, ValueError) as exc:
+        # UnidentifiedImageError and truncated files are OSErrors.
+        raise PreviewError(exc) from exc
+    output = io.BytesIO()
+    preview.save(output, "JPEG", quality=QUALITY, optimize=True)
+    return output.getvalue()
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    """A new RGB image of ``image``, with transparent parts turned white."""
+    if image.mode not in ("RGBA", "LA", "P"):
+        return image.convert("RGB")
+    rgba = image.convert("RGBA")
+    flat = Image.new("RGB", rgba.size, "white")
+    flat.paste(rgba, mask=rgba.getchannel("A"))
+    return flat
+
+
+def make_preview(file: DownloadedFile) -> str:
+    """
+    Name of the preview of ``file``, rendered unless one of the same content is.
+
+    Raises PreviewError if the file is not a readable image.
+    """
+    store = storages["default"]
+    size = settings.DOWNLOADS_PREVIEW_SIZE
+    if file.sha256 and store.exists(name := preview_name(file.sha256, size)):
+        return name
+    try:
+        with store.open(file.storage_name) as source:
+            data = source.read()
+    except FileNotFoundError as exc:
+        raise PreviewError(exc) from exc
+    name = preview_name(hashlib.sha256(data).hexdigest(), size)
+    if store.exists(name):
+        return name
+    preview = render(data, size)
+    return store.save(name, ContentFile(preview))
+
+
+def batch_previews(images: Iterable[tuple[int, int]]) -> Iterator[list[int]]:
+    """
+    Pack ``(file_id, size)`` pairs into task-sized batches of file ids.
+
+    A batch holds at most ``DOWNLOADS_PREVIEWS_PER_TASK`` images and, unless it
+    is a single image, at most ``DOWNLOADS_PREVIEW_BYTES_PER_TASK`` bytes.
+    """
+    batches = sized_batches(
+        images,
+        itemgetter(1),
+        settings.DOWNLOADS_PREVIEWS_PER_TASK,
+        settings.DOWNLOADS_PREVIEW_BYTES_PER_TASK,
+    )
+    for batch in batches:
+        yield [file_id for file_id, _ in batch]
@@ -0,0 +1,127 @@
+"""
+Job progress fan-out over Redis pub/sub.
+
+Workers publish a JSON snapshot on a per-job channel. Every web process keeps a
+single pattern subscription and hands the messages to in-process queues, so the
+number of Redis connections does not grow with the number of streaming clients.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from typing import NamedTuple
+
+import redis
+import redis.asyncio
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "yfiles:downloads:progress:"
+# Snapshots are cumulative, so a slow client only ever needs the latest few.
+QUEUE_SIZE = 16
+
+_publisher: redis.Redis | None = None
+
+
+class ProgressEvent(NamedTuple):
+    data: dict
+    # Encoded once in the listener and shared by every subscriber.
+    sse: str
+
+
+def channel(job_id: int) -> str:
+    return f"{CHANNEL_PREFIX}{job_id}"
+
+
+def encode_sse(payload: dict) -> str:
+    return f"data: {json.dumps(payload, separators=(',', ':'))}\n\n"
+
+
+def get_publisher() -> redis.Redis:
+    global _publisher  # noqa: PLW0603
+    if _publisher is None:
+        _publisher = redis.Redis.from_url(settings.REDIS_URL)
+    return _publisher
+
+
+def publish(job_id: int, payload: dict) -> None:
+    """Send a progress snapshot to everyone watching the job."""
+    get_publisher().publish(channel(job_id), json.dumps(payload))
+
+
+class ProgressHub:
+    """Per-process registry of progress subscribers fed by one Redis listener."""
+
+    def __init__(self) -> None:
+        self._subscribers: defaultdict[int, set[asyncio.Queue]] = defaultdict(set)
+        self._listener: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self, job_id: int) -> AsyncIterator[asyncio.Queue]:
+        """
+        Receive the progress events of a job until the block exits.
+
+        The queue yields :class:`ProgressEvent` items, or ``None`` once the
+        connection to Redis is lost and the stream should end.
+        """
+        self._bind_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self._subscribers[job_id].add(queue)
+        self._ensure_listener()
+        try:
+            yield queue
+        finally:
+            queues = self._subscribers.get(job_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[job_id]
+
+    def dispatch(self, job_id: int, event: ProgressEvent | None) -> None:
+        for queue in self._subscribers.get(job_id, ()):
+            if queue.full():
+                # Drop the oldest snapshot, the new one supersedes it.
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Tasks and queues are bound to the loop that created them.
+            self._loop = loop
+            self._listener = None
+            self._subscribers.clear()
+
+    def _ensure_listener(self) -> None:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def _listen(self) -> None:
+        client = redis.asyncio.Redis.from_url(settings.REDIS_URL)
+        try:
+            async with client.pubsub() as pubsub:
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    job_id = int(message["channel"][len(CHANNEL_PREFIX) :])
+                    data = json.loads(message["data"])
+                    self.dispatch(job_id, ProgressEvent(data, encode_sse(data)))
+        except Exception:
+            logger.exception("Progress listener lost its Redis subscription")
+            for job_id in list(self._subscribers):
+                self.dispatch(job_id, None)
+        finally:
+            await client.aclose()
+
+
+hub = ProgressHub()
@@ -0,0 +1,70 @@
+"""
+Filename search over every file a user has loaded.
+
+Matches are plain case-insensitive substrings of the path, found through the
+``pg_trgm`` GIN index on ``UPPER(path)`` rather than a sequential scan, and the
+best few are ranked by how closely a word of the path resembles the query.
+
+Results are cached per user. Loading new files bumps the user's search
+version, which retires every cached result at once.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.core.cache import cache
+
+from .models import DownloadedFile
+
+# Shorter queries have no trigram to look up and would scan the whole table.
+MIN_QUERY_LENGTH = 3
+MAX_QUERY_LENGTH = 200
+RESULTS_LIMIT = 50
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split())[:MAX_QUERY_LENGTH]
+
+
+def search_version_key(user_id: int) -> str:
+    return f"downloads:search-version:{user_id}"
+
+
+def bump_search_version(user_id: int) -> None:
+    """Invalidate the cached searches of a user whose files have changed."""
+    key = search_version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, None)
+
+
+def search_files(user_id: int, query: str) -> list[dict]:
+    """
+    Best matching files of ``user_id`` for ``query``, cached.
+
+    Each result is a dict of ``id``, ``job_id``, ``path``, ``size`` and
+    ``similarity``; queries shorter than ``MIN_QUERY_LENGTH`` match nothing.
+    """
+    query = normalize_query(query)
+    if len(query) < MIN_QUERY_LENGTH:
+        return []
+    version = cache.get_or_set(search_version_key(user_id), 1, None)
+    digest = hashlib.md5(query.casefold().encode(), usedforsecurity=False).hexdigest()
+    return cache.get_or_set(  # type: ignore[return-value]
+        f"downloads:search:{user_id}:{digest}",
+        lambda: _search(user_id, query),
+        settings.DOWNLOADS_SEARCH_CACHE_TIMEOUT,
+        version=version,
+    )
+
+
+def _search(user_id: int, query: str) -> list[dict]:
+    matches = (
+        DownloadedFile.objects.filter(job__user_id=user_id, path__icontains=query)
+        .annotate(similarity=TrigramWordSimilarity(query, "path"))
+        .order_by("-similarity", "path")
+        .values("id", "job_id", "path", "size", "similarity")
+    )
+    return list(matches[:RESULTS_LIMIT])
@@ -0,0 +1,152 @@
+"""
+Local staging of files being downloaded.
+
+Chunks land at random offsets of their file, one ``pwrite`` per network block.
+On network storage every one of those writes is a round trip, so when
+``DOWNLOADS_STAGING_ROOT`` is set chunks are written to that local directory
+instead, and a verified file is moved to ``MEDIA_ROOT`` in a few large
+sequential copies. Every worker that takes chunks must see the same staging
+directory.
+"""
+
+import errno
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+from .models import DownloadedFile
+
+COPY_BLOCK_SIZE = 64 * 1024 * 1024
+# Raised by copy_file_range across file systems it cannot copy between.
+UNSUPPORTED = frozenset({errno.EXDEV, errno.ENOSYS, errno.EOPNOTSUPP, errno.EINVAL})
+
+
+class ShortCopyError(OSError):
+    """A copy that ended before it had copied the whole file."""
+
+
+def is_enabled() -> bool:
+    return bool(settings.DOWNLOADS_STAGING_ROOT)
+
+
+def job_root(job_id: int) -> Path:
+    return Path(settings.DOWNLOADS_STAGING_ROOT) / str(job_id)
+
+
+def staged_path(file: DownloadedFile) -> Path:
+    return job_root(file.job_id) / str(file.pk)
+
+
+def write_path(file: DownloadedFile) -> Path:
+    """Where the chunks of ``file`` are written: staged, or in place."""
+    # Checks the upstream path in either case.
+    path = file.local_path
+    if not is_enabled():
+        return path
+    return staged_path(file)
+
+
+def copy_file_range(src: int, dst: int, size: int) -> None:
+    offset = 0
+    while offset < size:
+        copied = os.copy_file_range(src, dst, min(COPY_BLOCK_SIZE, size - offset))
+        if not copied:
+            msg = f"copy_file_range stopped at {offset} of {size} bytes"
+            raise ShortCopyError(msg)
+        offset += copied
+
+
+def sendfile(src: int, dst: int, size: int) -> None:
+    offset = 0
+    while offset < size:
+        sent = os.sendfile(dst, src, offset, min(COPY_BLOCK_SIZE, size - offset))
+        if not sent:
+            msg = f"sendfile stopped at {offset} of {size} bytes"
+            raise ShortCopyError(msg)
+        offset += sent
+
+
+def copy(src: int, dst: int, size: int) -> None:
+    """
+    Copy ``size`` bytes between two file descriptors in large sequential blocks.
+
+    The kernel copies with ``copy_file_range`` (server side on NFS 4.2) or else
+    ``sendfile``; a plain read/write loop is the last resort, also when one of
+    them stops short of ``size``.
+    """
+    for copier in (copy_file_range, sendfile):
+        try:
+            copier(src, dst, size)
+        except (AttributeError, ShortCopyError):
+            pass
+        except OSError as exc:
+            if exc.errno not in UNSUPPORTED:
+                raise
+        else:
+            return
+        # Start over with the next one.
+        os.lseek(src, 0, os.SEEK_SET)
+        os.lseek(dst, 0, os.SEEK_SET)
+        os.ftruncate(dst, 0)
+    with (
+        os.fdopen(src, "rb", closefd=False) as s,
+        os.fdopen(dst, "wb", closefd=False) as d,
+    ):
+        shutil.copyfileobj(s, d, COPY_BLOCK_SIZE)
+
+
+def check_size(fd: int, size: int) -> None:
+    if (copied := os.fstat(fd).st_size) != size:
+        msg = f"Copied {copied} of {size} bytes"
+        raise ShortCopyError(msg)
+
+
+def move(staged: Path, destination: Path) -> None:
+    """
+    Move a staged file to its place in the media volume.
+
+    The copy goes to a temporary file next to ``destination``, is synced and
+    then renamed over it, so readers never see a partial file and a move that
+    runs twice does no harm. A copy whose size differs from the staged file is
+    dropped with :class:`ShortCopyError`.
+    """
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=destination.parent, prefix=".", suffix=".part")
+    try:
+        with staged.open("rb") as src:
+            size = os.fstat(src.fileno()).st_size
+            copy(src.fileno(), fd, size)
+        os.fsync(fd)
+        check_size(fd, size)
+    except BaseException:
+        os.close(fd)
+        Path(temporary).unlink(missing_ok=True)
+        raise
+    os.close(fd)
+    Path(temporary).chmod(0o644)
+    Path(temporary).replace(destination)
+    staged.unlink(missing_ok=True)
+
+
+def discard(file: DownloadedFile) -> None:
+    """Drop the staged copy of a file, if there is one."""
+    if is_enabled():
+        staged_path(file).unlink(missing_ok=True)
+
+
+def staged_jobs() -> list[int]:
+    """Jobs that have a directory in staging."""
+    if not is_enabled() or not Path(settings.DOWNLOADS_STAGING_ROOT).is_dir():
+        return []
+    return [
+        int(directory.name)
+        for directory in Path(settings.DOWNLOADS_STAGING_ROOT).iterdir()
+        if directory.name.isdigit()
+    ]
+
+
+def remove_job(job_id: int) -> None:
+    shutil.rmtree(job_root(job_id), ignore_errors=True)
@@ -0,0 +1,149 @@
+"""
+Multipart uploads of downloaded files to an S3-compatible object store.
+
+With ``STORAGES["default"]`` set to ``MultipartStorage`` chunks never touch the
+local disk: every worker uploads the chunks it fetches as parts of one
+multipart upload per file, and ``finalize_file`` completes the upload once
+all of them are in. The object store assembles it, so the object appears
+whole, or not at all.
+"""
+
+import base64
+import hashlib
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from botocore.exceptions import BotoCoreError
+from botocore.exceptions import ClientError
+from django.core.files.storage import storages
+from storages.backends.s3 import S3Storage
+from storages.utils import clean_name
+
+# Limits of S3 multipart uploads: only the last part may be smaller.
+MAX_PARTS = 10_000
+MIN_PART_SIZE = 5 * 1024 * 1024
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class UploadError(Exception):
+    """The object store failed a request; a retry may succeed."""
+
+
+class NoSuchUploadError(UploadError):
+    """The upload is gone: completed, aborted, or expired by the bucket."""
+
+
+@contextmanager
+def _errors() -> Iterator[None]:
+    try:
+        yield
+    except ClientError as exc:
+        if exc.response.get("Error", {}).get("Code") == "NoSuchUpload":
+            raise NoSuchUploadError(exc) from exc
+        raise UploadError(exc) from exc
+    except BotoCoreError as exc:
+        raise UploadError(exc) from exc
+
+
+class MultipartStorage(S3Storage):
+    """S3 storage that also takes files part by part, from many workers."""
+
+    @property
+    def client(self):
+        return self.connection.meta.client
+
+    def key(self, name: str) -> str:
+        return self._normalize_name(clean_name(name))
+
+    def put(self, name: str, data: bytes) -> None:
+        """Write a small object in one request."""
+        with _errors():
+            self.client.put_object(
+                Bucket=self.bucket_name,
+                Key=self.key(name),
+                Body=data,
+                **self._get_write_parameters(name),
+            )
+
+    def create_upload(self, name: str) -> str:
+        """Start a multipart upload of ``name`` and return its id."""
+        with _errors():
+            response = self.client.create_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=self.key(name),
+                **self._get_write_parameters(name),
+            )
+        return response["UploadId"]
+
+    def upload_part(self, name: str, upload_id: str, number: int, data: bytes) -> None:
+        """
+        Upload part ``number`` (from 1) of an upload; uploading it again replaces it.
+
+        The part is sent with its ``Content-MD5``, which the store checks.
+        """
+        digest = hashlib.md5(data, usedforsecurity=False).digest()
+        with _errors():
+            self.client.upload_part(
+                Bucket=self.bucket_name,
+                Key=self.key(name),
+                UploadId=upload_id,
+                PartNumber=number,
+                Body=data,
+                ContentMD5=base64.b64encode(digest).decode(),
+            )
+
+    def complete_upload(self, name: str, upload_id: str) -> int:
+        """Assemble the object from the uploaded parts; returns its size."""
+        parts = []
+        size = 0
+        with _errors():
+            pages = self.client.get_paginator("list_parts").paginate(
+                Bucket=self.bucket_name,
+                Key=self.key(name),
+                UploadId=upload_id,
+            )
+            for page in pages:
+                for part in page.get("Parts", ()):
+                    parts.append(
+                        {"PartNumber": part["PartNumber"], "ETag": part["ETag"]},
+                    )
+                    size += part["Size"]
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=self.key(name),
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        return size
+
+    def abort_upload(self, name: str, upload_id: str) -> None:
+        """Drop an upload and its parts; an upload already gone is fine."""
+        try:
+            with _errors():
+                self.client.abort_multipart_upload(
+                    Bucket=self.bucket_name,
+                    Key=self.key(name),
+                    UploadId=upload_id,
+                )
+        except NoSuchUploadError:
+            pass
+
+    def md5(self, name: str) -> tuple[str, int]:
+        """Stream an object back; returns its md5 and its size."""
+        digest = hashlib.md5(usedforsecurity=False)
+        size = 0
+        with _errors():
+            response = self.client.get_object(
+                Bucket=self.bucket_name,
+                Key=self.key(name),
+            )
+            for block in response["Body"].iter_chunks(HASH_BLOCK_SIZE):
+                digest.update(block)
+                size += len(block)
+        return digest.hexdigest(), size
+
+
+def multipart() -> MultipartStorage | None:
+    """The default storage, if files are uploaded to it in parts."""
+    storage = storages["default"]
+    return storage if isinstance(storage, MultipartStorage) else None
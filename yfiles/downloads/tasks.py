@@ -0,0 +1,892 @@
+import hashlib
+import logging
+import os
+from collections import Counter
+from collections.abc import Iterable
+from collections.abc import Iterator
+from contextlib import suppress
+from functools import partial
+from http import HTTPStatus
+from operator import itemgetter
+from pathlib import Path
+
+import requests
+from celery import shared_task
+from celery.exceptions import SoftTimeLimitExceeded
+from celery.utils.time import get_exponential_backoff_interval
+from django.conf import settings
+from django.contrib.postgres.fields import ArrayField
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import transaction
+from django.db.models import Count
+from django.db.models import F
+from django.db.models import Func
+from django.db.models import OuterRef
+from django.db.models import PositiveBigIntegerField
+from django.db.models import QuerySet
+from django.db.models import Subquery
+from django.db.models import Sum
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.db.models.functions import Now
+
+from yfiles.core import logs
+from yfiles.core.dispatch import send_many
+from yfiles.core.dispatch import sized_batches
+
+from . import previews
+from . import progress
+from . import search
+from . import staging
+from . import storage
+from . import yandex
+from .models import IMAGE_PATTERN
+from .models import DownloadedFile
+from .models import DownloadJob
+from .models import FailedChunk
+
+logger = logging.getLogger(__name__)
+# Records per chunk, rate limited by the "hot_path" filter of LOGGING.
+chunk_logger = logging.getLogger("yfiles.downloads.chunks")
+
+FILES_BATCH_SIZE = 1000
+JOBS_BATCH_SIZE = 1000
+REPLAY_BATCH_SIZE = 1000
+RETRY_ERRORS = (
+    requests.RequestException,
+    yandex.YandexDiskError,
+    storage.UploadError,
+)
+# Listed in CELERY_TASK_QUEUES.
+RETRY_QUEUE = "downloads-retry"
+PREVIEW_QUEUE = "downloads-previews"
+# Yandex Disk download links stay valid for a few hours.
+DOWNLOAD_URL_TIMEOUT = 60 * 60
+HASH_BLOCK_SIZE = 1024 * 1024
+# Moving a large file to network storage outlasts the time limit of a chunk task.
+FINALIZE_TIME_LIMIT = 60 * 60
+FINALIZE_ERRORS = (OSError, storage.UploadError)
+FINALIZE_MAX_RETRIES = 5
+
+# ``(file_id, offset, length)``
+Chunk = tuple[int, int, int]
+
+
+class FileGoneError(Exception):
+    """The file is no longer part of the public resource: retrying cannot help."""
+
+
+def download_url_cache_key(file_id: int) -> str:
+    return f"downloads:href:{file_id}"
+
+
+def publish_progress(job_id: int) -> None:
+    job = DownloadJob.objects.get(pk=job_id)
+    progress.publish(job.pk, job.progress())
+
+
+def iter_chunks(size: int, chunk_size: int):
+    """Yield ``(offset, length)`` pairs covering ``size`` bytes."""
+    for offset in range(0, size, chunk_size):
+        yield offset, min(chunk_size, size - offset)
+
+
+def chunk_size(size: int) -> int:
+    """
+    Size of the chunks of a file of ``size`` bytes.
+
+    Chunks uploaded as parts are stretched to the limits of multipart uploads:
+    ``storage.MIN_PART_SIZE`` at least, and few enough for ``storage.MAX_PARTS``.
+    """
+    if storage.multipart() is None:
+        return settings.DOWNLOADS_CHUNK_SIZE
+    return max(
+        settings.DOWNLOADS_CHUNK_SIZE,
+        storage.MIN_PART_SIZE,
+        -(-size // storage.MAX_PARTS),
+    )
+
+
+def file_chunks(file_id: int, size: int) -> Iterator[Chunk]:
+    for offset, length in iter_chunks(size, chunk_size(size)):
+        yield file_id, offset, length
+
+
+@shared_task()
+def load_job(job_id: int) -> None:
+    """List a public resource, record its files and queue their chunks."""
+    job = DownloadJob.objects.get(pk=job_id)
+    if job.is_finished:
+        return
+    job.status = DownloadJob.Status.RUNNING
+    job.save(update_fields=["status", "modified"])
+
+    try:
+        batch = []
+        for public_file in yandex.iter_files(job.public_url):
+            batch.append(
+                DownloadedFile(
+                    job=job,
+                    path=public_file.path,
+                    size=public_file.size,
+                    modified=public_file.modified,
+                    md5=public_file.md5,
+                    sha256=public_file.sha256,
+                ),
+            )
+            if len(batch) >= FILES_BATCH_SIZE:
+                DownloadedFile.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        DownloadedFile.objects.bulk_create(batch, ignore_conflicts=True)
+    except (requests.RequestException, yandex.YandexDiskError) as exc:
+        job.status = DownloadJob.Status.FAILED
+        job.error = str(exc)
+        job.save(update_fields=["status", "error", "modified"])
+        progress.publish(job.pk, job.progress())
+        return
+    finally:
+        # Whatever was recorded is searchable from now on.
+        search.bump_search_version(job.user_id)
+
+    totals = job.files.aggregate(count=Count("pk"), size=Sum("size"))
+    job.total_files = totals["count"]
+    job.total_bytes = totals["size"] or 0
+    # Verified files of a requeued job count as queued and done already.
+    job.queued_bytes = job.done_bytes
+    job.queue_cursor = 0
+    job.save(
+        update_fields=[
+            "total_files",
+            "total_bytes",
+            "queued_bytes",
+            "queue_cursor",
+            "modified",
+        ],
+    )
+    progress.publish(job.pk, job.progress())
+
+    complete_empty_files(job)
+    queue_chunks(job.pk)
+    if not job.total_files:
+        finish_job(job.pk)
+
+
+def complete_empty_files(job: DownloadJob) -> None:
+    """Create the pending empty files of ``job``; they have no chunks to queue."""
+    empty = job.files.filter(status=DownloadedFile.Status.PENDING, size=0)
+    for file in empty.only("pk", "path", "size", "md5").iterator():
+        file.job = job
+        if store := storage.multipart():
+            store.put(file.storage_name, b"")
+        else:
+            path = staging.write_path(file)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.touch()
+        complete_file(file)
+
+
+def queue_chunks(job_id: int) -> int:
+    """
+    Queue the next chunks of a running job; returns how many tasks were sent.
+
+    The job's pending files are planned in primary key order from its
+    ``queue_cursor`` until ``DOWNLOADS_QUEUE_AHEAD`` bytes are queued and not
+    yet done. Workers call it again as they drain the queue, so the first
+    chunks of any job are queued at once and the broker never holds a whole
+    job. Only one process plans a job at a time; the others skip it.
+    """
+    with transaction.atomic():
+        job = (
+            DownloadJob.objects.select_for_update(skip_locked=True)
+            .filter(pk=job_id, status=DownloadJob.Status.RUNNING)
+            .first()
+        )
+        if job is None:
+            return 0
+        outstanding = job.queued_bytes - job.done_bytes - job.failed_bytes
+        room = settings.DOWNLOADS_QUEUE_AHEAD - outstanding
+        files = job.files.filter(
+            pk__gt=job.queue_cursor,
+            status=DownloadedFile.Status.PENDING,
+            size__gt=0,
+        ).order_by("pk")
+        chunks: list[Chunk] = []
+        planned = 0
+        for file_id, size in files.values_list("pk", "size").iterator():
+            if planned >= room:
+                break
+            chunks.extend(file_chunks(file_id, size))
+            planned += size
+            job.queue_cursor = file_id
+        job.queued_bytes += planned
+        job.save(update_fields=["queued_bytes", "queue_cursor"])
+    # Sent once the cursor is committed, so no chunk is ever planned twice.
+    return send_many(download_chunks, ((batch,) for batch in batch_chunks(chunks)))
+
+
+def batch_chunks(chunks: Iterable[Chunk]) -> Iterator[list[Chunk]]:
+    """
+    Pack chunks into task-sized batches.
+
+    A batch holds at most ``DOWNLOADS_CHUNKS_PER_TASK`` chunks and, unless it is
+    a single chunk, at most ``DOWNLOADS_BYTES_PER_TASK`` bytes.
+    """
+    return sized_batches(
+        chunks,
+        itemgetter(2),
+        settings.DOWNLOADS_CHUNKS_PER_TASK,
+        settings.DOWNLOADS_BYTES_PER_TASK,
+    )
+
+
+@shared_task(
+    bind=True,
+    # Internal only: msgpack packs the integers of a batch far tighter than JSON.
+    serializer="msgpack",
+    # Millions of chunks run per day: their progress is counted on the job row,
+    # a stored result per batch would only fill Redis.
+    ignore_result=True,
+)
+def download_chunks(self, chunks: list[Chunk]) -> None:
+    """
+    Fetch a batch of ``(file_id, offset, length)`` chunks in order.
+
+    A chunk that fails, whatever the error, is sent on to be retried on its own
+    while the rest of the batch goes on; chunks that cannot succeed are
+    quarantined at once.
+    """
+    retries = self.request.retries
+    for n, chunk in enumerate(chunks):
+        file_id, offset, _ = chunk
+        with logs.context(file_id=file_id, offset=offset):
+            try:
+                fetch_chunk(*chunk)
+            except FileGoneError as exc:
+                quarantine_chunk(chunk, FailedChunk.Reason.NOT_FOUND, exc, retries)
+            except SuspiciousFileOperation as exc:
+                quarantine_chunk(chunk, FailedChunk.Reason.UNSAFE_PATH, exc, retries)
+            except RETRY_ERRORS as exc:
+                retry_chunk(chunk, exc, retries)
+            except SoftTimeLimitExceeded as exc:
+                retry_chunk(chunk, exc, retries)
+                # Only the grace period before the hard limit is left.
+                if rest := chunks[n + 1 :]:
+                    download_chunks.delay(rest)
+                return
+            except Exception as exc:
+                # A full disk, say: the result is ignored, so letting it out
+                # would lose the rest of the batch and stall the job.
+                logger.exception("Chunk failed")
+                retry_chunk(chunk, exc, retries)
+
+
+def retry_chunk(chunk: Chunk, exc: Exception, retries: int) -> None:
+    """
+    Queue a failed chunk again, alone and on the retry queue.
+
+    Attempts are spaced by exponential backoff with full jitter, capped at
+    ``DOWNLOADS_RETRY_BACKOFF_MAX`` seconds. After ``DOWNLOADS_MAX_RETRIES``
+    retries the chunk is quarantined instead.
+    """
+    if retries >= settings.DOWNLOADS_MAX_RETRIES:
+        reason = (
+            FailedChunk.Reason.TIME_LIMIT
+            if isinstance(exc, SoftTimeLimitExceeded)
+            else FailedChunk.Reason.RETRIES
+        )
+        quarantine_chunk(chunk, reason, exc, retries)
+        return
+    countdown = get_exponential_backoff_interval(
+        factor=1,
+        retries=retries,
+        maximum=settings.DOWNLOADS_RETRY_BACKOFF_MAX,
+        full_jitter=True,
+    )
+    chunk_logger.info("Chunk failed, retrying in %ss: %r", countdown, exc)
+    download_chunks.apply_async(
+        ([chunk],),
+        countdown=countdown,
+        queue=RETRY_QUEUE,
+        retries=retries + 1,
+    )
+
+
+def quarantine_chunk(
+    chunk: Chunk,
+    reason: FailedChunk.Reason,
+    exc: Exception,
+    retries: int,
+) -> None:
+    """Record a chunk that failed for good and fail its file."""
+    file_id, offset, length = chunk
+    file = DownloadedFile.objects.only("job_id", "size").get(pk=file_id)
+    logger.warning("Chunk quarantined after %d retries: %r", retries, exc)
+    FailedChunk.objects.create(
+        job_id=file.job_id,
+        file=file,
+        offset=offset,
+        length=length,
+        reason=reason,
+        error=str(exc) or type(exc).__name__,
+        retries=retries,
+    )
+    fail_file(file)
+
+
+@shared_task(
+    autoretry_for=RETRY_ERRORS,
+    retry_backoff=True,
+    max_retries=5,
+    ignore_result=True,
+)
+def download_chunk(file_id: int, offset: int, length: int) -> None:
+    """Fetch a single chunk; kept for messages queued before chunks were batched."""
+    fetch_chunk(file_id, offset, length)
+
+
+def fetch_chunk(file_id: int, offset: int, length: int) -> None:
+    """Fetch one HTTP Range of a file and write it, or upload it as a part."""
+    file = DownloadedFile.objects.select_related("job").get(pk=file_id)
+    if file.job.is_finished or file.status != DownloadedFile.Status.PENDING:
+        return
+    with logs.context(job_id=file.job_id):
+        cache_key = download_url_cache_key(file.pk)
+        url = cache.get(cache_key)
+        if url is None:
+            try:
+                url = yandex.get_download_url(file.job.public_url, file.path)
+            except yandex.YandexDiskError as exc:
+                if exc.status in (HTTPStatus.NOT_FOUND, HTTPStatus.GONE):
+                    raise FileGoneError(exc) from exc
+                raise
+            cache.set(cache_key, url, DOWNLOAD_URL_TIMEOUT)
+
+        try:
+            if store := storage.multipart():
+                upload_chunk(store, file, url, offset, length)
+            else:
+                write_chunk(staging.write_path(file), url, offset, length)
+        except yandex.YandexDiskError as exc:
+            if exc.status is not None:
+                # Expired or revoked link: resolve a fresh one on retry.
+                cache.delete(cache_key)
+            raise
+
+        record_chunk(file, offset, length)
+        chunk_logger.debug("Chunk of %d bytes done", length)
+
+
+def write_chunk(path: Path, url: str, offset: int, length: int) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+    try:
+        position = offset
+        for block in yandex.iter_range(url, offset, length):
+            view = memoryview(block)
+            while view:
+                written = os.pwrite(fd, view, position)
+                position += written
+                view = view[written:]
+    finally:
+        os.close(fd)
+
+
+def upload_chunk(
+    store: storage.MultipartStorage,
+    file: DownloadedFile,
+    url: str,
+    offset: int,
+    length: int,
+) -> None:
+    """Upload a chunk as its part of the file, held in memory on the way."""
+    data = b"".join(yandex.iter_range(url, offset, length))
+    upload_id = start_upload(store, file)
+    # Uploads started before the chunk size was stored have none.
+    number = offset // (file.upload_chunk_size or chunk_size(file.size)) + 1
+    store.upload_part(file.storage_name, upload_id, number, data)
+
+
+def start_upload(store: storage.MultipartStorage, file: DownloadedFile) -> str:
+    """The upload of ``file``, started by whichever chunk of it comes first."""
+    if file.upload_id:
+        return file.upload_id
+    with transaction.atomic():
+        locked = DownloadedFile.objects.select_for_update().get(pk=file.pk)
+        if not locked.upload_id:
+            locked.upload_id = store.create_upload(file.storage_name)
+            # Its chunks are numbered by this size, whatever the settings say later.
+            locked.upload_chunk_size = chunk_size(file.size)
+            locked.save(update_fields=["upload_id", "upload_chunk_size"])
+    file.upload_id = locked.upload_id
+    file.upload_chunk_size = locked.upload_chunk_size
+    return file.upload_id
+
+
+class ArrayAppend(Func):
+    """``array_append(array, element)``: the offsets with one more at the end."""
+
+    function = "array_append"
+    arity = 2
+    output_field = ArrayField(PositiveBigIntegerField())
+
+
+def record_chunk(file: DownloadedFile, offset: int, length: int) -> None:
+    # A file failed meanwhile has its missing bytes counted as failed already,
+    # and a chunk of a file is counted only once.
+    counted = (
+        DownloadedFile.objects.filter(
+            pk=file.pk,
+            status=DownloadedFile.Status.PENDING,
+        )
+        .exclude(done_offsets__contains=[offset])
+        .update(
+            done_bytes=F("done_bytes") + length,
+            done_offsets=ArrayAppend(F("done_offsets"), offset),
+        )
+    )
+    if not counted:
+        chunk_logger.debug("Chunk at %d counted already", offset)
+        return
+    DownloadJob.objects.filter(pk=file.job_id).update(
+        done_bytes=F("done_bytes") + length,
+    )
+    # Only the chunk that brings the file to its full size completes it.
+    if DownloadedFile.objects.filter(
+        pk=file.pk,
+        status=DownloadedFile.Status.PENDING,
+        done_bytes__gte=F("size"),
+    ).exists():
+        complete_file(file)
+    else:
+        publish_progress(file.job_id)
+    # Refill once half of what was queued ahead is done.
+    if (
+        DownloadJob.objects.filter(
+            pk=file.job_id,
+            status=DownloadJob.Status.RUNNING,
+            queued_bytes__lt=F("total_bytes"),
+        )
+        .filter(
+            queued_bytes__lt=F("done_bytes")
+            + F("failed_bytes")
+            + settings.DOWNLOADS_QUEUE_AHEAD // 2,
+        )
+        .exists()
+    ):
+        queue_chunks(file.job_id)
+
+
+def file_md5(path: os.PathLike) -> str:
+    digest = hashlib.md5(usedforsecurity=False)
+    with open(path, "rb") as f:  # noqa: PTH123
+        while block := f.read(HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def complete_file(file: DownloadedFile) -> None:
+    """
+    Verify a fully written file and count it towards its job.
+
+    A staged file is counted once ``finalize_file`` has moved it to the media
+    volume, an uploaded one once ``finalize_file`` has completed its upload.
+    """
+    if storage.multipart():
+        finalize_file.delay(file.pk)
+        return
+    if file.md5 and (md5 := file_md5(staging.write_path(file))) != file.md5:
+        checksum_failed(file, f"Expected md5 {file.md5}, got {md5}")
+        return
+    if staging.is_enabled():
+        finalize_file.delay(file.pk)
+    elif close_file(file, DownloadedFile.Status.DONE):
+        finish_job(file.job_id)
+
+
+def checksum_failed(file: DownloadedFile, error: str) -> None:
+    quarantine_file(file, FailedChunk.Reason.CHECKSUM, error)
+
+
+def quarantine_file(
+    file: DownloadedFile,
+    reason: FailedChunk.Reason,
+    error: str,
+    retries: int = 0,
+) -> None:
+    """Record a whole file that failed for good and fail it."""
+    FailedChunk.objects.create(
+        job_id=file.job_id,
+        file=file,
+        offset=0,
+        length=file.size,
+        reason=reason,
+        error=error,
+        retries=retries,
+    )
+    fail_file(file)
+
+
+@shared_task(
+    bind=True,
+    max_retries=FINALIZE_MAX_RETRIES,
+    ignore_result=True,
+    soft_time_limit=FINALIZE_TIME_LIMIT,
+    time_limit=FINALIZE_TIME_LIMIT + 60,
+)
+def finalize_file(self, file_id: int) -> None:
+    """
+    Put a fully fetched file in place and count it as done.
+
+    A staged file is moved from staging to the media volume; an uploaded one
+    has its upload completed, then is read back and verified. Running it twice
+    does no harm: a file already in place is only counted. Storage errors are
+    retried with backoff; after ``FINALIZE_MAX_RETRIES`` the file is
+    quarantined, so its job still finishes.
+    """
+    file = DownloadedFile.objects.select_related("job").get(pk=file_id)
+    if file.status != DownloadedFile.Status.PENDING:
+        return
+    retries = self.request.retries
+    try:
+        placed = place_file(file)
+    except FINALIZE_ERRORS as exc:
+        if retries >= FINALIZE_MAX_RETRIES:
+            logger.warning("File quarantined after %d retries: %r", retries, exc)
+            reason = FailedChunk.Reason.RETRIES
+            quarantine_file(file, reason, str(exc) or type(exc).__name__, retries)
+            return
+        countdown = get_exponential_backoff_interval(
+            factor=1,
+            retries=retries,
+            maximum=settings.DOWNLOADS_RETRY_BACKOFF_MAX,
+            full_jitter=True,
+        )
+        raise self.retry(exc=exc, countdown=countdown) from exc
+    if placed and close_file(file, DownloadedFile.Status.DONE):
+        finish_job(file.job_id)
+
+
+def place_file(file: DownloadedFile) -> bool:
+    """Move or complete ``file`` into storage; False if it cannot be counted done."""
+    if store := storage.multipart():
+        return complete_upload(store, file)
+    try:
+        staging.move(staging.staged_path(file), file.local_path)
+    except FileNotFoundError:
+        if file.local_path.exists():
+            # Moved by another run.
+            return True
+        # Pruned with its cancelled job, or else lost: fetch it again on replay.
+        if not file.job.is_finished:
+            quarantine_file(file, FailedChunk.Reason.LOST, "Staged copy is missing")
+        return False
+    return True
+
+
+def complete_upload(store: storage.MultipartStorage, file: DownloadedFile) -> bool:
+    """Complete the upload of ``file`` and verify the object; False if it failed."""
+    if file.upload_id:
+        # Gone once completed by another run: the object is verified below.
+        with suppress(storage.NoSuchUploadError):
+            store.complete_upload(file.storage_name, file.upload_id)
+        DownloadedFile.objects.filter(pk=file.pk).update(
+            upload_id="",
+            upload_chunk_size=0,
+        )
+    md5, size = store.md5(file.storage_name)
+    if size != file.size or (file.md5 and md5 != file.md5):
+        store.delete(file.storage_name)
+        checksum_failed(
+            file,
+            f"Expected {file.size} bytes with md5 {file.md5 or '-'}, "
+            f"got {size} bytes with md5 {md5}",
+        )
+        return False
+    return True
+
+
+@shared_task(ignore_result=True)
+def prune_staging() -> int:
+    """Remove the staging directories of finished and deleted jobs."""
+    staged = staging.staged_jobs()
+    active = set(
+        DownloadJob.objects.filter(pk__in=staged)
+        .exclude(status__in=DownloadJob.FINISHED)
+        .values_list("pk", flat=True),
+    )
+    pruned = [job_id for job_id in staged if job_id not in active]
+    for job_id in pruned:
+        staging.remove_job(job_id)
+    return len(pruned)
+
+
+def fail_file(file: DownloadedFile) -> None:
+    """Give up on a file; its bytes still missing stop counting as outstanding."""
+    if not close_file(file, DownloadedFile.Status.FAILED):
+        return
+    staging.discard(file)
+    # Chunks of a failed file are no longer counted, so this is final.
+    done, upload_id = DownloadedFile.objects.values_list(
+        "done_bytes",
+        "upload_id",
+    ).get(pk=file.pk)
+    if upload_id and (store := storage.multipart()):
+        abort_upload(store, file, upload_id)
+    DownloadJob.objects.filter(pk=file.job_id).update(
+        failed_bytes=F("failed_bytes") + file.size - done,
+    )
+    finish_job(file.job_id)
+
+
+def abort_upload(
+    store: storage.MultipartStorage,
+    file: DownloadedFile,
+    upload_id: str,
+) -> None:
+    """Drop the parts of a failed file; a replay starts a new upload."""
+    DownloadedFile.objects.filter(pk=file.pk).update(upload_id="", upload_chunk_size=0)
+    try:
+        store.abort_upload(file.storage_name, upload_id)
+    except storage.UploadError:
+        # The bucket's lifecycle rule expires incomplete uploads eventually.
+        logger.warning("Could not abort upload %s of %s", upload_id, file.storage_name)
+
+
+def close_file(file: DownloadedFile, status: str) -> bool:
+    """Settle a pending file and count it towards its job, exactly once."""
+    claimed = DownloadedFile.objects.filter(
+        pk=file.pk,
+        status=DownloadedFile.Status.PENDING,
+    ).update(status=status, done_offsets=[], changed=Now())
+    if claimed:
+        DownloadJob.objects.filter(pk=file.job_id).update(
+            done_files=F("done_files") + 1,
+        )
+    return bool(claimed)
+
+
+def finish_job(job_id: int) -> None:
+    """Close the job once every file is accounted for, then publish its state."""
+    finished = DownloadJob.objects.filter(
+        pk=job_id,
+        status=DownloadJob.Status.RUNNING,
+        done_files__gte=F("total_files"),
+    )
+    if finished.exists():
+        failed = DownloadedFile.objects.filter(
+            job_id=job_id,
+            status=DownloadedFile.Status.FAILED,
+        ).exists()
+        closed = finished.update(
+            status=DownloadJob.Status.FAILED if failed else DownloadJob.Status.DONE,
+        )
+        if closed:
+            # Only once the closing commits: the previews read the files it
+            # counted, and a rolled back close must not queue them.
+            transaction.on_commit(partial(queue_previews, job_id))
+    publish_progress(job_id)
+
+
+def queue_previews(job_id: int) -> int:
+    """Queue previews of the done images of a job that have none; returns tasks sent."""
+    images = DownloadedFile.objects.filter(
+        job_id=job_id,
+        status=DownloadedFile.Status.DONE,
+        preview="",
+        size__gt=0,
+        size__lte=settings.DOWNLOADS_PREVIEW_MAX_BYTES,
+        path__iregex=IMAGE_PATTERN,
+    ).order_by("pk")
+    batches = previews.batch_previews(images.values_list("pk", "size").iterator())
+    return send_many(
+        make_previews,
+        ((batch,) for batch in batches),
+        queue=PREVIEW_QUEUE,
+    )
+
+
+@shared_task(ignore_result=True)
+def make_previews(file_ids: list[int]) -> None:
+    """
+    Make the previews of a batch of images, in order.
+
+    Files that are not readable images are left without one. When the time
+    limit nears, the previews made so far are saved and the rest, from the
+    image being rendered on, sent on.
+    """
+    files = iter(
+        DownloadedFile.objects.filter(
+            pk__in=file_ids,
+            status=DownloadedFile.Status.DONE,
+            preview="",
+        )
+        .order_by("pk")
+        .only("pk", "job_id", "path", "sha256"),
+    )
+    made = []
+    file: DownloadedFile | None = None
+    try:
+        for file in files:
+            try:
+                file.preview = previews.make_preview(file)
+            except previews.PreviewError as exc:
+                logger.info("No preview of file %d: %s", file.pk, exc)
+                continue
+            made.append(file)
+    except SoftTimeLimitExceeded:
+        # The iterator goes on after the image that ran out of time, which is
+        # sent on first.
+        rest = [remaining.pk for remaining in files]
+        if file is not None and file not in made:
+            rest.insert(0, file.pk)
+        if rest:
+            make_previews.apply_async((rest,), queue=PREVIEW_QUEUE)
+    finally:
+        DownloadedFile.objects.bulk_update(made, ["preview"])
+
+
+def keyset_batches(queryset: QuerySet, size: int) -> Iterator[list[int]]:
+    """
+    The primary keys of ``queryset`` in ascending batches of at most ``size``.
+
+    Each batch is one query for the keys after the previous one: the keys are
+    never all held in memory, and a batch whose rows leave ``queryset`` once
+    acted on (a status filter, say) does not shift the rows after it.
+    """
+    keys = queryset.order_by("pk").values_list("pk", flat=True)
+    batch = list(keys[:size])
+    while batch:
+        yield batch
+        batch = list(keys.filter(pk__gt=batch[-1])[:size])
+
+
+def cancel_jobs(jobs: QuerySet[DownloadJob]) -> int:
+    """Cancel the unfinished ``jobs``; their queued chunks turn no-ops."""
+    return sum(
+        cancel_job_batch(job_ids) for job_ids in keyset_batches(jobs, JOBS_BATCH_SIZE)
+    )
+
+
+def cancel_job_batch(job_ids: list[int]) -> int:
+    cancelled = DownloadJob.objects.filter(pk__in=job_ids).exclude(
+        status__in=DownloadJob.FINISHED,
+    )
+    count = cancelled.update(status=DownloadJob.Status.CANCELLED)
+    for job in DownloadJob.objects.filter(
+        pk__in=job_ids,
+        status=DownloadJob.Status.CANCELLED,
+    ).iterator():
+        progress.publish(job.pk, job.progress())
+    return count
+
+
+def requeue_jobs(jobs: QuerySet[DownloadJob]) -> int:
+    """
+    Load the failed or cancelled ``jobs`` again.
+
+    Verified files are kept; everything else is fetched from scratch.
+    """
+    return sum(
+        requeue_job_batch(job_ids) for job_ids in keyset_batches(jobs, JOBS_BATCH_SIZE)
+    )
+
+
+def requeue_job_batch(job_ids: list[int]) -> int:
+    jobs = DownloadJob.objects.filter(
+        pk__in=job_ids,
+        status__in=[DownloadJob.Status.FAILED, DownloadJob.Status.CANCELLED],
+    )
+    requeued = list(jobs.values_list("pk", flat=True))
+    DownloadedFile.objects.filter(job_id__in=requeued).exclude(
+        status=DownloadedFile.Status.DONE,
+    ).update(
+        status=DownloadedFile.Status.PENDING,
+        done_bytes=0,
+        done_offsets=[],
+        upload_id="",
+        upload_chunk_size=0,
+        changed=Now(),
+    )
+    FailedChunk.objects.filter(job_id__in=requeued).delete()
+    done = DownloadedFile.objects.filter(
+        job_id=OuterRef("pk"),
+        status=DownloadedFile.Status.DONE,
+    ).values("job_id")
+    DownloadJob.objects.filter(pk__in=requeued).update(
+        status=DownloadJob.Status.PENDING,
+        error="",
+        failed_bytes=0,
+        done_files=Coalesce(
+            Subquery(done.annotate(count=Count("pk")).values("count")),
+            Value(0),
+        ),
+        done_bytes=Coalesce(
+            Subquery(done.annotate(size=Sum("size")).values("size")),
+            Value(0),
+        ),
+    )
+    for job_id in requeued:
+        # A job still failed or cancelled when it starts would be skipped.
+        transaction.on_commit(partial(load_job.delay, job_id))
+    return len(requeued)
+
+
+def replay_failed_chunks(chunks: QuerySet[FailedChunk]) -> int:
+    """
+    Fetch the files of the failed ``chunks`` again.
+
+    Files are replayed ``REPLAY_BATCH_SIZE`` at a time, each batch locked and
+    reset in an atomic block; their jobs run again unless they were cancelled.
+    Their chunks are queued once the transaction commits, which in a request
+    is the request's own. Returns how many files were replayed.
+    """
+    files = DownloadedFile.objects.filter(pk__in=chunks.values("file_id"))
+    return sum(
+        replay_files(file_ids) for file_ids in keyset_batches(files, REPLAY_BATCH_SIZE)
+    )
+
+
+def replay_files(file_ids: list[int]) -> int:
+    with transaction.atomic():
+        files = list(
+            DownloadedFile.objects.select_for_update()
+            .filter(pk__in=file_ids, status=DownloadedFile.Status.FAILED)
+            .exclude(job__status=DownloadJob.Status.CANCELLED)
+            .only("pk", "job_id", "path", "size", "md5", "done_bytes"),
+        )
+        # Per job: replayed files and their bytes counted as done and as failed.
+        count: Counter[int] = Counter()
+        done: Counter[int] = Counter()
+        failed: Counter[int] = Counter()
+        for file in files:
+            count[file.job_id] += 1
+            done[file.job_id] += file.done_bytes
+            failed[file.job_id] += file.size - file.done_bytes
+        for job_id in count:
+            # Their bytes stay queued: the files are queued again right below.
+            DownloadJob.objects.filter(pk=job_id).update(
+                status=DownloadJob.Status.RUNNING,
+                done_files=F("done_files") - count[job_id],
+                done_bytes=F("done_bytes") - done[job_id],
+                failed_bytes=F("failed_bytes") - failed[job_id],
+            )
+        DownloadedFile.objects.filter(pk__in=[file.pk for file in files]).update(
+            status=DownloadedFile.Status.PENDING,
+            done_bytes=0,
+            done_offsets=[],
+            upload_id="",
+            upload_chunk_size=0,
+            changed=Now(),
+        )
+        FailedChunk.objects.filter(file__in=files).delete()
+        # Chunks of files not yet committed as pending would be skipped.
+        transaction.on_commit(partial(queue_replayed, files, list(count)))
+    return len(files)
+
+
+def queue_replayed(files: list[DownloadedFile], job_ids: list[int]) -> None:
+    chunks = (chunk for file in files for chunk in file_chunks(file.pk, file.size))
+    send_many(download_chunks, ((batch,) for batch in batch_chunks(chunks)))
+    for job_id in job_ids:
+        publish_progress(job_id)
@@ -0,0 +1,17 @@
+import pytest
+
+from yfiles.downloads.tests.s3_standin import S3StandIn
+
+
+@pytest.fixture
+def s3(settings):
+    """Store files in a local stand-in of S3, uploading them in parts."""
+    with S3StandIn() as standin:
+        settings.STORAGES = {
+            **settings.STORAGES,
+            "default": {
+                "BACKEND": "yfiles.downloads.storage.MultipartStorage",
+                "OPTIONS": standin.options,
+            },
+        }
+        yield standin
@@ -0,0 +1,45 @@
+import datetime
+
+from factory import Faker
+from factory import SelfAttribute
+from factory import Sequence
+from factory import SubFactory
+from factory.django import DjangoModelFactory
+
+from yfiles.downloads.models import DownloadedFile
+from yfiles.downloads.models import DownloadJob
+from yfiles.downloads.models import FailedChunk
+from yfiles.users.tests.factories import UserFactory
+
+
+class DownloadJobFactory(DjangoModelFactory[DownloadJob]):
+    user = SubFactory(UserFactory)
+    public_url = Sequence(lambda n: f"https://disk.yandex.ru/d/public-{n}")
+
+    class Meta:
+        model = DownloadJob
+
+
+class DownloadedFileFactory(DjangoModelFactory[DownloadedFile]):
+    job = SubFactory(DownloadJobFactory)
+    path = Sequence(lambda n: f"/folder/file-{n}.bin")
+    size = 1024
+    modified = Faker("date_time", tzinfo=datetime.UTC)
+
+    class Meta:
+        model = DownloadedFile
+
+
+class FailedChunkFactory(DjangoModelFactory[FailedChunk]):
+    file = SubFactory(
+        DownloadedFileFactory,
+        status=DownloadedFile.Status.FAILED,
+        job__status=DownloadJob.Status.FAILED,
+    )
+    job = SelfAttribute("file.job")
+    offset = 0
+    length = 1024
+    reason = FailedChunk.Reason.RETRIES
+
+    class Meta:
+        model = FailedChunk
@@ -0,0 +1,269 @@
+"""
+Local stand-in for an S3-compatible object store, in the manner of MinIO.
+
+Serves one bucket from memory with path-style addressing: objects (``PUT``,
+``GET`` with Range, ``HEAD``, ``DELETE``) and multipart uploads (create,
+upload part with ``Content-MD5`` checks, list parts, complete, abort). Enough
+for ``boto3`` and ``yfiles.downloads.storage.MultipartStorage``.
+
+    with S3StandIn() as s3:
+        settings.STORAGES["default"] = {"BACKEND": ..., "OPTIONS": s3.options}
+"""
+
+import base64
+import hashlib
+import itertools
+import re
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qs
+from urllib.parse import unquote
+from urllib.parse import urlsplit
+from xml.etree import ElementTree as ET
+
+BUCKET = "yfiles"
+NAMESPACE = "http://s3.amazonaws.com/doc/2006-03-01/"
+PARTS_PER_PAGE = 1000
+RANGE = re.compile(r"bytes=(\d+)-(\d*)")
+
+
+def etag(data: bytes) -> str:
+    return '"' + hashlib.md5(data, usedforsecurity=False).hexdigest() + '"'
+
+
+def xml(root: str, *children: tuple[str, object]) -> bytes:
+    # S3 leaves its errors out of the namespace.
+    element = ET.Element(root) if root == "Error" else ET.Element(root, xmlns=NAMESPACE)
+    for name, value in children:
+        if isinstance(value, ET.Element):
+            element.append(value)
+        else:
+            ET.SubElement(element, name).text = str(value)
+    return ET.tostring(element, xml_declaration=True, encoding="utf-8")
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "S3StandInServer"
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+    def route(self) -> tuple[str, dict[str, str]]:
+        url = urlsplit(self.path)
+        query = parse_qs(url.query, keep_blank_values=True)
+        params = {k: v[0] for k, v in query.items()}
+        bucket, _, key = unquote(url.path).lstrip("/").partition("/")
+        if bucket != BUCKET:
+            self.send_error_xml(HTTPStatus.NOT_FOUND, "NoSuchBucket")
+            return "", {}
+        return key, params
+
+    def body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def upload(self, params: dict[str, str]) -> dict[int, bytes] | None:
+        uploads = self.server.standin.uploads
+        if params["uploadId"] not in uploads:
+            self.send_error_xml(HTTPStatus.NOT_FOUND, "NoSuchUpload")
+            return None
+        return uploads[params["uploadId"]]
+
+    def do_PUT(self):  # noqa: N802
+        key, params = self.route()
+        if not key:
+            return
+        standin = self.server.standin
+        data = self.body()
+        digest = base64.b64encode(hashlib.md5(data, usedforsecurity=False).digest())
+        if self.headers.get("Content-MD5", digest.decode()) != digest.decode():
+            self.send_error_xml(HTTPStatus.BAD_REQUEST, "BadDigest")
+            return
+        if "uploadId" in params:
+            parts = self.upload(params)
+            if parts is None:
+                return
+            parts[int(params["partNumber"])] = data
+            standin.parts_uploaded += 1
+        else:
+            standin.objects[key] = data
+        self.send_empty(headers={"ETag": etag(data)})
+
+    def do_POST(self):  # noqa: N802
+        key, params = self.route()
+        if not key:
+            return
+        standin = self.server.standin
+        if "uploads" in params:
+            upload_id = str(next(standin.ids))
+            standin.uploads[upload_id] = {}
+            self.send_xml(
+                xml(
+                    "InitiateMultipartUploadResult",
+                    ("Bucket", BUCKET),
+                    ("Key", key),
+                    ("UploadId", upload_id),
+                ),
+            )
+            return
+        parts = self.upload(params)
+        if parts is None:
+            return
+        # Sent by the client under test, which is trusted.
+        completed = ET.fromstring(self.body())  # noqa: S314
+        requested = [
+            int(number.text or 0)
+            for number in completed.iter(f"{{{NAMESPACE}}}PartNumber")
+        ]
+        if not requested or any(number not in parts for number in requested):
+            self.send_error_xml(HTTPStatus.BAD_REQUEST, "InvalidPart")
+            return
+        data = b"".join(parts[number] for number in requested)
+        standin.objects[key] = data
+        del standin.uploads[params["uploadId"]]
+        self.send_xml(
+            xml(
+                "CompleteMultipartUploadResult",
+                ("Bucket", BUCKET),
+                ("Key", key),
+                ("ETag", etag(data)),
+            ),
+        )
+
+    def do_GET(self):  # noqa: N802
+        key, params = self.route()
+        if not key:
+            return
+        if "uploadId" in params:
+            self.list_parts(key, params)
+            return
+        data = self.server.standin.objects.get(key)
+        if data is None:
+            self.send_error_xml(HTTPStatus.NOT_FOUND, "NoSuchKey")
+            return
+        match = RANGE.fullmatch(self.headers.get("Range", ""))
+        if match:
+            start = int(match[1])
+            end = min(int(match[2] or len(data) - 1), len(data) - 1)
+            self.send_response(HTTPStatus.PARTIAL_CONTENT)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+            data = data[start : end + 1]
+        else:
+            self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", etag(data))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def list_parts(self, key: str, params: dict[str, str]) -> None:
+        parts = self.upload(params)
+        if parts is None:
+            return
+        marker = int(params.get("part-number-marker") or 0)
+        limit = int(params.get("max-parts") or PARTS_PER_PAGE)
+        numbers = sorted(number for number in parts if number > marker)
+        page, rest = numbers[:limit], numbers[limit:]
+        children: list[tuple[str, object]] = [
+            ("Bucket", BUCKET),
+            ("Key", key),
+            ("UploadId", params["uploadId"]),
+            ("IsTruncated", "true" if rest else "false"),
+        ]
+        if rest:
+            children.append(("NextPartNumberMarker", page[-1]))
+        for number in page:
+            part = ET.Element("Part")
+            ET.SubElement(part, "PartNumber").text = str(number)
+            ET.SubElement(part, "ETag").text = etag(parts[number])
+            ET.SubElement(part, "Size").text = str(len(parts[number]))
+            children.append(("Part", part))
+        self.send_xml(xml("ListPartsResult", *children))
+
+    def do_HEAD(self):  # noqa: N802
+        key, _ = self.route()
+        if not key:
+            return
+        data = self.server.standin.objects.get(key)
+        if data is None:
+            self.send_empty(HTTPStatus.NOT_FOUND)
+            return
+        self.send_empty(headers={"Content-Length": str(len(data)), "ETag": etag(data)})
+
+    def do_DELETE(self):  # noqa: N802
+        key, params = self.route()
+        if not key:
+            return
+        standin = self.server.standin
+        if "uploadId" in params:
+            if self.upload(params) is None:
+                return
+            del standin.uploads[params["uploadId"]]
+        else:
+            standin.objects.pop(key, None)
+        self.send_empty(HTTPStatus.NO_CONTENT)
+
+    def send_empty(
+        self,
+        status: int = HTTPStatus.OK,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        self.send_response(status)
+        headers = {"Content-Length": "0", **(headers or {})}
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def send_xml(self, body: bytes, status: int = HTTPStatus.OK) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_xml(self, status: int, code: str) -> None:
+        self.send_xml(xml("Error", ("Code", code), ("Message", code)), status)
+
+
+class S3StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+    standin: "S3StandIn"
+
+
+class S3StandIn:
+    """Threaded HTTP server on a free local port, for use as a context manager."""
+
+    def __init__(self):
+        self.objects: dict[str, bytes] = {}
+        # Upload id -> part number -> data.
+        self.uploads: dict[str, dict[int, bytes]] = {}
+        self.parts_uploaded = 0
+        self.ids = itertools.count(1)
+        self._server = S3StandInServer(("127.0.0.1", 0), Handler)
+        self._server.standin = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def endpoint_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    @property
+    def options(self) -> dict:
+        """``OPTIONS`` of an S3 storage in ``STORAGES``."""
+        return {
+            "bucket_name": BUCKET,
+            "endpoint_url": self.endpoint_url,
+            "access_key": "standin",
+            "secret_key": "standin",
+            "region_name": "us-east-1",
+            "addressing_style": "path",
+        }
+
+    def __enter__(self) -> "S3StandIn":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,208 @@
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from yfiles.downloads import tasks
+from yfiles.downloads.models import DownloadedFile
+from yfiles.downloads.models import DownloadJob
+from yfiles.downloads.models import FailedChunk
+from yfiles.downloads.tests.factories import DownloadedFileFactory
+from yfiles.downloads.tests.factories import DownloadJobFactory
+from yfiles.downloads.tests.factories import FailedChunkFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def published(monkeypatch) -> list[dict]:
+    events: list[dict] = []
+    monkeypatch.setattr(
+        tasks.progress,
+        "publish",
+        lambda job_id, payload: events.append(payload),
+    )
+    return events
+
+
+class TestDownloadJobAdmin:
+    def test_changelist(self, admin_client):
+        DownloadJobFactory.create_batch(2)
+        url = reverse("admin:downloads_downloadjob_changelist")
+        response = admin_client.get(url, {"q": "admin@", "status": "pending"})
+        assert response.status_code == HTTPStatus.OK
+
+    def test_cancel(self, admin_client, published):
+        running = DownloadJobFactory(status=DownloadJob.Status.RUNNING)
+        done = DownloadJobFactory(status=DownloadJob.Status.DONE)
+        response = admin_client.post(
+            reverse("admin:downloads_downloadjob_changelist"),
+            {"action": "cancel", "_selected_action": [running.pk, done.pk]},
+        )
+        assert response.status_code == HTTPStatus.FOUND
+        running.refresh_from_db()
+        done.refresh_from_db()
+        assert running.status == DownloadJob.Status.CANCELLED
+        assert done.status == DownloadJob.Status.DONE
+        assert published == [running.progress()]
+
+    def test_cancel_all_matching_in_batches(self, admin_client, published, monkeypatch):
+        monkeypatch.setattr(tasks, "JOBS_BATCH_SIZE", 2)
+        running = DownloadJobFactory.create_batch(5, status=DownloadJob.Status.RUNNING)
+        done = DownloadJobFactory(status=DownloadJob.Status.DONE)
+        url = reverse("admin:downloads_downloadjob_changelist")
+
+        # Each batch moves its jobs out of the status filter before the next.
+        response = admin_client.post(
+            f"{url}?status=running",
+            {
+                "action": "cancel",
+                "select_across": "1",
+                "index": "0",
+                "_selected_action": [running[0].pk],
+            },
+        )
+
+        assert response.status_code == HTTPStatus.FOUND
+        assert set(
+            DownloadJob.objects.exclude(pk=done.pk).values_list("status", flat=True),
+        ) == {DownloadJob.Status.CANCELLED}
+        done.refresh_from_db()
+        assert done.status == DownloadJob.Status.DONE
+        assert sorted(event["id"] for event in published) == [job.pk for job in running]
+
+    def test_requeue(
+        self,
+        admin_client,
+        monkeypatch,
+        django_capture_on_commit_callbacks,
+    ):
+        queued: list[int] = []
+        monkeypatch.setattr(tasks.load_job, "delay", queued.append)
+        job = DownloadJobFactory(
+            status=DownloadJob.Status.FAILED,
+            error="boom",
+            done_files=2,
+            done_bytes=30,
+        )
+        DownloadedFileFactory(job=job, size=10, status=DownloadedFile.Status.DONE)
+        failed = DownloadedFileFactory(
+            job=job,
+            size=20,
+            done_bytes=20,
+            status=DownloadedFile.Status.FAILED,
+        )
+        running = DownloadJobFactory(status=DownloadJob.Status.RUNNING)
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            response = admin_client.post(
+                reverse("admin:downloads_downloadjob_changelist"),
+                {"action": "requeue", "_selected_action": [job.pk, running.pk]},
+            )
+
+        assert response.status_code == HTTPStatus.FOUND
+        # Loaded only once the request commits the job as pending.
+        assert queued == []
+        for callback in callbacks:
+            callback()
+        assert queued == [job.pk]
+        job.refresh_from_db()
+        assert (job.status, job.error) == (DownloadJob.Status.PENDING, "")
+        assert (job.done_files, job.done_bytes) == (1, 10)
+        failed.refresh_from_db()
+        assert (failed.status, failed.done_bytes) == (DownloadedFile.Status.PENDING, 0)
+
+
+class TestDownloadedFileAdmin:
+    def test_changelist(self, admin_client):
+        DownloadedFileFactory(path="/photos/beach.jpg")
+        url = reverse("admin:downloads_downloadedfile_changelist")
+        response = admin_client.get(url, {"q": "beach"})
+        assert response.status_code == HTTPStatus.OK
+        assert response.context["cl"].result_count == 1
+
+
+class TestFailedChunkAdmin:
+    def test_changelist(self, admin_client):
+        chunk = FailedChunkFactory()
+        url = reverse("admin:downloads_failedchunk_changelist")
+        response = admin_client.get(url, {"q": chunk.job_id, "reason": "retries"})
+        assert response.status_code == HTTPStatus.OK
+        assert response.context["cl"].result_count == 1
+
+    def test_replay(
+        self,
+        admin_client,
+        published,
+        monkeypatch,
+        django_capture_on_commit_callbacks,
+    ):
+        sent: list[list] = []
+        monkeypatch.setattr(
+            tasks,
+            "send_many",
+            lambda task, args: sent.extend(batch for (batch,) in args),
+        )
+        chunk = FailedChunkFactory(file__size=1024, file__done_bytes=512)
+        FailedChunkFactory(file=chunk.file, offset=512, length=512)
+        job = chunk.job
+        DownloadJob.objects.filter(pk=job.pk).update(
+            done_files=1,
+            total_files=1,
+            done_bytes=512,
+            failed_bytes=512,
+        )
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            response = admin_client.post(
+                reverse("admin:downloads_failedchunk_changelist"),
+                {"action": "replay", "_selected_action": [chunk.pk]},
+            )
+
+        assert response.status_code == HTTPStatus.FOUND
+        # Queued only once the request commits the file as pending.
+        assert (sent, published) == ([], [])
+        for callback in callbacks:
+            callback()
+        job.refresh_from_db()
+        assert job.status == DownloadJob.Status.RUNNING
+        assert (job.done_files, job.done_bytes, job.failed_bytes) == (0, 0, 0)
+        chunk.file.refresh_from_db()
+        assert chunk.file.status == DownloadedFile.Status.PENDING
+        assert not FailedChunk.objects.exists()
+        assert sent == [[(chunk.file_id, 0, 1024)]]
+
+    def test_replay_in_batches(
+        self,
+        admin_client,
+        published,
+        monkeypatch,
+        django_capture_on_commit_callbacks,
+    ):
+        monkeypatch.setattr(tasks, "REPLAY_BATCH_SIZE", 2)
+        sent: list[list] = []
+        monkeypatch.setattr(
+            tasks,
+            "send_many",
+            lambda task, args: sent.extend(batch for (batch,) in args),
+        )
+        chunks = FailedChunkFactory.create_batch(3, file__size=1024)
+        FailedChunkFactory(file=chunks[0].file, offset=512, length=512)
+        DownloadJob.objects.update(done_files=1, total_files=1, failed_bytes=1024)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = admin_client.post(
+                reverse("admin:downloads_failedchunk_changelist"),
+                {
+                    "action": "replay",
+                    "select_across": "1",
+                    "index": "0",
+                    "_selected_action": [chunks[0].pk],
+                },
+            )
+
+        assert response.status_code == HTTPStatus.FOUND
+        assert not FailedChunk.objects.exists()
+        assert sorted(file_id for batch in sent for file_id, *_ in batch) == sorted(
+            chunk.file_id for chunk in chunks
+        )
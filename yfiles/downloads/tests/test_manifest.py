@@ -0,0 +1,113 @@
+import csv
+import datetime
+import io
+import json
+
+import pytest
+from django.core.management import CommandError
+from django.core.management import call_command
+from django.utils import timezone
+
+from yfiles.downloads import manifest
+from yfiles.downloads import tasks
+from yfiles.downloads.manifest import FIELDS
+from yfiles.downloads.manifest import parse_since
+from yfiles.downloads.models import DownloadedFile
+from yfiles.downloads.tests.factories import DownloadedFileFactory
+from yfiles.downloads.tests.factories import DownloadJobFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def job(monkeypatch):
+    monkeypatch.setattr(manifest, "BATCH_SIZE", 2)
+    job = DownloadJobFactory()
+    for n in range(5):
+        DownloadedFileFactory(job=job, path=f"/file-{n}", md5=f"{n:032}")
+    DownloadedFileFactory()
+    return job
+
+
+def test_reads_every_file_in_batches(job, django_assert_num_queries):
+    with django_assert_num_queries(3):
+        batches = list(manifest.batches(job.pk))
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert [row[0] for batch in batches for row in batch] == [
+        f"/file-{n}" for n in range(5)
+    ]
+
+
+def test_jsonl(job):
+    output = io.StringIO()
+
+    assert manifest.write(output, job.pk, "jsonl") == 5  # noqa: PLR2004
+
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    file = DownloadedFile.objects.get(job=job, path="/file-0")
+    assert lines[0] == {
+        "path": "/file-0",
+        "size": 1024,
+        "md5": "0" * 32,
+        "sha256": "",
+        "status": "pending",
+        "changed": file.changed.isoformat(),
+    }
+
+
+def test_csv(job):
+    output = io.StringIO()
+    manifest.write(output, job.pk, "csv")
+
+    rows = list(csv.reader(io.StringIO(output.getvalue())))
+    assert rows[0] == list(FIELDS)
+    assert [row[0] for row in rows[1:]] == [f"/file-{n}" for n in range(5)]
+
+
+def test_since(job):
+    file = job.files.get(path="/file-3")
+    since = timezone.now()
+    tasks.close_file(file, DownloadedFile.Status.DONE)
+
+    rows = [row for batch in manifest.batches(job.pk, since) for row in batch]
+
+    assert [(row[0], row[4]) for row in rows] == [("/file-3", "done")]
+
+
+def test_parse_since():
+    assert parse_since("2024-05-01T12:00:00") == datetime.datetime(
+        2024,
+        5,
+        1,
+        12,
+        tzinfo=datetime.UTC,
+    )
+    assert parse_since("2024-05-01T12:00:00+03:00").hour == 12  # noqa: PLR2004
+    with pytest.raises(ValueError, match="Not an ISO 8601"):
+        parse_since("yesterday")
+
+
+class TestExportManifestCommand:
+    def test_stdout(self, job):
+        stdout = io.StringIO()
+        call_command("export_manifest", job.pk, "--format", "csv", stdout=stdout)
+
+        assert stdout.getvalue().splitlines()[0] == ",".join(FIELDS)
+        assert len(stdout.getvalue().splitlines()) == 6  # noqa: PLR2004
+
+    def test_output(self, job, tmp_path):
+        stderr = io.StringIO()
+        output = tmp_path / "manifest.jsonl"
+        call_command("export_manifest", job.pk, "--output", output, stderr=stderr)
+
+        assert len(output.read_text().splitlines()) == 5  # noqa: PLR2004
+        assert "Wrote 5 files" in stderr.getvalue()
+
+    def test_unknown_job(self):
+        with pytest.raises(CommandError, match="does not exist"):
+            call_command("export_manifest", 0)
+
+    def test_bad_since(self, job):
+        with pytest.raises(CommandError, match="ISO 8601"):
+            call_command("export_manifest", job.pk, "--since", "yesterday")
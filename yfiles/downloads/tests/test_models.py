@@ -0,0 +1,53 @@
+import pytest
+from django.core.exceptions import SuspiciousFileOperation
+
+from yfiles.downloads.models import DownloadedFile
+from yfiles.downloads.models import DownloadJob
+from yfiles.downloads.tests.factories import DownloadedFileFactory
+from yfiles.downloads.tests.factories import DownloadJobFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_job_progress():
+    job = DownloadJobFactory(
+        status=DownloadJob.Status.RUNNING,
+        total_files=3,
+        done_files=1,
+        total_bytes=300,
+        done_bytes=120,
+    )
+    assert job.progress() == {
+        "id": job.pk,
+        "status": "running",
+        "total_files": 3,
+        "done_files": 1,
+        "total_bytes": 300,
+        "done_bytes": 120,
+        "revision": "running:1:120",
+    }
+    assert not job.is_finished
+
+
+def test_file_local_path(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    file = DownloadedFileFactory(path="/photos/cat.jpg")
+    assert (
+        file.local_path
+        == tmp_path / "downloads" / str(file.job_id) / "photos" / "cat.jpg"
+    )
+
+
+def test_file_local_path_cannot_escape_job_root():
+    file = DownloadedFile(job=DownloadJobFactory(), path="/../../etc/passwd")
+    with pytest.raises(SuspiciousFileOperation):
+        _ = file.local_path
+
+
+def test_file_storage_name():
+    file = DownloadedFile(job_id=7, path="/photos/cat.jpg")
+    assert file.storage_name == "downloads/7/photos/cat.jpg"
+
+    file.path = "/../6/cat.jpg"
+    with pytest.raises(SuspiciousFileOperation):
+        _ = file.storage_name
@@ -0,0 +1,101 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from yfiles.downloads.models import DownloadedFile
+from yfiles.downloads.pagination import InvalidCursor
+from yfiles.downloads.pagination import KeysetPaginator
+from yfiles.downloads.tests.factories import DownloadedFileFactory
+from yfiles.downloads.tests.factories import DownloadJobFactory
+
+pytestmark = pytest.mark.django_db
+
+PER_PAGE = 3
+
+
+@pytest.fixture
+def files() -> list[DownloadedFile]:
+    job = DownloadJobFactory()
+    # Repeated sizes exercise the path tie-breaker.
+    return [
+        DownloadedFileFactory(job=job, path=f"/f{n:02}", size=n % 4) for n in range(10)
+    ]
+
+
+def _paginator(files, ordering) -> KeysetPaginator:
+    queryset = DownloadedFile.objects.filter(job=files[0].job)
+    return KeysetPaginator(queryset, ordering, PER_PAGE)
+
+
+def _walk_forward(paginator: KeysetPaginator) -> list[list[str]]:
+    pages = []
+    page = paginator.page()
+    while True:
+        pages.append([f.path for f in page.object_list])
+        if not page.has_next:
+            return pages
+        page = paginator.page(after=page.next_cursor)
+
+
+@pytest.mark.parametrize(
+    "ordering",
+    [("path",), ("-path",), ("size", "path"), ("-size", "-path")],
+)
+def test_walk_forward(files, ordering):
+    expected = [
+        f.path
+        for f in DownloadedFile.objects.filter(job=files[0].job).order_by(*ordering)
+    ]
+    pages = _walk_forward(_paginator(files, ordering))
+    assert [path for page in pages for path in page] == expected
+    assert [len(page) for page in pages] == [3, 3, 3, 1]
+
+
+def test_walk_backward(files):
+    paginator = _paginator(files, ("size", "path"))
+    forward = _walk_forward(paginator)
+
+    page = paginator.page()
+    for _ in range(len(forward) - 1):
+        page = paginator.page(after=page.next_cursor)
+    backward = [[f.path for f in page.object_list]]
+    while page.has_previous:
+        page = paginator.page(before=page.previous_cursor)
+        backward.append([f.path for f in page.object_list])
+
+    assert backward[::-1] == forward
+    start = paginator.encode(page.object_list[0])
+    assert paginator.page(before=start).object_list == []
+
+
+def test_no_offset(files):
+    paginator = _paginator(files, ("size", "path"))
+    cursor = paginator.page().next_cursor
+    with CaptureQueriesContext(connection) as queries:
+        paginator.page(after=cursor)
+    [query] = queries.captured_queries
+    assert "OFFSET" not in query["sql"]
+    assert "ROW(" in query["sql"]
+
+
+def test_modified_cursor_round_trip(files):
+    paginator = _paginator(files, ("modified", "path"))
+    first = paginator.page()
+    assert first.next_cursor is not None
+    assert paginator.decode(first.next_cursor) == [
+        first.object_list[-1].modified,
+        first.object_list[-1].path,
+    ]
+
+
+def test_cursor_bound_to_ordering(files):
+    cursor = _paginator(files, ("size", "path")).page().next_cursor
+    with pytest.raises(InvalidCursor):
+        _paginator(files, ("modified", "path")).page(after=cursor)
+    with pytest.raises(InvalidCursor):
+        _paginator(files, ("size", "path")).page(after="garbage")
+
+
+def test_mixed_directions_rejected(files):
+    with pytest.raises(ValueError, match="mix directions"):
+        _paginator(files, ("-size", "path"))
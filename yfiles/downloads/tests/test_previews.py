@@ -0,0 +1,96 @@
+import hashlib
+import io
+
+import pytest
+from django.core.files.storage import storages
+from PIL import Image
+
+from yfiles.downloads import previews
+from yfiles.downloads.previews import PreviewError
+from yfiles.downloads.previews import batch_previews
+from yfiles.downloads.previews import make_preview
+from yfiles.downloads.previews import preview_name
+from yfiles.downloads.previews import render
+from yfiles.downloads.tests.factories import DownloadedFileFactory
+
+
+def _image(size=(1200, 800), mode="RGB", color="red", fmt="JPEG") -> bytes:
+    output = io.BytesIO()
+    Image.new(mode, size, color).save(output, fmt)
+    return output.getvalue()
+
+
+def test_render_fits_square():
+    with Image.open(io.BytesIO(render(_image(), 256))) as preview:
+        assert preview.format == "JPEG"
+        assert preview.size == (256, 171)
+
+
+def test_render_flattens_transparency():
+    data = _image((64, 64), "RGBA", (0, 0, 0, 0), "PNG")
+    with Image.open(io.BytesIO(render(data, 32))) as preview:
+        assert preview.getpixel((16, 16)) == (255, 255, 255)
+
+
+def test_render_rejects_other_files():
+    with pytest.raises(PreviewError):
+        render(b"not an image", 256)
+
+
+@pytest.mark.django_db
+def test_previews_are_content_addressed(monkeypatch, settings):
+    rendered = []
+
+    def render(data, size):
+        rendered.append(data)
+        return b"preview"
+
+    monkeypatch.setattr(previews, "render", render)
+    data = _image()
+    first = DownloadedFileFactory(path="/a.jpg")
+    second = DownloadedFileFactory(path="/b.jpg")
+    for file in (first, second):
+        file.local_path.parent.mkdir(parents=True)
+        file.local_path.write_bytes(data)
+
+    name = make_preview(first)
+
+    digest = hashlib.sha256(data).hexdigest()
+    assert name == preview_name(digest, settings.DOWNLOADS_PREVIEW_SIZE)
+    assert make_preview(second) == name
+    assert rendered == [data]
+    with storages["default"].open(name) as preview:
+        assert preview.read() == b"preview"
+
+
+def test_preview_name_changes_with_size_and_version(monkeypatch):
+    digest = "ab" * 32
+    name = preview_name(digest, 256)
+    assert preview_name(digest, 512) != name
+    monkeypatch.setattr(previews, "VERSION", previews.VERSION + 1)
+    assert preview_name(digest, 256) != name
+
+
+@pytest.mark.django_db
+def test_upstream_hash_skips_reading_the_source(settings):
+    digest = "ab" * 32
+    name = preview_name(digest, settings.DOWNLOADS_PREVIEW_SIZE)
+    storages["default"].save(name, io.BytesIO(b"preview"))
+    file = DownloadedFileFactory(path="/missing.jpg", sha256=digest)
+
+    assert make_preview(file) == name
+
+
+@pytest.mark.django_db
+def test_missing_source():
+    with pytest.raises(PreviewError):
+        make_preview(DownloadedFileFactory(path="/missing.jpg"))
+
+
+def test_batch_previews(settings):
+    settings.DOWNLOADS_PREVIEWS_PER_TASK = 3
+    settings.DOWNLOADS_PREVIEW_BYTES_PER_TASK = 10
+    images = [(1, 4), (2, 4), (3, 1), (4, 1), (5, 20), (6, 2)]
+
+    assert list(batch_previews(images)) == [[1, 2, 3], [4], [5], [6]]
+    assert list(batch_previews([])) == []
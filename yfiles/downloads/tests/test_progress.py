@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync
+
+from yfiles.downloads.progress import QUEUE_SIZE
+from yfiles.downloads.progress import ProgressEvent
+from yfiles.downloads.progress import ProgressHub
+from yfiles.downloads.progress import encode_sse
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    hub = ProgressHub()
+    # Nothing to listen to: the tests dispatch events themselves.
+    monkeypatch.setattr(hub, "_ensure_listener", lambda: None)
+    return hub
+
+
+DONE_BYTES = 10
+
+
+def _event(done_bytes):
+    data = {"id": 1, "done_bytes": done_bytes}
+    return ProgressEvent(data, encode_sse(data))
+
+
+def test_encode_sse():
+    assert (
+        encode_sse({"id": 1, "status": "done"}) == 'data: {"id":1,"status":"done"}\n\n'
+    )
+
+
+def test_dispatch_fans_out_to_job_subscribers(hub):
+    async def scenario():
+        async with (
+            hub.subscribe(1) as first,
+            hub.subscribe(1) as second,
+            hub.subscribe(2) as other,
+        ):
+            assert hub.subscriber_count == len([first, second, other])
+            hub.dispatch(1, _event(DONE_BYTES))
+            assert (await first.get()).data["done_bytes"] == DONE_BYTES
+            assert (await second.get()).data["done_bytes"] == DONE_BYTES
+            assert other.empty()
+        assert hub.subscriber_count == 0
+
+    async_to_sync(scenario)()
+
+
+def test_slow_subscriber_keeps_latest_events(hub):
+    async def scenario():
+        async with hub.subscribe(1) as queue:
+            for done_bytes in range(QUEUE_SIZE + 5):
+                hub.dispatch(1, _event(done_bytes))
+            received = [
+                queue.get_nowait().data["done_bytes"] for _ in range(queue.qsize())
+            ]
+        assert received == list(range(5, QUEUE_SIZE + 5))
+
+    async_to_sync(scenario)()
+
+
+def test_subscribers_are_bound_to_their_event_loop(hub):
+    async def subscribe_and_leak():
+        # Keep the subscription open when the loop goes away.
+        await hub.subscribe(1).__aenter__()
+        assert hub.subscriber_count == 1
+
+    asyncio.run(subscribe_and_leak())
+
+    async def fresh_loop():
+        async with hub.subscribe(2):
+            assert hub.subscriber_count == 1
+
+    asyncio.run(fresh_loop())
@@ -0,0 +1,59 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from yfiles.downloads.search import bump_search_version
+from yfiles.downloads.search import search_files
+from yfiles.downloads.tests.factories import DownloadedFileFactory
+from yfiles.downloads.tests.factories import DownloadJobFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def job():
+    job = DownloadJobFactory()
+    for path in [
+        "/photos/2024/beach.jpg",
+        "/photos/2024/beaches-of-crimea.jpg",
+        "/docs/report.pdf",
+        "/music/Beach Boys/surfin.mp3",
+    ]:
+        DownloadedFileFactory(job=job, path=path)
+    return job
+
+
+def test_substring_case_insensitive(job):
+    paths = [r["path"] for r in search_files(job.user_id, "BEACH")]
+    assert sorted(paths) == [
+        "/music/Beach Boys/surfin.mp3",
+        "/photos/2024/beach.jpg",
+        "/photos/2024/beaches-of-crimea.jpg",
+    ]
+
+
+def test_ranked_by_similarity(job):
+    results = search_files(job.user_id, "beach.jpg")
+    assert results[0]["path"] == "/photos/2024/beach.jpg"
+    assert results == sorted(results, key=lambda r: -r["similarity"])
+
+
+def test_restricted_to_user(job):
+    DownloadedFileFactory(path="/someone/else/beach.jpg")
+    assert all(r["job_id"] == job.pk for r in search_files(job.user_id, "beach"))
+
+
+def test_short_query_matches_nothing(job):
+    assert search_files(job.user_id, " ab ") == []
+
+
+def test_cached_until_version_bump(job):
+    with CaptureQueriesContext(connection) as queries:
+        first = search_files(job.user_id, "report")
+        assert search_files(job.user_id, "Report") == first
+    assert len(queries) == 1
+
+    DownloadedFileFactory(job=job, path="/docs/report-2.pdf")
+    assert search_files(job.user_id, "report") == first
+    bump_search_version(job.user_id)
+    assert len(search_files(job.user_id, "report")) == len(first) + 1
@@ -0,0 +1,84 @@
+import errno
+import os
+
+import pytest
+
+from yfiles.downloads import staging
+
+
+@pytest.fixture
+def staged(tmp_path):
+    path = tmp_path / "staging" / "1" / "1"
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b"x" * 1000 + b"y" * 24)
+    return path
+
+
+def test_move(tmp_path, staged):
+    destination = tmp_path / "media" / "dir" / "a.bin"
+
+    staging.move(staged, destination)
+
+    assert destination.read_bytes() == b"x" * 1000 + b"y" * 24
+    assert not staged.exists()
+    assert list(destination.parent.iterdir()) == [destination]
+
+
+def test_move_in_blocks(tmp_path, staged, monkeypatch):
+    monkeypatch.setattr(staging, "COPY_BLOCK_SIZE", 100)
+
+    staging.move(staged, tmp_path / "a.bin")
+
+    assert (tmp_path / "a.bin").read_bytes() == b"x" * 1000 + b"y" * 24
+
+
+def test_move_across_file_systems(tmp_path, staged, monkeypatch):
+    def copy_file_range(src, dst, count):
+        os.write(dst, b"partial")
+        raise OSError(errno.EXDEV, os.strerror(errno.EXDEV))
+
+    monkeypatch.setattr(os, "copy_file_range", copy_file_range)
+
+    staging.move(staged, tmp_path / "a.bin")
+
+    assert (tmp_path / "a.bin").read_bytes() == b"x" * 1000 + b"y" * 24
+
+
+def test_move_failure_leaves_no_partial_file(tmp_path, staged, monkeypatch):
+    def copy_file_range(src, dst, count):
+        raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC))
+
+    monkeypatch.setattr(os, "copy_file_range", copy_file_range)
+
+    with pytest.raises(OSError, match="No space left"):
+        staging.move(staged, tmp_path / "media" / "a.bin")
+
+    assert list((tmp_path / "media").iterdir()) == []
+    assert staged.exists()
+
+
+def test_move_falls_back_when_a_copy_stops_short(tmp_path, staged, monkeypatch):
+    def copy_file_range(src, dst, count):
+        return 0 if os.lseek(dst, 0, os.SEEK_CUR) else os.write(dst, b"x" * 100)
+
+    monkeypatch.setattr(os, "copy_file_range", copy_file_range)
+    monkeypatch.setattr(os, "sendfile", lambda dst, src, offset, count: 0)
+
+    staging.move(staged, tmp_path / "a.bin")
+
+    assert (tmp_path / "a.bin").read_bytes() == b"x" * 1000 + b"y" * 24
+
+
+def test_move_short_copy_leaves_no_partial_file(tmp_path, staged, monkeypatch):
+    def copyfileobj(src, dst, length):
+        dst.write(src.read(100))
+
+    monkeypatch.setattr(os, "copy_file_range", lambda src, dst, count: 0)
+    monkeypatch.setattr(os, "sendfile", lambda dst, src, offset, count: 0)
+    monkeypatch.setattr(staging.shutil, "copyfileobj", copyfileobj)
+
+    with pytest.raises(staging.ShortCopyError, match="Copied 100 of 1024 bytes"):
+        staging.move(staged, tmp_path / "media" / "a.bin")
+
+    assert list((tmp_path / "media").iterdir()) == []
+    assert staged.exists()
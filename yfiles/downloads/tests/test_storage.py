@@ -0,0 +1,60 @@
+import hashlib
+
+import pytest
+from django.core.files.storage import storages
+
+from yfiles.downloads import storage
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def store(s3) -> storage.MultipartStorage:
+    store = storage.multipart()
+    assert store is not None
+    return store
+
+
+def test_multipart_is_off_for_other_storages():
+    assert storage.multipart() is None
+
+
+def test_upload_in_parts(s3, store):
+    assert store is storages["default"]
+    upload_id = store.create_upload("downloads/1/a.bin")
+
+    # Workers upload parts in any order, and again on retry.
+    store.upload_part("downloads/1/a.bin", upload_id, 2, b"y" * 3)
+    store.upload_part("downloads/1/a.bin", upload_id, 1, b"?" * 5 * MB)
+    store.upload_part("downloads/1/a.bin", upload_id, 1, b"x" * 5 * MB)
+    assert s3.objects == {}
+    size = store.complete_upload("downloads/1/a.bin", upload_id)
+
+    data = b"x" * 5 * MB + b"y" * 3
+    assert size == len(data)
+    assert s3.objects == {"downloads/1/a.bin": data}
+    assert s3.uploads == {}
+    assert store.md5("downloads/1/a.bin") == (
+        hashlib.md5(data, usedforsecurity=False).hexdigest(),
+        len(data),
+    )
+
+
+def test_complete_upload_twice(store):
+    upload_id = store.create_upload("a.bin")
+    store.upload_part("a.bin", upload_id, 1, b"data")
+    store.complete_upload("a.bin", upload_id)
+
+    with pytest.raises(storage.NoSuchUploadError):
+        store.complete_upload("a.bin", upload_id)
+
+
+def test_abort_upload(s3, store):
+    upload_id = store.create_upload("a.bin")
+    store.upload_part("a.bin", upload_id, 1, b"data")
+
+    store.abort_upload("a.bin", upload_id)
+    store.abort_upload("a.bin", upload_id)
+
+    assert s3.uploads == {}
+    assert s3.objects == {}
@@ -0,0 +1,706 @@
+import hashlib
+import io
+from pathlib import Path
+
+import pytest
+import requests
+from celery.exceptions import Retry
+from celery.exceptions import SoftTimeLimitExceeded
+from django.conf import settings
+from django.utils import timezone
+from kombu.serialization import dumps
+from kombu.serialization import loads
+from kombu.serialization import prepare_accept_content
+from PIL import Image
+
+from yfiles.core import dispatch
+from yfiles.downloads import progress
+from yfiles.downloads import staging
+from yfiles.downloads import storage
+from yfiles.downloads import tasks
+from yfiles.downloads import yandex
+from yfiles.downloads.models import DownloadedFile
+from yfiles.downloads.models import DownloadJob
+from yfiles.downloads.models import FailedChunk
+from yfiles.downloads.search import search_files
+from yfiles.downloads.tasks import FINALIZE_MAX_RETRIES
+from yfiles.downloads.tasks import FileGoneError
+from yfiles.downloads.tasks import batch_chunks
+from yfiles.downloads.tasks import download_chunk
+from yfiles.downloads.tasks import download_chunks
+from yfiles.downloads.tasks import finalize_file
+from yfiles.downloads.tasks import iter_chunks
+from yfiles.downloads.tasks import load_job
+from yfiles.downloads.tasks import prune_staging
+from yfiles.downloads.tasks import queue_chunks
+from yfiles.downloads.tasks import retry_chunk
+from yfiles.downloads.tests.factories import DownloadedFileFactory
+from yfiles.downloads.tests.factories import DownloadJobFactory
+
+pytestmark = pytest.mark.django_db
+
+DOWNLOADER = "https://downloader.example.com"
+
+
+@pytest.fixture
+def published(monkeypatch):
+    events: list[dict] = []
+    monkeypatch.setattr(
+        progress,
+        "publish",
+        lambda job_id, payload: events.append(payload),
+    )
+    return events
+
+
+@pytest.fixture
+def upstream(monkeypatch, settings):
+    """Serve a public folder from a dict of ``path -> content``."""
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    files: dict[str, bytes] = {}
+
+    def iter_files(public_key):
+        for path, data in files.items():
+            md5 = hashlib.md5(data, usedforsecurity=False).hexdigest()
+            yield yandex.PublicFile(path, len(data), timezone.now(), md5, "")
+
+    def iter_range(url, offset, length):
+        yield files[url.removeprefix(DOWNLOADER)][offset : offset + length]
+
+    monkeypatch.setattr(yandex, "iter_files", iter_files)
+    monkeypatch.setattr(yandex, "get_download_url", lambda key, path: DOWNLOADER + path)
+    monkeypatch.setattr(yandex, "iter_range", iter_range)
+    return files
+
+
+def test_iter_chunks():
+    assert list(iter_chunks(10, 4)) == [(0, 4), (4, 4), (8, 2)]
+    assert list(iter_chunks(0, 4)) == []
+
+
+def test_batch_chunks(settings):
+    settings.DOWNLOADS_CHUNKS_PER_TASK = 3
+    settings.DOWNLOADS_BYTES_PER_TASK = 10
+    chunks = [(1, 0, 4), (1, 4, 4), (2, 0, 1), (2, 1, 1), (3, 0, 20), (4, 0, 2)]
+
+    assert list(batch_chunks(chunks)) == [
+        [(1, 0, 4), (1, 4, 4), (2, 0, 1)],
+        [(2, 1, 1)],
+        [(3, 0, 20)],
+        [(4, 0, 2)],
+    ]
+    assert list(batch_chunks([])) == []
+
+
+def test_chunk_batches_travel_as_msgpack():
+    batch = [(1, 0, 8 * 1024 * 1024), (2, 8 * 1024 * 1024, 1)]
+    content_type, encoding, body = dumps([batch], download_chunks.serializer)
+
+    assert content_type == "application/x-msgpack"
+    assert len(body) < len(dumps([batch], "json")[2])
+    accept = prepare_accept_content(download_chunks.app.conf.accept_content)
+    decoded = loads(body, content_type, encoding, accept=accept)
+    assert decoded == [[list(chunk) for chunk in batch]]
+
+
+def test_only_jobs_store_results():
+    assert download_chunks.ignore_result
+    assert download_chunk.ignore_result
+    assert not load_job.ignore_result
+
+
+def test_load_job(settings, upstream, published):
+    settings.DOWNLOADS_CHUNK_SIZE = 4
+    upstream["/a.txt"] = b"hello world"
+    upstream["/dir/empty"] = b""
+    job = DownloadJobFactory()
+
+    load_job(job.pk)
+
+    job.refresh_from_db()
+    assert job.status == DownloadJob.Status.DONE
+    assert (job.total_files, job.done_files) == (2, 2)
+    assert (job.total_bytes, job.done_bytes) == (11, 11)
+    assert set(job.files.values_list("status", flat=True)) == {
+        DownloadedFile.Status.DONE,
+    }
+    assert (job.local_root / "a.txt").read_bytes() == b"hello world"
+    assert (job.local_root / "dir" / "empty").read_bytes() == b""
+    assert published[-1] == job.progress()
+
+
+def test_load_job_makes_previews(
+    upstream,
+    published,
+    django_capture_on_commit_callbacks,
+):
+    image = io.BytesIO()
+    Image.new("RGB", (640, 480), "blue").save(image, "JPEG")
+    upstream["/photos/a.jpg"] = image.getvalue()
+    upstream["/photos/broken.PNG"] = b"not an image"
+    upstream["/notes.txt"] = b"hello"
+    job = DownloadJobFactory()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        load_job(job.pk)
+
+    previews = dict(job.files.values_list("path", "preview"))
+    assert previews["/photos/broken.PNG"] == ""
+    assert previews["/notes.txt"] == ""
+    with Image.open(Path(settings.MEDIA_ROOT) / previews["/photos/a.jpg"]) as preview:
+        assert preview.size == (256, 192)
+
+    DownloadedFile.objects.update(preview="")
+    assert tasks.queue_previews(job.pk) == 1
+    assert job.files.get(path="/photos/a.jpg").preview == previews["/photos/a.jpg"]
+
+
+def test_finish_job_queues_previews_on_commit(
+    monkeypatch,
+    published,
+    django_capture_on_commit_callbacks,
+):
+    job = DownloadJobFactory(status=DownloadJob.Status.RUNNING)
+    queued: list[int] = []
+    monkeypatch.setattr(tasks, "queue_previews", queued.append)
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        tasks.finish_job(job.pk)
+        assert queued == []
+
+    assert len(callbacks) == 1
+    assert queued == [job.pk]
+
+
+def test_make_previews_sends_on_the_image_out_of_time(monkeypatch):
+    job = DownloadJobFactory()
+    files = DownloadedFileFactory.create_batch(
+        3,
+        job=job,
+        status=DownloadedFile.Status.DONE,
+    )
+
+    def make_preview(file):
+        if file.pk == files[1].pk:
+            raise SoftTimeLimitExceeded
+        return "previews/a.jpg"
+
+    sent: list[tuple] = []
+    monkeypatch.setattr(tasks.previews, "make_preview", make_preview)
+    monkeypatch.setattr(
+        tasks.make_previews,
+        "apply_async",
+        lambda args, **options: sent.append(args),
+    )
+
+    tasks.make_previews([file.pk for file in files])
+
+    assert list(job.files.order_by("pk").values_list("preview", flat=True)) == [
+        "previews/a.jpg",
+        "",
+        "",
+    ]
+    assert sent == [([files[1].pk, files[2].pk],)]
+
+
+def test_load_job_stages_chunks(settings, upstream, published, tmp_path):
+    settings.DOWNLOADS_CHUNK_SIZE = 4
+    settings.DOWNLOADS_STAGING_ROOT = str(tmp_path / "staging")
+    upstream["/a.txt"] = b"hello world"
+    upstream["/dir/empty"] = b""
+    job = DownloadJobFactory()
+
+    load_job(job.pk)
+
+    job.refresh_from_db()
+    assert job.status == DownloadJob.Status.DONE
+    assert (job.total_files, job.done_files) == (2, 2)
+    assert (job.local_root / "a.txt").read_bytes() == b"hello world"
+    assert (job.local_root / "dir" / "empty").read_bytes() == b""
+    assert list((tmp_path / "staging" / str(job.pk)).iterdir()) == []
+
+
+def test_finalize_file_counts_once(settings, published, tmp_path):
+    settings.DOWNLOADS_STAGING_ROOT = str(tmp_path / "staging")
+    file = DownloadedFileFactory(
+        job__status=DownloadJob.Status.RUNNING,
+        job__total_files=1,
+        size=4,
+        done_bytes=4,
+    )
+    staged = tmp_path / "staging" / str(file.job_id) / str(file.pk)
+    staged.parent.mkdir(parents=True)
+    staged.write_bytes(b"data")
+
+    finalize_file(file.pk)
+    finalize_file(file.pk)
+
+    file.refresh_from_db()
+    file.job.refresh_from_db()
+    assert file.status == DownloadedFile.Status.DONE
+    assert file.local_path.read_bytes() == b"data"
+    assert not staged.exists()
+    assert file.job.done_files == 1
+    assert file.job.status == DownloadJob.Status.DONE
+
+
+def test_finalize_file_quarantines_a_lost_staged_copy(settings, published, tmp_path):
+    settings.DOWNLOADS_STAGING_ROOT = str(tmp_path / "staging")
+    file = DownloadedFileFactory(
+        job__status=DownloadJob.Status.RUNNING,
+        job__total_files=1,
+        size=4,
+        done_bytes=4,
+    )
+
+    finalize_file(file.pk)
+
+    file.refresh_from_db()
+    file.job.refresh_from_db()
+    assert file.status == DownloadedFile.Status.FAILED
+    assert file.failed_chunks.get().reason == FailedChunk.Reason.LOST
+    assert file.job.status == DownloadJob.Status.FAILED
+
+
+def test_finalize_file_skips_files_of_cancelled_jobs(settings, published, tmp_path):
+    settings.DOWNLOADS_STAGING_ROOT = str(tmp_path / "staging")
+    file = DownloadedFileFactory(job__status=DownloadJob.Status.CANCELLED)
+
+    finalize_file(file.pk)
+
+    file.refresh_from_db()
+    assert file.status == DownloadedFile.Status.PENDING
+    assert not FailedChunk.objects.exists()
+
+
+def test_finalize_file_quarantines_after_retries(
+    settings,
+    published,
+    monkeypatch,
+    tmp_path,
+):
+    settings.DOWNLOADS_STAGING_ROOT = str(tmp_path / "staging")
+    file = DownloadedFileFactory(
+        job__status=DownloadJob.Status.RUNNING,
+        job__total_files=1,
+        size=4,
+        done_bytes=4,
+    )
+
+    def move(source, destination):
+        raise PermissionError(destination)
+
+    def retry(exc, countdown):
+        return Retry(exc=exc, when=countdown)
+
+    monkeypatch.setattr(staging, "move", move)
+    monkeypatch.setattr(finalize_file, "retry", retry)
+
+    with pytest.raises(Retry):
+        finalize_file.apply((file.pk,), retries=FINALIZE_MAX_RETRIES - 1, throw=True)
+    file.refresh_from_db()
+    assert file.status == DownloadedFile.Status.PENDING
+
+    finalize_file.apply((file.pk,), retries=FINALIZE_MAX_RETRIES, throw=True)
+
+    file.refresh_from_db()
+    file.job.refresh_from_db()
+    assert file.status == DownloadedFile.Status.FAILED
+    failed = file.failed_chunks.get()
+    assert failed.reason == FailedChunk.Reason.RETRIES
+    assert failed.retries == FINALIZE_MAX_RETRIES
+    assert file.job.status == DownloadJob.Status.FAILED
+
+
+def test_staged_checksum_mismatch_is_discarded(
+    settings,
+    upstream,
+    published,
+    monkeypatch,
+    tmp_path,
+):
+    settings.DOWNLOADS_STAGING_ROOT = str(tmp_path / "staging")
+    upstream["/a.txt"] = b"hello"
+    monkeypatch.setattr(
+        yandex,
+        "iter_range",
+        lambda url, offset, length: iter([b"HELLO"]),
+    )
+    job = DownloadJobFactory()
+
+    load_job(job.pk)
+
+    assert job.files.get().status == DownloadedFile.Status.FAILED
+    assert not job.files.get().local_path.exists()
+    assert list((tmp_path / "staging" / str(job.pk)).iterdir()) == []
+
+
+def test_load_job_uploads_parts(settings, upstream, published, s3):
+    settings.DOWNLOADS_CHUNK_SIZE = 1
+    data = bytes(range(256)) * 24 * 1024 + b"tail"
+    upstream["/a.bin"] = data
+    upstream["/dir/empty"] = b""
+    job = DownloadJobFactory()
+
+    load_job(job.pk)
+
+    job.refresh_from_db()
+    assert job.status == DownloadJob.Status.DONE
+    assert (job.total_files, job.done_files) == (2, 2)
+    # Chunks grow to the smallest part S3 takes: one part each.
+    assert s3.parts_uploaded == 2  # noqa: PLR2004
+    assert s3.objects == {
+        f"downloads/{job.pk}/a.bin": data,
+        f"downloads/{job.pk}/dir/empty": b"",
+    }
+    assert s3.uploads == {}
+    assert not job.local_root.exists()
+    assert set(job.files.values_list("upload_id", flat=True)) == {""}
+
+
+def test_parts_keep_the_chunk_size_of_their_upload(settings, monkeypatch, s3):
+    settings.DOWNLOADS_CHUNK_SIZE = 1
+    part = storage.MIN_PART_SIZE
+    data = b"a" * part + b"tail"
+    monkeypatch.setattr(
+        yandex,
+        "iter_range",
+        lambda url, offset, length: iter([data[offset : offset + length]]),
+    )
+    file_id = DownloadedFileFactory(size=len(data)).pk
+    store = storage.multipart()
+    assert store is not None
+    tasks.upload_chunk(store, DownloadedFile.objects.get(pk=file_id), "url", 0, part)
+
+    # A deploy raises the chunk size while the upload is under way.
+    settings.DOWNLOADS_CHUNK_SIZE = 2 * part
+    file = DownloadedFile.objects.get(pk=file_id)
+    tasks.upload_chunk(store, file, "url", part, len(data) - part)
+
+    assert file.upload_chunk_size == part
+    assert s3.uploads[file.upload_id] == {1: data[:part], 2: b"tail"}
+
+
+def test_uploaded_checksum_mismatch(upstream, published, monkeypatch, s3):
+    upstream["/a.txt"] = b"hello"
+    monkeypatch.setattr(
+        yandex,
+        "iter_range",
+        lambda url, offset, length: iter([b"HELLO"]),
+    )
+    job = DownloadJobFactory()
+
+    load_job(job.pk)
+
+    job.refresh_from_db()
+    assert job.status == DownloadJob.Status.FAILED
+    assert job.failed_chunks.get().reason == FailedChunk.Reason.CHECKSUM
+    assert s3.objects == {}
+
+
+def test_failed_file_aborts_its_upload(
+    settings,
+    upstream,
+    published,
+    monkeypatch,
+    s3,
+):
+    settings.DOWNLOADS_CHUNK_SIZE = 1
+    upstream["/a.bin"] = b"x" * (tasks.storage.MIN_PART_SIZE + 1)
+    iter_range = yandex.iter_range
+
+    def fail_the_last_part(url, offset, length):
+        if offset:
+            raise FileGoneError
+        return iter_range(url, offset, length)
+
+    monkeypatch.setattr(yandex, "iter_range", fail_the_last_part)
+    job = DownloadJobFactory()
+
+    load_job(job.pk)
+
+    assert job.files.get().status == DownloadedFile.Status.FAILED
+    assert s3.parts_uploaded == 1
+    assert s3.uploads == {}
+    assert s3.objects == {}
+
+
+def test_prune_staging(settings, tmp_path):
+    settings.DOWNLOADS_STAGING_ROOT = str(tmp_path)
+    running = DownloadJobFactory(status=DownloadJob.Status.RUNNING)
+    done = DownloadJobFactory(status=DownloadJob.Status.DONE)
+    for job_id in (running.pk, done.pk, done.pk + 1):
+        (tmp_path / str(job_id)).mkdir()
+        (tmp_path / str(job_id) / "1").write_bytes(b"data")
+
+    assert prune_staging() == 2  # noqa: PLR2004
+    assert [path.name for path in tmp_path.iterdir()] == [str(running.pk)]
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Record the chunk batches of every ``send_many`` call, then send them."""
+    calls: list[list] = []
+
+    def send_many(task, args, **options):
+        args = list(args)
+        if task is download_chunks:
+            calls.append([batch for (batch,) in args])
+        return dispatch.send_many(task, args, **options)
+
+    monkeypatch.setattr(tasks, "send_many", send_many)
+    return calls
+
+
+def test_load_job_batches_chunks(settings, upstream, published, sent):
+    settings.DOWNLOADS_CHUNK_SIZE = 2
+    settings.DOWNLOADS_CHUNKS_PER_TASK = 4
+    upstream["/a.txt"] = b"hello world"
+    upstream["/b.txt"] = b"bye"
+
+    load_job(DownloadJobFactory().pk)
+
+    [batches] = sent
+    assert [len(batch) for batch in batches] == [4, 4]
+
+
+def test_load_job_queues_ahead_as_workers_drain(settings, upstream, published, sent):
+    settings.DOWNLOADS_CHUNK_SIZE = 4
+    settings.DOWNLOADS_QUEUE_AHEAD = 8
+    for name in "abcd":
+        upstream[f"/{name}.txt"] = b"12345678"
+    job = DownloadJobFactory()
+
+    load_job(job.pk)
+
+    job.refresh_from_db()
+    assert job.status == DownloadJob.Status.DONE
+    assert job.queued_bytes == job.done_bytes == 32  # noqa: PLR2004
+    # One file of two chunks at a time, each queued once the last one is done.
+    assert [len(batch) for [batch] in sent] == [2, 2, 2, 2]
+    assert len({chunk[0] for [batch] in sent for chunk in batch}) == 4  # noqa: PLR2004
+
+
+def test_queue_chunks_skips_finished_jobs(upstream, sent):
+    file = DownloadedFileFactory(job__status=DownloadJob.Status.CANCELLED)
+
+    assert queue_chunks(file.job_id) == 0
+    assert sent == []
+
+
+def test_download_chunks_retries_the_rest(settings, upstream, published, monkeypatch):
+    settings.DOWNLOADS_CHUNK_SIZE = 4
+    upstream["/a.txt"] = b"hello world"
+    fetched = []
+    fail = {(4, 4)}
+
+    def iter_range(url, offset, length):
+        fetched.append(offset)
+        if (offset, length) in fail:
+            fail.clear()
+            msg = "Service unavailable."
+            raise yandex.YandexDiskError(msg, status=503)
+        yield upstream[url.removeprefix(DOWNLOADER)][offset : offset + length]
+
+    monkeypatch.setattr(yandex, "iter_range", iter_range)
+    job = DownloadJobFactory()
+
+    load_job(job.pk)
+
+    job.refresh_from_db()
+    assert fetched == [0, 4, 4, 8]
+    assert job.status == DownloadJob.Status.DONE
+    assert job.done_bytes == job.total_bytes == 11  # noqa: PLR2004
+    assert (job.local_root / "a.txt").read_bytes() == b"hello world"
+
+
+def test_record_chunk_counts_each_chunk_once(published):
+    file = DownloadedFileFactory(size=8, job__status=DownloadJob.Status.RUNNING)
+
+    # Delivered twice, or left queued from before a replay of the file.
+    tasks.record_chunk(file, 0, 4)
+    tasks.record_chunk(file, 0, 4)
+
+    file.refresh_from_db()
+    assert (file.status, file.done_bytes) == (DownloadedFile.Status.PENDING, 4)
+    assert file.done_offsets == [0]
+
+    tasks.record_chunk(file, 4, 4)
+
+    file.refresh_from_db()
+    file.job.refresh_from_db()
+    assert file.done_bytes == file.job.done_bytes == 8  # noqa: PLR2004
+    assert file.status == DownloadedFile.Status.DONE
+    assert file.done_offsets == []
+
+
+def test_download_chunks_retries_unexpected_errors(
+    settings,
+    upstream,
+    published,
+    monkeypatch,
+):
+    settings.DOWNLOADS_CHUNK_SIZE = 4
+    upstream["/a.txt"] = b"hello world"
+    write_chunk = tasks.write_chunk
+    full = [4]
+
+    def flaky_write_chunk(path, url, offset, length):
+        if offset in full:
+            full.clear()
+            msg = "No space left on device"
+            raise OSError(28, msg)
+        write_chunk(path, url, offset, length)
+
+    monkeypatch.setattr(tasks, "write_chunk", flaky_write_chunk)
+    job = DownloadJobFactory()
+
+    load_job(job.pk)
+
+    job.refresh_from_db()
+    assert job.status == DownloadJob.Status.DONE
+    assert (job.local_root / "a.txt").read_bytes() == b"hello world"
+
+
+def test_download_chunks_quarantines_unsafe_paths(upstream, published):
+    upstream["/../escape.txt"] = b"outside"
+    upstream["/b.txt"] = b"inside"
+    job = DownloadJobFactory()
+
+    load_job(job.pk)
+
+    job.refresh_from_db()
+    assert job.status == DownloadJob.Status.FAILED
+    chunk = job.failed_chunks.get()
+    assert (chunk.file.path, chunk.reason) == (
+        "/../escape.txt",
+        FailedChunk.Reason.UNSAFE_PATH,
+    )
+    assert (job.local_root / "b.txt").read_bytes() == b"inside"
+
+
+def test_download_chunks_quarantines_after_retries(
+    settings,
+    upstream,
+    published,
+    monkeypatch,
+):
+    settings.DOWNLOADS_CHUNK_SIZE = 4
+    settings.DOWNLOADS_MAX_RETRIES = 2
+    upstream["/a.txt"] = b"12345678"
+    upstream["/b.txt"] = b"1234"
+    attempts = []
+
+    def iter_range(url, offset, length):
+        if url.endswith("/a.txt") and offset:
+            attempts.append(offset)
+            msg = "Service unavailable."
+            raise yandex.YandexDiskError(msg, status=503)
+        yield upstream[url.removeprefix(DOWNLOADER)][offset : offset + length]
+
+    monkeypatch.setattr(yandex, "iter_range", iter_range)
+    job = DownloadJobFactory()
+
+    load_job(job.pk)
+
+    job.refresh_from_db()
+    assert attempts == [4, 4, 4]
+    assert job.status == DownloadJob.Status.FAILED
+    assert (job.done_files, job.done_bytes, job.failed_bytes) == (2, 8, 4)
+    chunk = job.failed_chunks.get()
+    assert (chunk.file.path, chunk.offset, chunk.length) == ("/a.txt", 4, 4)
+    assert (chunk.reason, chunk.retries) == (FailedChunk.Reason.RETRIES, 2)
+    assert chunk.error == "Service unavailable."
+    assert job.files.get(path="/b.txt").status == DownloadedFile.Status.DONE
+
+
+def test_download_chunks_quarantines_gone_files(upstream, published, monkeypatch):
+    upstream["/a.txt"] = b"hello"
+
+    def get_download_url(public_key, path):
+        msg = "Resource not found."
+        raise yandex.YandexDiskError(msg, status=404)
+
+    monkeypatch.setattr(yandex, "get_download_url", get_download_url)
+    job = DownloadJobFactory()
+
+    load_job(job.pk)
+
+    job.refresh_from_db()
+    assert job.status == DownloadJob.Status.FAILED
+    chunk = job.failed_chunks.get()
+    assert (chunk.reason, chunk.retries) == (FailedChunk.Reason.NOT_FOUND, 0)
+
+
+def test_retry_chunk_uses_the_retry_queue(settings, monkeypatch):
+    settings.DOWNLOADS_MAX_RETRIES = 20
+    settings.DOWNLOADS_RETRY_BACKOFF_MAX = 5
+    calls: list[tuple] = []
+    monkeypatch.setattr(
+        download_chunks,
+        "apply_async",
+        lambda args, **options: calls.append((args, options)),
+    )
+
+    retry_chunk((1, 0, 4), requests.ConnectionError(), retries=10)
+
+    [(args, options)] = calls
+    assert args == ([(1, 0, 4)],)
+    assert options["queue"] == "downloads-retry"
+    assert options["retries"] == 11  # noqa: PLR2004
+    assert 0 <= options["countdown"] <= 5  # noqa: PLR2004
+
+
+def test_load_job_refreshes_search(upstream, published):
+    job = DownloadJobFactory()
+    assert search_files(job.user_id, "report") == []
+    upstream["/report.pdf"] = b"pdf"
+
+    load_job(job.pk)
+
+    [result] = search_files(job.user_id, "report")
+    assert result["path"] == "/report.pdf"
+
+
+def test_load_job_checksum_mismatch(settings, upstream, published, monkeypatch):
+    upstream["/a.txt"] = b"hello"
+    monkeypatch.setattr(
+        yandex,
+        "iter_range",
+        lambda url, offset, length: iter([b"HELLO"]),
+    )
+    job = DownloadJobFactory()
+
+    load_job(job.pk)
+
+    job.refresh_from_db()
+    assert job.status == DownloadJob.Status.FAILED
+    assert job.files.get().status == DownloadedFile.Status.FAILED
+    assert job.failed_chunks.get().reason == FailedChunk.Reason.CHECKSUM
+
+
+def test_load_job_listing_error(upstream, published, monkeypatch):
+    def iter_files(public_key):
+        msg = "Resource not found."
+        raise yandex.YandexDiskError(msg, status=404)
+
+    monkeypatch.setattr(yandex, "iter_files", iter_files)
+    job = DownloadJobFactory()
+
+    load_job(job.pk)
+
+    job.refresh_from_db()
+    assert job.status == DownloadJob.Status.FAILED
+    assert job.error == "Resource not found."
+    assert published[-1]["status"] == "failed"
+
+
+def test_download_chunk_skips_cancelled_job(upstream, published):
+    file = DownloadedFileFactory(job__status=DownloadJob.Status.CANCELLED, size=4)
+    upstream[file.path] = b"data"
+
+    download_chunk(file.pk, 0, 4)
+
+    file.refresh_from_db()
+    assert file.done_bytes == 0
+    assert not file.local_path.exists()
@@ -0,0 +1,256 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import connection
+from django.http import Http404
+from django.test import AsyncRequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from yfiles.downloads.models import DownloadJob
+from yfiles.downloads.progress import ProgressEvent
+from yfiles.downloads.progress import encode_sse
+from yfiles.downloads.progress import hub
+from yfiles.downloads.tests.factories import DownloadedFileFactory
+from yfiles.downloads.tests.factories import DownloadJobFactory
+from yfiles.downloads.views import job_manifest_view
+from yfiles.downloads.views import job_progress_view
+from yfiles.downloads.views import job_status_view
+from yfiles.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def subscribed(monkeypatch) -> asyncio.Event:
+    """Set once a view subscribes to the hub, which has no Redis listener here."""
+    event = asyncio.Event()
+    monkeypatch.setattr(hub, "_ensure_listener", event.set)
+    return event
+
+
+def _request(user: User, **params):
+    request = AsyncRequestFactory().get("/fake-url/", params)
+
+    async def auser():
+        return user
+
+    request.auser = auser
+    return request
+
+
+async def _collect(streaming_content) -> str:
+    return "".join([part.decode() async for part in streaming_content])
+
+
+class TestJobStatusView:
+    def test_status(self, client, user: User):
+        job = DownloadJobFactory(user=user, total_files=2)
+        client.force_login(user)
+        response = client.get(reverse("downloads:status", kwargs={"pk": job.pk}))
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == job.progress()
+
+    def test_not_authenticated(self, client):
+        job = DownloadJobFactory()
+        url = reverse("downloads:status", kwargs={"pk": job.pk})
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.FOUND
+        assert response.url == f"{reverse(settings.LOGIN_URL)}?next={url}"
+
+    def test_other_users_job(self, user: User):
+        job = DownloadJobFactory()
+        with pytest.raises(Http404):
+            async_to_sync(job_status_view)(_request(user), pk=job.pk)
+
+    def test_long_poll_returns_next_update(self, user: User, subscribed):
+        job = DownloadJobFactory(user=user, status=DownloadJob.Status.RUNNING)
+        update = {**job.progress(), "done_bytes": 512, "revision": "running:0:512"}
+
+        async def scenario():
+            request = _request(user, wait=5, since=job.progress()["revision"])
+            pending = asyncio.create_task(job_status_view(request, pk=job.pk))
+            await subscribed.wait()
+            hub.dispatch(job.pk, ProgressEvent(update, encode_sse(update)))
+            return await pending
+
+        response = async_to_sync(scenario)()
+        assert json.loads(response.content) == update
+
+    def test_long_poll_outdated_revision_returns_at_once(self, user: User):
+        job = DownloadJobFactory(user=user, status=DownloadJob.Status.RUNNING)
+        request = _request(user, wait=30, since="pending:0:0")
+        response = async_to_sync(job_status_view)(request, pk=job.pk)
+        assert json.loads(response.content) == job.progress()
+
+
+class TestJobProgressView:
+    def test_finished_job_sends_one_event(self, user: User):
+        job = DownloadJobFactory(user=user, status=DownloadJob.Status.DONE)
+        response = async_to_sync(job_progress_view)(_request(user), pk=job.pk)
+        assert response["Content-Type"] == "text/event-stream"
+        body = async_to_sync(_collect)(response.streaming_content)
+        assert body == encode_sse(job.progress())
+
+    def test_streams_until_job_finishes(self, user: User, subscribed):
+        job = DownloadJobFactory(user=user, status=DownloadJob.Status.RUNNING)
+        running = {**job.progress(), "done_bytes": 10}
+        done = {**job.progress(), "status": "done"}
+
+        async def scenario():
+            response = await job_progress_view(_request(user), pk=job.pk)
+            reader = asyncio.create_task(_collect(response.streaming_content))
+            await subscribed.wait()
+            for payload in (running, done):
+                hub.dispatch(job.pk, ProgressEvent(payload, encode_sse(payload)))
+            return await reader
+
+        body = async_to_sync(scenario)()
+        assert body == "".join(encode_sse(p) for p in (job.progress(), running, done))
+
+
+class TestJobManifestView:
+    def test_jsonl(self, user: User):
+        job = DownloadJobFactory(user=user)
+        DownloadedFileFactory.create_batch(3, job=job)
+        response = async_to_sync(job_manifest_view)(_request(user), pk=job.pk)
+        assert response["Content-Type"] == "application/x-ndjson"
+        assert f'filename="job-{job.pk}.jsonl"' in response["Content-Disposition"]
+        body = async_to_sync(_collect)(response.streaming_content)
+        assert [json.loads(line)["path"] for line in body.splitlines()] == list(
+            job.files.order_by("pk").values_list("path", flat=True),
+        )
+
+    def test_csv_since(self, user: User):
+        job = DownloadJobFactory(user=user)
+        DownloadedFileFactory(job=job, changed="2024-01-01T00:00:00Z")
+        recent = DownloadedFileFactory(job=job)
+        request = _request(user, format="csv", since="2024-06-01T00:00:00")
+        response = async_to_sync(job_manifest_view)(request, pk=job.pk)
+        assert response["Content-Type"] == "text/csv"
+        body = async_to_sync(_collect)(response.streaming_content)
+        assert body.splitlines()[0] == "path,size,md5,sha256,status,changed"
+        assert [line.split(",")[0] for line in body.splitlines()[1:]] == [
+            recent.path,
+        ]
+
+    @pytest.mark.parametrize("param", ["format", "since"])
+    def test_bad_request_does_not_reflect_input(self, user: User, param):
+        job = DownloadJobFactory(user=user)
+        value = "<script>alert(1)</script>"
+        request = _request(user, **{param: value})
+        response = async_to_sync(job_manifest_view)(request, pk=job.pk)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response["Content-Type"] == "text/plain"
+        assert b"<script>" not in response.content
+
+    def test_other_users_job(self, user: User):
+        job = DownloadJobFactory()
+        with pytest.raises(Http404):
+            async_to_sync(job_manifest_view)(_request(user), pk=job.pk)
+
+
+class TestJobFilesView:
+    def test_pages(self, client, user: User):
+        job = DownloadJobFactory(user=user)
+        DownloadedFileFactory.create_batch(3, job=job)
+        client.force_login(user)
+        url = reverse("downloads:files", kwargs={"pk": job.pk})
+
+        response = client.get(url, {"sort": "-size"})
+        assert response.status_code == HTTPStatus.OK
+        assert response.context["file_count"] == job.files.count()
+        assert response.context["sort"] == "-size"
+        assert not response.context["page"].has_previous
+
+    def test_queries_do_not_grow_with_rows(self, client, user: User):
+        job = DownloadJobFactory(user=user)
+        client.force_login(user)
+        url = reverse("downloads:files", kwargs={"pk": job.pk})
+        DownloadedFileFactory(job=job)
+        client.get(url)  # warm per-process caches
+        with CaptureQueriesContext(connection) as one:
+            client.get(url)
+        DownloadedFileFactory.create_batch(5, job=job)
+        with CaptureQueriesContext(connection) as six:
+            client.get(url)
+        assert len(six) == len(one)
+
+    def test_previews_link_to_storage_once_made(self, client, user: User):
+        job = DownloadJobFactory(user=user)
+        DownloadedFileFactory(job=job, path="a.jpg", preview="previews/ab/ab.jpg")
+        DownloadedFileFactory(job=job, path="b.jpg")
+        client.force_login(user)
+        url = reverse("downloads:files", kwargs={"pk": job.pk})
+        client.get(url)  # warm per-process caches
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+
+        content = response.content.decode()
+        assert content.count("<img") == 1
+        assert f'src="{settings.MEDIA_URL}/previews/ab/ab.jpg"' in content
+        # The preview comes with the page, not one deferred load per file.
+        loads = [
+            q for q in queries if '"downloads_downloadedfile"."preview"' in q["sql"]
+        ]
+        assert len(loads) == 1
+
+    def test_bad_sort_and_cursor_fall_back_to_first_page(self, client, user: User):
+        job = DownloadJobFactory(user=user)
+        file = DownloadedFileFactory(job=job)
+        client.force_login(user)
+        response = client.get(
+            reverse("downloads:files", kwargs={"pk": job.pk}),
+            {"sort": "name", "after": "garbage"},
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.context["sort"] == "path"
+        assert response.context["files"] == [file]
+
+    def test_count_uses_stored_total(self, client, user: User):
+        job = DownloadJobFactory(user=user, total_files=1000)
+        client.force_login(user)
+        response = client.get(reverse("downloads:files", kwargs={"pk": job.pk}))
+        assert response.context["file_count"] == job.total_files
+
+    def test_other_users_job(self, client, user: User):
+        job = DownloadJobFactory()
+        client.force_login(user)
+        response = client.get(reverse("downloads:files", kwargs={"pk": job.pk}))
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+class TestFilePreviewView:
+    def test_redirects_to_media(self, client, user: User):
+        file = DownloadedFileFactory(job__user=user, preview="previews/ab/ab.jpg")
+        client.force_login(user)
+        response = client.get(reverse("downloads:preview", kwargs={"pk": file.pk}))
+        assert response.status_code == HTTPStatus.FOUND
+        assert response.url == f"{settings.MEDIA_URL}/previews/ab/ab.jpg"
+        assert "private" in response["Cache-Control"]
+
+    def test_not_made_yet(self, client, user: User):
+        file = DownloadedFileFactory(job__user=user)
+        client.force_login(user)
+        response = client.get(reverse("downloads:preview", kwargs={"pk": file.pk}))
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_other_users_file(self, client, user: User):
+        file = DownloadedFileFactory(preview="previews/ab/ab.jpg")
+        client.force_login(user)
+        response = client.get(reverse("downloads:preview", kwargs={"pk": file.pk}))
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+class TestFileSearchView:
+    def test_search(self, client, user: User):
+        file = DownloadedFileFactory(job__user=user, path="/photos/beach.jpg")
+        client.force_login(user)
+        response = client.get(reverse("downloads:search"), {"q": "  beach "})
+        assert response.status_code == HTTPStatus.OK
+        assert response.context["query"] == "beach"
+        assert [r["id"] for r in response.context["results"]] == [file.pk]
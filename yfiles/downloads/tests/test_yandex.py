@@ -0,0 +1,137 @@
+from http import HTTPStatus
+
+import pytest
+
+from yfiles.downloads import yandex
+
+
+class FakeResponse:
+    def __init__(self, payload=None, status=HTTPStatus.OK, body=b""):
+        self.payload = payload
+        self.status_code = status
+        self.reason = status.phrase
+        self.body = body
+
+    def json(self):
+        return self.payload
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start : start + chunk_size]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls = []
+
+    def get(self, url, params=None, headers=None, **kwargs):
+        self.calls.append((url, params, headers))
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def session(monkeypatch):
+    fake = FakeSession([])
+    monkeypatch.setattr(yandex, "get_session", lambda: fake)
+    return fake
+
+
+MODIFIED = "2024-10-01T12:00:00+00:00"
+
+
+def _item(path, size=1, kind="file"):
+    return {
+        "type": kind,
+        "path": path,
+        "size": size,
+        "modified": MODIFIED,
+        "md5": "m",
+        "sha256": "s",
+    }
+
+
+def test_iter_files_walks_pages_and_folders(session):
+    session.responses += [
+        FakeResponse(
+            {
+                "type": "dir",
+                "_embedded": {
+                    "total": 3,
+                    "items": [_item("/a.txt"), _item("/sub", kind="dir")],
+                },
+            },
+        ),
+        FakeResponse(
+            {"type": "dir", "_embedded": {"total": 3, "items": [_item("/b.txt")]}},
+        ),
+        FakeResponse(
+            {"type": "dir", "_embedded": {"total": 1, "items": [_item("/sub/c.txt")]}},
+        ),
+    ]
+
+    files = list(yandex.iter_files("https://disk.yandex.ru/d/key", page_size=2))
+
+    assert [f.path for f in files] == ["/a.txt", "/b.txt", "/sub/c.txt"]
+    assert [call[1]["offset"] for call in session.calls] == [0, 2, 0]
+    assert session.calls[2][1]["path"] == "/sub"
+
+
+def test_iter_files_single_file_link(session):
+    resource = {
+        "type": "file",
+        "name": "report.pdf",
+        "path": "/",
+        "size": 7,
+        "modified": MODIFIED,
+    }
+    session.responses.append(FakeResponse(resource))
+    [file] = yandex.iter_files("https://disk.yandex.ru/d/key")
+    assert file.path == "/report.pdf"
+    assert file.size == resource["size"]
+
+
+def test_request_error(session):
+    session.responses.append(
+        FakeResponse(
+            {"description": "Resource not found."},
+            status=HTTPStatus.NOT_FOUND,
+        ),
+    )
+    with pytest.raises(yandex.YandexDiskError) as exc_info:
+        yandex.get_download_url("https://disk.yandex.ru/d/key", "/missing")
+    assert exc_info.value.status == HTTPStatus.NOT_FOUND
+    assert str(exc_info.value) == "Resource not found."
+
+
+def test_iter_range(session):
+    session.responses.append(
+        FakeResponse(status=HTTPStatus.PARTIAL_CONTENT, body=b"x" * 10),
+    )
+    assert b"".join(yandex.iter_range("https://example.com/f", 10, 10)) == b"x" * 10
+    assert session.calls[0][2] == {"Range": "bytes=10-19"}
+
+
+def test_iter_range_truncates_full_response(session):
+    session.responses.append(FakeResponse(body=b"0123456789"))
+    assert b"".join(yandex.iter_range("https://example.com/f", 0, 4)) == b"0123"
+
+
+def test_iter_range_rejects_ignored_range(session):
+    session.responses.append(FakeResponse(body=b"0123456789"))
+    with pytest.raises(yandex.YandexDiskError):
+        list(yandex.iter_range("https://example.com/f", 4, 4))
+
+
+def test_iter_range_short_body(session):
+    session.responses.append(
+        FakeResponse(status=HTTPStatus.PARTIAL_CONTENT, body=b"012"),
+    )
+    with pytest.raises(yandex.YandexDiskError):
+        list(yandex.iter_range("https://example.com/f", 0, 4))
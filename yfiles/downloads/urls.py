@@ -0,0 +1,18 @@
+from django.urls import path
+
+from .views import file_preview_view
+from .views import file_search_view
+from .views import job_files_view
+from .views import job_manifest_view
+from .views import job_progress_view
+from .views import job_status_view
+
+app_name = "downloads"
+urlpatterns = [
+    path("search/", view=file_search_view, name="search"),
+    path("<int:pk>/files/", view=job_files_view, name="files"),
+    path("<int:pk>/status/", view=job_status_view, name="status"),
+    path("<int:pk>/progress/", view=job_progress_view, name="progress"),
+    path("<int:pk>/manifest/", view=job_manifest_view, name="manifest"),
+    path("files/<int:pk>/preview/", view=file_preview_view, name="preview"),
+]
@@ -0,0 +1,262 @@
+import asyncio
+import contextlib
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.cache import cache
+from django.core.files.storage import storages
+from django.db import transaction
+from django.db.models import QuerySet
+from django.http import Http404
+from django.http import HttpRequest
+from django.http import HttpResponseBadRequest
+from django.http import HttpResponseRedirect
+from django.http import JsonResponse
+from django.http import StreamingHttpResponse
+from django.shortcuts import aget_object_or_404
+from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control
+from django.views.generic import DetailView
+from django.views.generic import TemplateView
+
+from . import manifest
+from .models import DownloadedFile
+from .models import DownloadJob
+from .pagination import InvalidCursor
+from .pagination import KeysetPaginator
+from .progress import encode_sse
+from .progress import hub
+from .search import MIN_QUERY_LENGTH
+from .search import normalize_query
+from .search import search_files
+
+# Keyset orderings of the file browser. Each is unique within a job and served
+# by one of the DownloadedFile indexes, scanned forwards or backwards.
+FILE_SORTS = {
+    "path": ("path",),
+    "-path": ("-path",),
+    "size": ("size", "path"),
+    "-size": ("-size", "-path"),
+    "modified": ("modified", "path"),
+    "-modified": ("-modified", "-path"),
+}
+FILE_COUNT_TIMEOUT = 30
+PREVIEW_REDIRECT_MAX_AGE = 60 * 60
+
+
+def file_count(job: DownloadJob) -> int:
+    """
+    Number of files of a job without counting rows on every page view.
+
+    ``total_files`` is stored once the listing is complete; until then a
+    COUNT(*) is cached for a short while.
+    """
+    if job.total_files:
+        return job.total_files
+    return cache.get_or_set(  # type: ignore[return-value]
+        f"downloads:file-count:{job.pk}",
+        job.files.count,
+        FILE_COUNT_TIMEOUT,
+    )
+
+
+class JobFilesView(LoginRequiredMixin, DetailView):
+    """Browse the files of a job, a keyset page at a time."""
+
+    template_name = "users/file_browser.html"
+    context_object_name = "job"
+    per_page = 100
+
+    def get_queryset(self) -> QuerySet[DownloadJob]:
+        assert self.request.user.is_authenticated  # type guard
+        return DownloadJob.objects.filter(user=self.request.user)
+
+    def get_context_data(self, **kwargs) -> dict:
+        context = super().get_context_data(**kwargs)
+        sort = self.request.GET.get("sort")
+        if sort not in FILE_SORTS:
+            sort = "path"
+        paginator = KeysetPaginator(
+            # Only the columns the indexes INCLUDE: pages are index-only scans.
+            self.object.files.only(
+                "job",
+                "path",
+                "size",
+                "modified",
+                "status",
+                "preview",
+            ),
+            FILE_SORTS[sort],
+            self.per_page,
+        )
+        try:
+            page = paginator.page(
+                after=self.request.GET.get("after"),
+                before=self.request.GET.get("before"),
+            )
+        except InvalidCursor:
+            page = paginator.page()
+        context.update(
+            {
+                "page": page,
+                "files": page.object_list,
+                "sort": sort,
+                "file_count": file_count(self.object),
+            },
+        )
+        return context
+
+
+job_files_view = JobFilesView.as_view()
+
+
+@login_required
+def file_preview_view(request: HttpRequest, pk: int) -> HttpResponseRedirect:
+    """Redirect to the preview of an image of the user, in the media storage."""
+    file = get_object_or_404(
+        DownloadedFile.objects.only("preview"),
+        pk=pk,
+        job__user=request.user,
+    )
+    if not file.preview:
+        raise Http404
+    response = HttpResponseRedirect(storages["default"].url(file.preview))
+    # The preview is named after its source; only a replay may change it.
+    patch_cache_control(response, private=True, max_age=PREVIEW_REDIRECT_MAX_AGE)
+    return response
+
+
+async def _get_user_job(request: HttpRequest, pk: int) -> DownloadJob:
+    user = await request.auser()
+    return await aget_object_or_404(DownloadJob, pk=pk, user=user)
+
+
+# Async views cannot run inside ATOMIC_REQUESTS transactions.
+@transaction.non_atomic_requests  # type: ignore[type-var]
+@login_required
+async def job_status_view(request: HttpRequest, pk: int) -> JsonResponse:
+    """
+    Current state of a job, optionally long-polled.
+
+    With ``?wait=<seconds>&since=<revision>`` the response is held until the
+    job moves past ``revision`` or the wait runs out.
+    """
+    try:
+        wait = min(
+            int(request.GET.get("wait", 0)),
+            settings.DOWNLOADS_LONG_POLL_TIMEOUT,
+        )
+    except ValueError:
+        wait = 0
+    since = request.GET.get("since")
+
+    if wait <= 0 or since is None:
+        job = await _get_user_job(request, pk)
+        return JsonResponse(job.progress())
+
+    # Subscribe before reading the snapshot so no update can slip in between.
+    async with hub.subscribe(pk) as queue:
+        job = await _get_user_job(request, pk)
+        state = job.progress()
+        if state["revision"] == since and not job.is_finished:
+            with contextlib.suppress(TimeoutError):
+                event = await asyncio.wait_for(queue.get(), wait)
+                if event is not None:
+                    state = event.data
+    return JsonResponse(state)
+
+
+@transaction.non_atomic_requests  # type: ignore[type-var]
+@login_required
+async def job_progress_view(request: HttpRequest, pk: int) -> StreamingHttpResponse:
+    """Server-sent events stream of job progress, ending when the job does."""
+    job = await _get_user_job(request, pk)
+    response = StreamingHttpResponse(
+        _progress_events(job),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the stream.
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@transaction.non_atomic_requests  # type: ignore[type-var]
+@login_required
+async def job_manifest_view(request: HttpRequest, pk: int):
+    """
+    Manifest of the files of a job, streamed as JSON lines, or CSV with
+    ``?format=csv``. ``?since=<ISO 8601 time>`` limits it to the files listed
+    or changed status since then.
+    """
+    job = await _get_user_job(request, pk)
+    fmt = request.GET.get("format", "jsonl")
+    # The messages leave out the values given, which would be reflected back.
+    if fmt not in manifest.CONTENT_TYPES:
+        return HttpResponseBadRequest(
+            f"format must be one of: {', '.join(manifest.CONTENT_TYPES)}.",
+            content_type="text/plain",
+        )
+    since = None
+    if "since" in request.GET:
+        try:
+            since = manifest.parse_since(request.GET["since"])
+        except ValueError:
+            return HttpResponseBadRequest(
+                "since must be an ISO 8601 date and time.",
+                content_type="text/plain",
+            )
+    response = StreamingHttpResponse(
+        manifest.stream(job.pk, fmt, since),
+        content_type=manifest.CONTENT_TYPES[fmt],
+    )
+    response["Content-Disposition"] = f'attachment; filename="job-{job.pk}.{fmt}"'
+    return response
+
+
+async def _progress_events(job: DownloadJob):
+    async with hub.subscribe(job.pk) as queue:
+        state = job.progress()
+        yield encode_sse(state)
+        while state["status"] not in DownloadJob.FINISHED:
+            try:
+                event = await asyncio.wait_for(
+                    queue.get(),
+                    settings.DOWNLOADS_PROGRESS_HEARTBEAT,
+                )
+            except TimeoutError:
+                # Catch up on anything published before the subscription was live.
+                await job.arefresh_from_db()
+                if job.progress()["revision"] == state["revision"]:
+                    yield ": keep-alive\n\n"
+                else:
+                    state = job.progress()
+                    yield encode_sse(state)
+                continue
+            if event is None:
+                # Redis went away; EventSource clients reconnect on their own.
+                return
+            state = event.data
+            yield event.sse
+
+
+class FileSearchView(LoginRequiredMixin, TemplateView):
+    """Find files by a part of their path across all jobs of the user."""
+
+    template_name = "users/file_search.html"
+
+    def get_context_data(self, **kwargs) -> dict:
+        context = super().get_context_data(**kwargs)
+        query = normalize_query(self.request.GET.get("q", ""))
+        context.update(
+            {
+                "query": query,
+                "min_query_length": MIN_QUERY_LENGTH,
+                "results": search_files(self.request.user.pk, query),
+            },
+        )
+        return context
+
+
+file_search_view = FileSearchView.as_view()
@@ -0,0 +1,160 @@
+"""
+Client for the public resources part of the Yandex Disk REST API.
+
+See: https://yandex.com/dev/disk-api/doc/en/reference/public
+"""
+
+import datetime
+import os
+from collections.abc import Iterator
+from dataclasses import dataclass
+from http import HTTPStatus
+
+import requests
+from django.conf import settings
+
+PAGE_SIZE = 1000
+STREAM_BLOCK_SIZE = 256 * 1024
+LISTING_FIELDS = ",".join(
+    [
+        "type",
+        "name",
+        "path",
+        "size",
+        "modified",
+        "md5",
+        "sha256",
+        "_embedded.total",
+        *(
+            f"_embedded.items.{field}"
+            for field in ("type", "path", "size", "modified", "md5", "sha256")
+        ),
+    ],
+)
+
+_sessions: dict[int, requests.Session] = {}
+
+
+class YandexDiskError(Exception):
+    """The API answered with an error or with something that is not a resource."""
+
+    def __init__(self, message: str, status: int | None = None):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass(frozen=True, slots=True)
+class PublicFile:
+    path: str
+    size: int
+    modified: datetime.datetime
+    md5: str
+    sha256: str
+
+
+def get_session() -> requests.Session:
+    """
+    Keep-alive session of the current process.
+
+    Sessions are never shared across a fork: a prefork child that inherited its
+    parent's sockets would read the parent's responses.
+    """
+    pid = os.getpid()
+    if pid not in _sessions:
+        _sessions.clear()
+        _sessions[pid] = requests.Session()
+    return _sessions[pid]
+
+
+def _request(endpoint: str, params: dict) -> dict:
+    url = settings.YANDEX_DISK_API_URL + endpoint
+    response = get_session().get(
+        url,
+        params=params,
+        timeout=settings.YANDEX_DISK_TIMEOUT,
+    )
+    if response.status_code != HTTPStatus.OK:
+        try:
+            message = response.json().get("description") or response.reason
+        except ValueError:
+            message = response.reason
+        raise YandexDiskError(message, status=response.status_code)
+    return response.json()
+
+
+def _public_file(item: dict, path: str) -> PublicFile:
+    return PublicFile(
+        path=path,
+        size=item.get("size", 0),
+        modified=datetime.datetime.fromisoformat(item["modified"]),
+        md5=item.get("md5", ""),
+        sha256=item.get("sha256", ""),
+    )
+
+
+def iter_files(public_key: str, page_size: int = PAGE_SIZE) -> Iterator[PublicFile]:
+    """
+    Yield every file of a public resource, walking nested folders.
+
+    Listings are paginated, so memory stays flat for folders of any size.
+    """
+    pending = ["/"]
+    while pending:
+        directory = pending.pop()
+        offset = 0
+        while True:
+            resource = _request(
+                "",
+                {
+                    "public_key": public_key,
+                    "path": directory,
+                    "limit": page_size,
+                    "offset": offset,
+                    "fields": LISTING_FIELDS,
+                },
+            )
+            if resource["type"] == "file":
+                # The public link points at a single file rather than a folder.
+                yield _public_file(resource, f"/{resource['name']}")
+                break
+            embedded = resource["_embedded"]
+            for item in embedded["items"]:
+                if item["type"] == "dir":
+                    pending.append(item["path"])
+                else:
+                    yield _public_file(item, item["path"])
+            offset += len(embedded["items"])
+            if not embedded["items"] or offset >= embedded["total"]:
+                break
+
+
+def get_download_url(public_key: str, path: str) -> str:
+    """Resolve a short-lived direct download link for one file."""
+    return _request("/download", {"public_key": public_key, "path": path})["href"]
+
+
+def iter_range(url: str, offset: int, length: int) -> Iterator[bytes]:
+    """Stream ``length`` bytes of ``url`` starting at ``offset``."""
+    headers = {"Range": f"bytes={offset}-{offset + length - 1}"}
+    with get_session().get(
+        url,
+        headers=headers,
+        stream=True,
+        timeout=settings.YANDEX_DISK_TIMEOUT,
+    ) as response:
+        if response.status_code == HTTPStatus.OK and offset:
+            msg = "Server ignored the Range header"
+            raise YandexDiskError(msg, status=response.status_code)
+        if response.status_code not in (HTTPStatus.OK, HTTPStatus.PARTIAL_CONTENT):
+            raise YandexDiskError(response.reason, status=response.status_code)
+        received = 0
+        for block in response.iter_content(STREAM_BLOCK_SIZE):
+            # A 200 for offset 0 carries the whole file: stop after our chunk.
+            block = block[: length - received]  # noqa: PLW2901
+            received += len(block)
+            yield block
+            if received >= length:
+                break
+        if received != length:
+            msg = f"Expected {length} bytes at offset {offset}, got {received}"
+            raise YandexDiskError(msg)
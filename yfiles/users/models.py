@@ -1,8 +1,14 @@
 from typing import ClassVar
 
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.indexes import OpClass
 from django.db.models import CharField
 from django.db.models import EmailField
+from django.db.models import Index
+from django.db.models import TextField
+from django.db.models.functions import Cast
+from django.db.models.functions import Upper
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
@@ -28,6 +34,20 @@ class User(AbstractUser):
 
     objects: ClassVar[UserManager] = UserManager()
 
+    class Meta(AbstractUser.Meta):  # type: ignore[name-defined]
+        # Back the admin search: "name" runs UPPER(name::text) LIKE '%...%' and
+        # "^email" runs UPPER(email::text) LIKE '...%'.
+        indexes = [
+            GinIndex(
+                OpClass(Upper(Cast("name", TextField())), name="gin_trgm_ops"),
+                name="users_user_name_trgm",
+            ),
+            Index(
+                OpClass(Upper(Cast("email", TextField())), name="text_pattern_ops"),
+                name="users_user_email_prefix",
+            ),
+        ]
+
     def get_absolute_url(self) -> str:
         """Get URL for user's detail view.
 
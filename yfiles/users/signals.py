@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from yfiles.core.cache import bump_instance_version
+
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def expire_user_fragments(sender, instance: User, **kwargs) -> None:
+    """Retire every template fragment cached for the previous state of a user."""
+    bump_instance_version(instance)
@@ -1,5 +1,23 @@
+import pytest
+from django.db import connection
+
 from yfiles.users.models import User
 
 
 def test_user_get_absolute_url(user: User):
     assert user.get_absolute_url() == f"/users/{user.pk}/"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ("lookup", "index"),
+    [
+        ({"name__icontains": "ohn"}, "users_user_name_trgm"),
+        ({"email__istartswith": "john"}, "users_user_email_prefix"),
+    ],
+)
+def test_admin_search_lookups_use_indexes(lookup, index):
+    with connection.cursor() as cursor:
+        # The test table is tiny: make the planner prefer any usable index.
+        cursor.execute("SET LOCAL enable_seqscan = off")
+    assert index in User.objects.filter(**lookup).explain()
@@ -12,6 +12,9 @@ from django.test import RequestFactory
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
+from yfiles.core.profiling import QueryBudgetError
+from yfiles.downloads.tests.factories import DownloadedFileFactory
+from yfiles.downloads.tests.factories import DownloadJobFactory
 from yfiles.users.forms import UserAdminChangeForm
 from yfiles.users.models import User
 from yfiles.users.tests.factories import UserFactory
@@ -99,3 +102,46 @@ class TestUserDetailView:
         assert isinstance(response, HttpResponseRedirect)
         assert response.status_code == HTTPStatus.FOUND
         assert response.url == f"{login_url}?next=/fake-url/"
+
+
+class TestQueryBudgets:
+    """Every view stays within its ``QUERY_BUDGETS`` entry, or the request fails."""
+
+    @pytest.mark.parametrize(
+        ("view", "pk", "params"),
+        [
+            ("home", None, {}),
+            ("about", None, {}),
+            ("users:detail", "user", {}),
+            ("users:update", None, {}),
+            ("users:redirect", None, {}),
+            ("downloads:files", "job", {}),
+            ("downloads:search", None, {"q": "file"}),
+            ("downloads:status", "job", {}),
+            ("downloads:progress", "job", {}),
+            ("downloads:manifest", "job", {}),
+            ("downloads:preview", "file", {}),
+        ],
+    )
+    def test_within_budget(self, client, user: User, view, pk, params):
+        job = DownloadJobFactory(user=user, status="done")
+        files = DownloadedFileFactory.create_batch(
+            5,
+            job=job,
+            preview="previews/ab/ab.jpg",
+        )
+        ids = {"user": user.pk, "job": job.pk, "file": files[0].pk}
+        kwargs = {"pk": ids[pk]} if pk else None
+        client.force_login(user)
+
+        response = client.get(reverse(view, kwargs=kwargs), params)
+
+        assert response.status_code in (HTTPStatus.OK, HTTPStatus.FOUND)
+        assert view in settings.QUERY_BUDGETS
+
+    def test_over_budget(self, client, user: User, settings):
+        settings.QUERY_BUDGETS = {"users:detail": 1}
+        client.force_login(user)
+
+        with pytest.raises(QueryBudgetError, match="over its budget of 1"):
+            client.get(reverse("users:detail", kwargs={"pk": user.pk}))